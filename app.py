@@ -9,8 +9,10 @@ from werkzeug.exceptions import HTTPException
 
 from config.extensions import csrf, db, login_manager
 from config.models import User, UserLoginLog
+from config.uploads import UploadRequest
 
-logging.basicConfig(level=logging.DEBUG)
+# Satu-satunya tempat logging dikonfigurasi; modul lain cukup getLogger(__name__)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -20,6 +22,8 @@ os.makedirs(instance_path, exist_ok=True)
 
 def create_app():
     app = Flask(__name__, instance_path=instance_path)
+    # File upload dialirkan langsung ke disk sambil di-hash (config.uploads)
+    app.request_class = UploadRequest
 
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(
         instance_path, "app.db"
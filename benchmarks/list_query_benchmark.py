@@ -0,0 +1,207 @@
+"""
+Benchmark query daftar surat (tabel surat masuk, daftar pending, dashboard).
+
+Contoh:
+    python benchmarks/list_query_benchmark.py
+    python benchmarks/list_query_benchmark.py --rows 50000 --blob-bytes 65536 --output hasil.json
+
+Tabel ``surat_masuk`` di database SQLite sementara diisi ``--rows`` baris
+(isi surat beberapa KB, blob gambar ``--blob-bytes``), lalu setiap mode query
+dijalankan di proses tersendiri:
+
+- ``full_rows``: seluruh kolom termasuk blob (perilaku sebelum kolom blob
+  di-defer dan sebelum ``list_query``);
+- ``orm_rows``: ``SuratMasuk.query`` biasa (blob deferred, isi lengkap);
+- ``list_query``: ``SuratMasuk.list_query()`` (kolom daftar + ringkasan isi dari SQL).
+
+Setiap baris dibaca seperti template daftar (kolom yang ditampilkan dan
+ringkasan isi). Laporan berisi baris/detik, peak alokasi Python (tracemalloc)
+dan peak RSS per mode.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ('full_rows', 'orm_rows', 'list_query')
+WORDS = (
+    'surat', 'undangan', 'rapat', 'koordinasi', 'kegiatan', 'dinas', 'kepala', 'bagian', 'umum',
+    'perihal', 'pelaksanaan', 'anggaran', 'tahun', 'laporan', 'mohon', 'hadir', 'tepat', 'waktu',
+)
+
+
+def _create_app(db_path):
+    from flask import Flask
+
+    from config.extensions import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(db_path, rows, blob_bytes, isi_chars, seed_value=0, batch_size=1000):
+    """Isi tabel surat_masuk dengan ``rows`` surat sintetis"""
+    from config.extensions import db
+    from config.models import SuratMasuk
+
+    app = _create_app(db_path)
+    rng = random.Random(seed_value)
+    blob = os.urandom(blob_bytes) if blob_bytes else None
+    start = datetime(2020, 1, 1)
+    with app.app_context():
+        db.create_all()
+        table = SuratMasuk.__table__
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for index in range(offset, min(rows, offset + batch_size)):
+                isi = ' '.join(rng.choice(WORDS) for _ in range(isi_chars // 7))[:isi_chars]
+                created_at = start + timedelta(minutes=index)
+                batch.append({
+                    'nomor_suratMasuk': f'{index:05d}/UND/{created_at.year}',
+                    'tanggal_suratMasuk': created_at,
+                    'pengirim_suratMasuk': f'Dinas {rng.choice(WORDS).title()}',
+                    'penerima_suratMasuk': 'Kepala Bagian Umum',
+                    'kode_suratMasuk': 'UND',
+                    'jenis_suratMasuk': 'Undangan',
+                    'isi_suratMasuk': isi,
+                    'initial_isi_suratMasuk': isi,
+                    'gambar_suratMasuk': blob,
+                    'status_suratMasuk': 'pending' if index % 5 == 0 else 'approved',
+                    'created_at': created_at,
+                })
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1)
+
+
+def run_mode(db_path, mode, repeat):
+    """Jalankan satu mode query (dipanggil di proses baru)"""
+    from sqlalchemy.orm import undefer
+
+    from config.extensions import db
+    from config.models import SuratMasuk
+
+    app = _create_app(db_path)
+    with app.app_context():
+        baseline_rss = _peak_rss_mb()
+        durations = []
+        rows = 0
+        tracemalloc.start()
+        for _ in range(repeat):
+            db.session.expunge_all()
+            if mode == 'full_rows':
+                query = SuratMasuk.query.options(undefer('*'))
+            elif mode == 'orm_rows':
+                query = SuratMasuk.query
+            else:
+                query = SuratMasuk.list_query()
+            started = time.perf_counter()
+            entries = query.order_by(SuratMasuk.created_at.desc()).all()
+            for entry in entries:
+                # Kolom yang dibaca template daftar surat
+                (entry.id_suratMasuk, entry.nomor_suratMasuk, entry.tanggal_suratMasuk,
+                 entry.pengirim_suratMasuk, entry.penerima_suratMasuk, entry.status_suratMasuk,
+                 entry.created_at, entry.ringkasan_isi)
+            durations.append(time.perf_counter() - started)
+            rows = len(entries)
+            del entries
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    best = min(durations)
+    return {
+        'rows': rows,
+        'best_seconds': round(best, 3),
+        'rows_per_sec': round(rows / best) if best else None,
+        'peak_alloc_mb': round(peak_alloc / (1024 * 1024), 1),
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _print_summary(report):
+    print(f"{'mode':<12}{'rows':>8}{'seconds':>10}{'rows/s':>10}{'alloc MB':>10}{'RSS MB':>9}")
+    for mode, result in report['modes'].items():
+        print(
+            f"{mode:<12}{result['rows']:>8}{result['best_seconds']:>10.3f}{result['rows_per_sec'] or 0:>10}"
+            f"{result['peak_alloc_mb']:>10.1f}{result['peak_rss_mb'] or 0:>9.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark query daftar surat masuk')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--blob-bytes', type=int, default=16384, help='Ukuran blob gambar per baris')
+    parser.add_argument('--isi-chars', type=int, default=2000, help='Panjang isi surat per baris')
+    parser.add_argument('--modes', default=','.join(MODES), help='Mode dipisah koma')
+    parser.add_argument('--repeat', type=int, default=3, help='Pengulangan per mode (diambil yang tercepat)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Tulis laporan JSON ke file ini')
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown modes: {unknown}")
+
+    with tempfile.TemporaryDirectory(prefix='list_bench_') as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        print(f"Seeding {args.rows} rows ({args.blob_bytes} byte blobs) into {db_path}", file=sys.stderr)
+        seed(db_path, args.rows, args.blob_bytes, args.isi_chars, seed_value=args.seed)
+
+        results = {}
+        # Proses baru per mode (spawn) agar peak RSS dan cache SQLite tidak tercampur
+        context = multiprocessing.get_context('spawn')
+        for mode in modes:
+            print(f"Running {mode}", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[mode] = executor.submit(run_mode, db_path, mode, max(1, args.repeat)).result()
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': args.rows,
+            'blob_bytes': args.blob_bytes,
+            'isi_chars': args.isi_chars,
+            'repeat': args.repeat,
+        },
+        'modes': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    _print_summary(report)
+
+
+if __name__ == '__main__':
+    main()
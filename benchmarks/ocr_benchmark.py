@@ -0,0 +1,328 @@
+"""
+Benchmark end-to-end pipeline OCR pada surat sintetis.
+
+Contoh:
+    python benchmarks/ocr_benchmark.py
+    python benchmarks/ocr_benchmark.py --count 30 --profiles clean,noisy --output hasil.json
+    python benchmarks/ocr_benchmark.py --kinds cuti --keep-images /tmp/cuti
+
+Setiap jenis dokumen dijalankan di proses tersendiri lewat pipeline aplikasi
+(``extract_ocr_data_surat_masuk``, ``ocr_surat_keluar.extract_ocr_data``,
+``extract_cuti_fields``). Laporan berisi docs/detik, latensi p50/p95, peak RSS
+dan akurasi per field, ditulis sebagai JSON (kunci terurut) agar hasil dua
+versi bisa langsung di-diff.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from difflib import SequenceMatcher
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_letters import DEGRADATION_PROFILES, INDONESIAN_MONTHS, generate_documents
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PIPELINES = ('surat_masuk', 'surat_keluar', 'cuti')
+# Field hasil pipeline yang dibandingkan dengan nilai benar dokumen
+FIELD_MAP = {
+    'surat_masuk': {'nomor_surat': 'nomor_surat', 'tanggal': 'tanggal', 'pengirim': 'pengirim',
+                    'penerima': 'penerima', 'perihal': 'isi'},
+    'surat_keluar': {'nomor_surat': 'nomor_surat', 'tanggal': 'tanggal', 'pengirim': 'pengirim',
+                     'penerima': 'penerima', 'perihal': 'isi'},
+    'cuti': {'nama': 'nama', 'jabatan': 'jabatan', 'unit_kerja': 'unit_kerja', 'jenis_cuti': 'jenis_cuti'},
+}
+MISSING_VALUES = ('not found', 'tidak terbaca', 'n/a', 'none')
+# Variabel lingkungan yang memengaruhi hasil; dicatat di laporan
+RECORDED_ENV = (
+    'OCR_ENGINE_BACKEND', 'OCR_CASCADE_MODE', 'OCR_PREPROCESS_BACKEND', 'OCR_PREPROCESS_STEPS',
+    'OCR_TARGET_DPI', 'OCR_MAX_WORKERS', 'OCR_CACHE_ENABLED',
+)
+
+_MONTH_NUMBERS = {name.lower(): index for index, name in enumerate(INDONESIAN_MONTHS, start=1)}
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_NUMERIC_DATE_RE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
+_LONG_DATE_RE = re.compile(r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})')
+
+
+def _load_pipeline(kind):
+    """Fungsi path -> dict hasil untuk satu jenis dokumen"""
+    if kind == 'surat_masuk':
+        from config.ocr_surat_masuk import extract_ocr_data_surat_masuk
+        return extract_ocr_data_surat_masuk
+    if kind == 'surat_keluar':
+        from config.ocr_surat_keluar import extract_ocr_data
+        return extract_ocr_data
+
+    from PIL import Image
+
+    from config import ocr_engine
+    from config.ocr_cuti_v2 import extract_cuti_fields
+
+    def extract_cuti(file_path):
+        # Sama dengan run_cuti_ocr_job untuk file gambar
+        with Image.open(file_path) as image:
+            return extract_cuti_fields(ocr_engine.run_ocr(image, lang='ind'))
+    return extract_cuti
+
+
+def normalize_date(value):
+    """Tanggal dalam format apa pun yang dihasilkan extractor -> 'YYYY-MM-DD'"""
+    value = str(value or '')
+    match = _ISO_DATE_RE.search(value)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _NUMERIC_DATE_RE.search(value)
+        if match:
+            day, month, year = match.groups()
+        else:
+            match = _LONG_DATE_RE.search(value)
+            if not match or match.group(2).lower() not in _MONTH_NUMBERS:
+                return ''
+            day, month, year = match.group(1), _MONTH_NUMBERS[match.group(2).lower()], match.group(3)
+    return f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
+
+
+def normalize_value(field, value):
+    """Bentuk pembanding: huruf kecil, spasi dirapatkan, tanda baca tepi dibuang"""
+    value = '' if value is None else str(value)
+    if value.strip().lower() in MISSING_VALUES:
+        return ''
+    if field == 'tanggal':
+        return normalize_date(value)
+    value = value.casefold()
+    if field == 'nomor_surat':
+        return re.sub(r'\s+', '', value)
+    value = re.sub(r"[^\w/.'-]+", ' ', value)
+    return ' '.join(value.split()).strip(" .,:;-'")
+
+
+def score_fields(kind, truth, result):
+    """dict field -> (cocok persis, kemiripan 0..1)"""
+    scores = {}
+    for field, result_key in FIELD_MAP[kind].items():
+        expected = normalize_value(field, truth[field])
+        actual = normalize_value(field, (result or {}).get(result_key))
+        similarity = SequenceMatcher(None, expected, actual).ratio() if actual else 0.0
+        scores[field] = (expected == actual, round(similarity, 4))
+    return scores
+
+
+def percentile(values, q):
+    """Persentil nearest-rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _peak_rss_mb():
+    """Peak RSS proses ini dan proses anak (mis. tesseract) dalam MB"""
+    if resource is None:
+        return None, None
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (
+        round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1),
+    )
+
+
+def run_pipeline(kind, documents, warmup, quiet=True):
+    """Jalankan satu pipeline atas dokumennya; dipanggil di proses tersendiri"""
+    if quiet:
+        logging.disable(logging.CRITICAL)
+    extractor = _load_pipeline(kind)
+    sink = io.StringIO()
+
+    # Pemanasan: muat model bahasa, leksikon, dsb. sebelum pengukuran
+    warmup_ms = []
+    for document in documents[:warmup]:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sink):
+            extractor(document['path'])
+        warmup_ms.append(round((time.perf_counter() - start) * 1000, 1))
+
+    records = []
+    wall_start = time.perf_counter()
+    for document in documents:
+        start = time.perf_counter()
+        error = None
+        try:
+            with contextlib.redirect_stdout(sink):
+                result = extractor(document['path'])
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {str(e)}"
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        sink.seek(0)
+        sink.truncate()
+        records.append({
+            'name': document['name'],
+            'profile': document['profile'],
+            'latency_ms': latency_ms,
+            'error': error if error or result else 'no result',
+            'fields': score_fields(kind, document['truth'], result),
+            'values': {field: (result or {}).get(key) for field, key in FIELD_MAP[kind].items()},
+        })
+    wall_seconds = time.perf_counter() - wall_start
+    peak_rss_mb, peak_rss_children_mb = _peak_rss_mb()
+    return {
+        'records': records,
+        'wall_seconds': wall_seconds,
+        'warmup_ms': warmup_ms,
+        'peak_rss_mb': peak_rss_mb,
+        'peak_rss_children_mb': peak_rss_children_mb,
+    }
+
+
+def _field_summary(kind, records):
+    summary = {}
+    for field in FIELD_MAP[kind]:
+        scores = [record['fields'][field] for record in records]
+        summary[field] = {
+            'accuracy': round(sum(exact for exact, _ in scores) / len(scores), 4) if scores else None,
+            'similarity': round(sum(similarity for _, similarity in scores) / len(scores), 4) if scores else None,
+        }
+    return summary
+
+
+def summarize(kind, run):
+    records = run['records']
+    latencies = [record['latency_ms'] for record in records]
+    by_profile = {}
+    for profile in sorted({record['profile'] for record in records}):
+        profile_records = [record for record in records if record['profile'] == profile]
+        by_profile[profile] = _field_summary(kind, profile_records)
+    return {
+        'documents': len(records),
+        'errors': sum(1 for record in records if record['error']),
+        'docs_per_sec': round(len(records) / run['wall_seconds'], 3) if run['wall_seconds'] else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'mean': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'max': max(latencies) if latencies else None,
+        },
+        'warmup_ms': run['warmup_ms'],
+        'peak_rss_mb': run['peak_rss_mb'],
+        'peak_rss_children_mb': run['peak_rss_children_mb'],
+        'fields': _field_summary(kind, records),
+        'fields_by_profile': by_profile,
+        'per_document': [
+            {
+                'name': record['name'],
+                'latency_ms': record['latency_ms'],
+                'error': record['error'],
+                'correct': sorted(field for field, (exact, _) in record['fields'].items() if exact),
+                'values': record['values'],
+            }
+            for record in records
+        ],
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _print_summary(report):
+    print(f"{'pipeline':<14}{'docs':>6}{'err':>5}{'docs/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'RSS MB':>9}  accuracy")
+    for kind, summary in report['pipelines'].items():
+        accuracy = ' '.join(f"{field}={values['accuracy']:.2f}" for field, values in summary['fields'].items())
+        print(
+            f"{kind:<14}{summary['documents']:>6}{summary['errors']:>5}{summary['docs_per_sec'] or 0:>9.2f}"
+            f"{summary['latency_ms']['p50'] or 0:>10.0f}{summary['latency_ms']['p95'] or 0:>10.0f}"
+            f"{summary['peak_rss_mb'] or 0:>9.0f}  {accuracy}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline OCR pada surat sintetis')
+    parser.add_argument('--kinds', default=','.join(PIPELINES), help='Pipeline dipisah koma')
+    parser.add_argument('--count', type=int, default=12, help='Dokumen per pipeline')
+    parser.add_argument('--profiles', default=','.join(DEGRADATION_PROFILES), help='Profil degradasi dipisah koma')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=1, help='Dokumen pemanasan per pipeline (tidak diukur)')
+    parser.add_argument('--font', default=None, help='Path font TrueType untuk render')
+    parser.add_argument('--keep-images', default=None, help='Simpan gambar sintetis di folder ini')
+    parser.add_argument('--use-cache', action='store_true', help='Izinkan cache OCR (default dimatikan)')
+    parser.add_argument('--output', default=None, help='File JSON (default instance/benchmarks/ocr-<revisi>.json)')
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in PIPELINES]
+    if unknown:
+        parser.error(f"Unknown pipelines: {unknown}")
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    if not args.use_cache:
+        # Diwariskan ke proses pipeline; hasil cache akan mengukur lookup, bukan OCR
+        os.environ['OCR_CACHE_ENABLED'] = '0'
+
+    revision = _git_revision()
+    output = args.output or os.path.join(ROOT, 'instance', 'benchmarks', f"ocr-{revision or 'unknown'}.json")
+
+    with tempfile.TemporaryDirectory(prefix='ocr_bench_') as tmp_dir:
+        image_dir = args.keep_images or tmp_dir
+        print(f"Rendering {args.count} documents x {len(kinds)} pipelines into {image_dir}", file=sys.stderr)
+        documents = generate_documents(image_dir, kinds, args.count, profiles, seed=args.seed, font_path=args.font)
+
+        pipelines = {}
+        # Proses baru per pipeline (spawn) agar peak RSS dan pemanasan tidak tercampur
+        context = multiprocessing.get_context('spawn')
+        for kind in kinds:
+            kind_documents = [document for document in documents if document['kind'] == kind]
+            print(f"Running {kind} ({len(kind_documents)} documents)", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(run_pipeline, kind, kind_documents, args.warmup).result()
+            pipelines[kind] = summarize(kind, run)
+
+    report = {
+        'meta': {
+            'revision': revision,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'count': args.count,
+            'profiles': profiles,
+            'warmup': args.warmup,
+            'env': {name: os.environ.get(name) for name in RECORDED_ENV},
+        },
+        'pipelines': pipelines,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+    _print_summary(report)
+    print(f"\nReport written to {output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
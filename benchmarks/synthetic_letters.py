@@ -0,0 +1,302 @@
+"""
+Synthetic Letters
+=================
+Render surat pengadilan agama dan formulir cuti sintetis dengan PIL, lengkap
+dengan nilai field yang diketahui (nomor surat, pengirim, penerima, perihal,
+tanggal) dan degradasi scan (noise, kemiringan, blur, DPI rendah).
+
+Semua nilai ditarik dari ``random.Random(seed)`` sehingga set dokumen yang
+sama bisa dibangun ulang untuk membandingkan hasil antar versi.
+"""
+
+import math
+import os
+import random
+from datetime import date, timedelta
+
+# Bulan dalam format surat resmi
+INDONESIAN_MONTHS = (
+    'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli',
+    'Agustus', 'September', 'Oktober', 'November', 'Desember',
+)
+ROMAN_MONTHS = ('I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI', 'XII')
+
+RENDER_DPI = 300
+# A4 pada 300 DPI
+PAGE_SIZE = (2480, 3508)
+MARGIN = 250
+FONT_PT = 12
+
+OWN_INSTITUTION = 'Pengadilan Agama Amuntai'
+INSTITUTIONS = (
+    'Pengadilan Tinggi Agama Banjarmasin',
+    'Pengadilan Agama Barabai',
+    'Pengadilan Agama Kandangan',
+    'Pengadilan Agama Tanjung',
+    'Pengadilan Agama Martapura',
+    'Pengadilan Agama Banjarbaru',
+)
+CITIES = {
+    'Pengadilan Agama Amuntai': 'Amuntai',
+    'Pengadilan Tinggi Agama Banjarmasin': 'Banjarmasin',
+    'Pengadilan Agama Barabai': 'Barabai',
+    'Pengadilan Agama Kandangan': 'Kandangan',
+    'Pengadilan Agama Tanjung': 'Tanjung',
+    'Pengadilan Agama Martapura': 'Martapura',
+    'Pengadilan Agama Banjarbaru': 'Banjarbaru',
+}
+SIGNER_TITLES = ('Ketua', 'Panitera', 'Sekretaris')
+RECIPIENT_TITLES = ('Ketua', 'Panitera', 'Sekretaris')
+DOCUMENT_CODES = ('HM2.1.4', 'HK2.6', 'KP1.2.3', 'OT1.1', 'PL1.2')
+SUBJECTS = (
+    'Undangan Rapat Koordinasi',
+    'Permohonan Data Perkara',
+    'Pemberitahuan Jadwal Sidang Keliling',
+    'Penyampaian Laporan Keuangan Triwulan',
+    'Permohonan Izin Praktek Kerja Lapangan',
+    'Penyampaian Hasil Evaluasi Kinerja',
+    'Undangan Sosialisasi Aplikasi Perkara',
+)
+EVENTS = (
+    'Rapat Koordinasi Wilayah',
+    'Sosialisasi Sistem Informasi Penelusuran Perkara',
+    'Pembinaan Teknis Yustisial',
+    'Evaluasi Pelaksanaan Anggaran',
+)
+FIRST_NAMES = ('Ahmad', 'Siti', 'Muhammad', 'Nur', 'Rahmat', 'Fitri', 'Hendra', 'Aulia', 'Rizki', 'Dewi')
+LAST_NAMES = ('Hidayat', 'Rahmawati', 'Fauzi', 'Aminah', 'Saputra', 'Lestari', 'Maulana', 'Hasanah')
+POSITIONS = ('Panitera Muda Hukum', 'Jurusita Pengganti', 'Analis Perkara Peradilan', 'Pranata Komputer', 'Bendahara')
+CUTI_TYPES = ('Cuti Tahunan', 'Cuti Besar', 'Cuti Sakit', 'Cuti Melahirkan', 'Cuti Alasan Penting')
+
+# Profil degradasi scan; ``dpi`` adalah resolusi efektif setelah dikecilkan
+DEGRADATION_PROFILES = {
+    'clean': {'dpi': 300, 'skew': 0.0, 'blur': 0.0, 'noise': 0.0},
+    'noisy': {'dpi': 300, 'skew': 0.0, 'blur': 0.0, 'noise': 25.0},
+    'skewed': {'dpi': 300, 'skew': 2.5, 'blur': 0.0, 'noise': 0.0},
+    'blurred': {'dpi': 300, 'skew': 0.0, 'blur': 1.5, 'noise': 0.0},
+    'low_dpi': {'dpi': 150, 'skew': 0.0, 'blur': 0.0, 'noise': 0.0},
+    'mixed': {'dpi': 200, 'skew': 1.5, 'blur': 0.8, 'noise': 15.0},
+}
+
+FONT_CANDIDATES = (
+    'DejaVuSans.ttf', 'DejaVuSerif.ttf', 'LiberationSerif-Regular.ttf', 'Arial.ttf', 'arial.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+
+def format_long_date(value):
+    """14 Oktober 2024"""
+    return f"{value.day} {INDONESIAN_MONTHS[value.month - 1]} {value.year}"
+
+
+def load_font(size_px, path=None):
+    """Font TrueType pertama yang tersedia; font bawaan PIL sebagai cadangan"""
+    from PIL import ImageFont
+
+    for candidate in ((path,) if path else ()) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size_px)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size_px)
+
+
+def _random_date(rng, start=date(2023, 1, 1), days=1095):
+    return start + timedelta(days=rng.randrange(days))
+
+
+def _random_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _random_nip(rng, birth):
+    return f"{birth:%Y%m%d}{rng.randrange(2005, 2020)}{rng.randrange(1, 13):02d}{rng.randrange(1, 3)}{rng.randrange(1, 1000):03d}"
+
+
+def make_letter(rng, kind):
+    """
+    Satu surat (``kind`` 'surat_masuk' atau 'surat_keluar').
+    Mengembalikan (baris, nilai_benar); baris berupa (teks, gaya) dengan gaya
+    'title', 'body' atau 'right'.
+    """
+    if kind == 'surat_keluar':
+        sender = OWN_INSTITUTION
+        recipient = rng.choice(INSTITUTIONS)
+    else:
+        sender = rng.choice(INSTITUTIONS)
+        recipient = OWN_INSTITUTION
+    letter_date = _random_date(rng)
+    event_date = letter_date + timedelta(days=rng.randrange(3, 21))
+    nomor = (
+        f"{rng.randrange(100, 3000)}/PAN.PA.W15-A12/{rng.choice(DOCUMENT_CODES)}/"
+        f"{ROMAN_MONTHS[letter_date.month - 1]}/{letter_date.year}"
+    )
+    pengirim = f"{rng.choice(SIGNER_TITLES)} {sender}"
+    penerima = f"{rng.choice(RECIPIENT_TITLES)} {recipient}"
+    perihal = rng.choice(SUBJECTS)
+    event = rng.choice(EVENTS)
+    city = CITIES[sender]
+
+    lines = [
+        ('MAHKAMAH AGUNG REPUBLIK INDONESIA', 'title'),
+        ('DIREKTORAT JENDERAL BADAN PERADILAN AGAMA', 'title'),
+        (sender.upper(), 'title'),
+        (f"Jl. Basuki Rahmat No. {rng.randrange(1, 120)} {city}", 'title'),
+        ('', 'rule'),
+        (f"{city}, {format_long_date(letter_date)}", 'right'),
+        (f"Nomor : {nomor}", 'body'),
+        ('Lampiran : -', 'body'),
+        (f"Perihal : {perihal}", 'body'),
+        ('', 'body'),
+        (f"Kepada Yth. {penerima}", 'body'),
+        ('di -', 'body'),
+        (CITIES[recipient], 'body'),
+        ('', 'body'),
+        ("Assalamu'alaikum Wr. Wb.", 'body'),
+        (f"Dalam rangka {event.lower()} di lingkungan peradilan agama,", 'body'),
+        ('dengan ini kami mengundang Bapak/Ibu untuk hadir pada:', 'body'),
+        (f"Acara : {event}", 'body'),
+        (f"Hari/Tanggal : {format_long_date(event_date)}", 'body'),
+        (f"Jam : {rng.choice(('08.30', '09.00', '10.00', '13.30'))} WITA s.d. selesai", 'body'),
+        (f"Tempat : Aula {sender}", 'body'),
+        ('Demikian disampaikan, atas perhatiannya diucapkan terima kasih.', 'body'),
+        ("Wassalamu'alaikum Wr. Wb.", 'body'),
+        ('', 'body'),
+        (f"{pengirim},", 'right'),
+        ('', 'body'),
+        (_random_name(rng), 'right'),
+    ]
+    truth = {
+        'nomor_surat': nomor,
+        'tanggal': letter_date.isoformat(),
+        'pengirim': pengirim,
+        'penerima': penerima,
+        'perihal': perihal,
+    }
+    return lines, truth
+
+
+def make_cuti_form(rng):
+    """Formulir permintaan cuti; lihat ``make_letter`` untuk format hasil"""
+    nama = _random_name(rng)
+    birth = date(rng.randrange(1970, 1996), rng.randrange(1, 13), rng.randrange(1, 29))
+    jabatan = rng.choice(POSITIONS)
+    jenis_cuti = rng.choice(CUTI_TYPES)
+    start = _random_date(rng)
+    lama = rng.randrange(2, 13)
+
+    lines = [
+        ('FORMULIR PERMINTAAN DAN PEMBERIAN CUTI', 'title'),
+        ('', 'rule'),
+        ('I. DATA PEGAWAI', 'body'),
+        (f"Nama Lengkap {nama}", 'body'),
+        (f"Nomor Induk Pegawai (NIP) {_random_nip(rng, birth)}", 'body'),
+        (f"Jabatan {jabatan}", 'body'),
+        (f"Golongan/Ruang {rng.choice(('II/c', 'III/a', 'III/b', 'III/c'))}", 'body'),
+        (f"Unit Kerja {OWN_INSTITUTION}", 'body'),
+        (f"Masa Kerja {rng.randrange(2, 25)} tahun", 'body'),
+        ('', 'body'),
+        ('II. JENIS CUTI', 'body'),
+    ]
+    # Kotak centang ditulis sebagai penanda yang dihasilkan OCR untuk kotak kosong/tercentang
+    for cuti_type in CUTI_TYPES:
+        lines.append((f"{'V)' if cuti_type == jenis_cuti else 'O)'} {cuti_type}", 'body'))
+    lines += [
+        ('', 'body'),
+        ('III. DETAIL PERMOHONAN CUTI', 'body'),
+        (f"Alasan Cuti {rng.choice(('Keperluan keluarga', 'Istirahat', 'Perawatan kesehatan'))}", 'body'),
+        (f"Lama Cuti {lama} hari", 'body'),
+        (f"Tanggal Mulai Cuti {format_long_date(start)}", 'body'),
+        (f"Tanggal Selesai Cuti {format_long_date(start + timedelta(days=lama))}", 'body'),
+    ]
+    truth = {
+        'nama': nama,
+        'jabatan': jabatan,
+        'unit_kerja': OWN_INSTITUTION,
+        'jenis_cuti': jenis_cuti,
+    }
+    return lines, truth
+
+
+def render_page(lines, font_path=None):
+    """Gambar halaman A4 grayscale pada RENDER_DPI"""
+    from PIL import Image, ImageDraw
+
+    size_px = round(FONT_PT / 72 * RENDER_DPI)
+    body_font = load_font(size_px, font_path)
+    title_font = load_font(round(size_px * 1.15), font_path)
+    line_height = round(size_px * 1.6)
+
+    page = Image.new('L', PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(page)
+    width = PAGE_SIZE[0]
+    y = MARGIN
+    for text, style in lines:
+        if style == 'rule':
+            draw.line((MARGIN, y, width - MARGIN, y), fill=0, width=6)
+            y += line_height // 2
+            continue
+        font = title_font if style == 'title' else body_font
+        if text:
+            text_width = draw.textlength(text, font=font)
+            if style == 'title':
+                x = (width - text_width) / 2
+            elif style == 'right':
+                x = width - MARGIN - text_width
+            else:
+                x = MARGIN
+            draw.text((x, y), text, fill=0, font=font)
+        y += line_height
+    return page
+
+
+def degrade(page, profile, rng):
+    """Terapkan degradasi scan; mengembalikan (gambar, dpi efektif)"""
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    if profile['skew']:
+        angle = profile['skew'] * rng.choice((-1, 1))
+        page = page.rotate(angle, resample=Image.BICUBIC, fillcolor=255)
+    if profile['blur']:
+        page = page.filter(ImageFilter.GaussianBlur(profile['blur']))
+    if profile['noise']:
+        noise_rng = np.random.default_rng(rng.randrange(2 ** 32))
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels = pixels + noise_rng.normal(0, profile['noise'], pixels.shape)
+        page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    dpi = profile['dpi']
+    if dpi != RENDER_DPI:
+        scale = dpi / RENDER_DPI
+        page = page.resize(
+            (max(1, math.floor(page.size[0] * scale)), max(1, math.floor(page.size[1] * scale))),
+            Image.LANCZOS
+        )
+    return page, dpi
+
+
+def generate_documents(output_dir, kinds, count, profiles=None, seed=0, font_path=None):
+    """
+    Render ``count`` dokumen per jenis ke ``output_dir`` (PNG dengan metadata DPI).
+    Profil degradasi dipakai bergiliran. Mengembalikan list dict
+    {name, kind, profile, path, truth}.
+    """
+    profiles = list(profiles or DEGRADATION_PROFILES)
+    unknown = [profile for profile in profiles if profile not in DEGRADATION_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown degradation profiles: {unknown}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    documents = []
+    for kind in kinds:
+        # Satu RNG per jenis: menambah jenis lain tidak mengubah dokumen jenis ini
+        rng = random.Random(f"{seed}:{kind}")
+        for index in range(count):
+            profile = profiles[index % len(profiles)]
+            lines, truth = make_cuti_form(rng) if kind == 'cuti' else make_letter(rng, kind)
+            image, dpi = degrade(render_page(lines, font_path), DEGRADATION_PROFILES[profile], rng)
+            name = f"{kind}_{index:03d}_{profile}"
+            path = os.path.join(output_dir, name + '.png')
+            image.save(path, dpi=(dpi, dpi))
+            documents.append({'name': name, 'kind': kind, 'profile': profile, 'path': path, 'truth': truth})
+    return documents
@@ -4,6 +4,7 @@ from flask_login import login_required, current_user
 
 from config.extensions import db
 from config.models import SuratMasuk, SuratKeluar, UserLoginLog
+from config.ocr_timing import OCR_TIMING_ENABLED, stage_histograms
 from config.route_utils import role_required
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
@@ -56,13 +57,13 @@ def get_recent_notifications():
             }), 403
         
         # Ambil surat masuk yang pending, diurutkan berdasarkan waktu dibuat (terbaru dulu)
-        recent_masuk = SuratMasuk.query.filter_by(status_suratMasuk='pending')\
+        recent_masuk = SuratMasuk.list_query().filter_by(status_suratMasuk='pending')\
             .order_by(SuratMasuk.created_at.desc())\
             .limit(10)\
             .all()
         
         # Ambil surat keluar yang pending, diurutkan berdasarkan waktu dibuat (terbaru dulu)
-        recent_keluar = SuratKeluar.query.filter_by(status_suratKeluar='pending')\
+        recent_keluar = SuratKeluar.list_query().filter_by(status_suratKeluar='pending')\
             .order_by(SuratKeluar.created_at.desc())\
             .limit(10)\
             .all()
@@ -80,7 +81,7 @@ def get_recent_notifications():
                 'tanggal_display': surat.tanggal_suratMasuk.strftime('%d %b %Y') if surat.tanggal_suratMasuk else 'Tanggal tidak diketahui',
                 'created_at_display': surat.created_at.strftime('%d %b %Y %H:%M') if surat.created_at else '',
                 'created_at_sort': surat.created_at.isoformat() if surat.created_at else '',
-                'ringkasan': (surat.isi_suratMasuk[:100] + '...') if surat.isi_suratMasuk and len(surat.isi_suratMasuk) > 100 else (surat.isi_suratMasuk or '')
+                'ringkasan': surat.ringkasan_isi
             }
             surat_list.append(surat_data)
         
@@ -95,7 +96,7 @@ def get_recent_notifications():
                 'tanggal_display': surat.tanggal_suratKeluar.strftime('%d %b %Y') if surat.tanggal_suratKeluar else 'Tanggal tidak diketahui',
                 'created_at_display': surat.created_at.strftime('%d %b %Y %H:%M') if surat.created_at else '',
                 'created_at_sort': surat.created_at.isoformat() if surat.created_at else '',
-                'ringkasan': (surat.isi_suratKeluar[:100] + '...') if surat.isi_suratKeluar and len(surat.isi_suratKeluar) > 100 else (surat.isi_suratKeluar or '')
+                'ringkasan': surat.ringkasan_isi
             }
             surat_list.append(surat_data)
         
@@ -167,8 +168,8 @@ def get_surat_masuk_detail(surat_id):
             'penerima_suratMasuk': str(surat.penerima_suratMasuk) if surat.penerima_suratMasuk else '',
             'isi_suratMasuk': str(surat.isi_suratMasuk) if surat.isi_suratMasuk else '',
             'status_suratMasuk': str(surat.status_suratMasuk) if surat.status_suratMasuk else 'pending',
-            'file_suratMasuk': bool(surat.file_suratMasuk),
-            'has_gambar': bool(surat.gambar_suratMasuk),
+            'file_suratMasuk': surat.has_file,
+            'has_gambar': surat.has_gambar,
             'created_at': created_at_str
         }
         
@@ -246,8 +247,8 @@ def debug_surat(surat_id):
             'isi': surat.isi_suratMasuk,
             'status': surat.status_suratMasuk,
             'created_at': surat.created_at.isoformat() if surat.created_at else None,
-            'has_file': bool(surat.file_suratMasuk),
-            'has_image': bool(surat.gambar_suratMasuk)
+            'has_file': surat.has_file,
+            'has_image': surat.has_gambar
         }
         
         return jsonify(debug_info)
@@ -355,4 +356,32 @@ def update_ocr_accuracy(id):
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error updating OCR accuracy: {str(e)}")
-        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api_bp.route('/ocr/timings', methods=['GET'])
+@login_required
+@role_required('admin')
+def get_ocr_timings():
+    """
+    Histogram waktu per tahap OCR (per pipeline) sejak start atau reset terakhir.
+    Data per proses: setiap worker gunicorn dan worker batch punya histogram sendiri.
+    """
+    # Import di sini agar modul API tidak ikut memuat pipeline OCR
+    from config.ocr_utils import cascade_stats
+
+    return jsonify({
+        'success': True,
+        'enabled': OCR_TIMING_ENABLED,
+        'stages': stage_histograms.snapshot(),
+        'cascade_passes': dict(cascade_stats),
+    })
+
+
+@api_bp.route('/ocr/timings/reset', methods=['POST'])
+@login_required
+@role_required('admin')
+def reset_ocr_timings():
+    """Kosongkan histogram waktu OCR pada proses ini"""
+    stage_histograms.reset()
+    return jsonify({'success': True})
@@ -0,0 +1,147 @@
+"""
+Blob Store
+==========
+Penyimpanan isi file surat (scan gambar, file asli) di filesystem,
+content-addressed: nama file = hash isi (BLAKE2b-256, sama dengan
+``calculate_file_hash``), dibagi ke subfolder dua tingkat berdasarkan awalan
+hash (``ab/cd/abcd...``) agar tidak ada folder dengan ratusan ribu file.
+
+Baris SuratMasuk/SuratKeluar hanya menyimpan hash-nya (kolom ``*_blob_*``),
+sehingga query biasa tidak ikut menarik isi file dari SQLite. File yang sama
+hanya disimpan sekali. Blob tidak pernah diubah setelah ditulis.
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+from functools import lru_cache
+
+from config.file_responses import send_document
+from config.ocr_utils import HASH_CHUNK_SIZE, calculate_file_hash, new_content_hasher
+from config.uploads import sniff_format
+
+logger = logging.getLogger(__name__)
+
+basedir = os.path.abspath(os.path.dirname(__file__) + '/../')
+
+OCR_BLOB_STORE_PATH = os.environ.get('OCR_BLOB_STORE_PATH', os.path.join(basedir, 'instance', 'blobs'))
+
+BLOB_MIMETYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+    'tiff': 'image/tiff',
+    'bmp': 'image/bmp',
+    'pdf': 'application/pdf',
+}
+
+_DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        self._tmp = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        # Hash bisa berasal dari form; tolak apa pun selain hex agar tidak keluar dari root
+        return bool(digest) and bool(_DIGEST_RE.fullmatch(digest)) and os.path.exists(self.path_for(digest))
+
+    def ref(self, digest):
+        """``digest`` jika blob-nya ada di store (untuk diisi ke kolom *_blob_*), selain itu None"""
+        return digest if self.exists(digest) else None
+
+    def _commit(self, tmp_path, digest):
+        """Pindahkan file sementara ke lokasi final (atau buang jika blob sudah ada)"""
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return digest
+
+    def put_bytes(self, data):
+        """Simpan ``data``; hash dihitung sambil menulis per chunk. Mengembalikan hash"""
+        hasher = new_content_hasher()
+        view = memoryview(data)
+        with tempfile.NamedTemporaryFile(dir=self._tmp, delete=False) as tmp:
+            try:
+                for start in range(0, len(view), HASH_CHUNK_SIZE):
+                    chunk = view[start:start + HASH_CHUNK_SIZE]
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        return self._commit(tmp.name, hasher.hexdigest())
+
+    def put_file(self, file_path, digest=None):
+        """
+        Masukkan file yang sudah ada di disk (mis. hasil upload). Memakai hard
+        link jika satu filesystem, sehingga isi file tidak disalin.
+        """
+        digest = digest or calculate_file_hash(file_path)
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(file_path, path)
+            return digest
+        except FileExistsError:
+            return digest
+        except OSError:
+            # Beda filesystem (atau hard link tidak didukung): salin lewat file sementara
+            with tempfile.NamedTemporaryFile(dir=self._tmp, delete=False) as tmp, open(file_path, 'rb') as src:
+                shutil.copyfileobj(src, tmp, HASH_CHUNK_SIZE)
+            return self._commit(tmp.name, digest)
+
+    def open(self, digest):
+        return open(self.path_for(digest), 'rb')
+
+
+@lru_cache(maxsize=None)
+def get_blob_store():
+    return BlobStore(OCR_BLOB_STORE_PATH)
+
+
+def send_blob(digest, legacy_data=None, as_attachment=False, download_name=None):
+    """
+    Response berisi blob ``digest`` dari store, atau ``legacy_data`` (isi kolom
+    LargeBinary lama yang belum dipindahkan). None jika keduanya tidak ada.
+    ``download_name`` tanpa ekstensi; ekstensi diambil dari format isi file.
+    Hash blob sekaligus menjadi ETag (lihat config.file_responses).
+    """
+    store = get_blob_store()
+    if store.exists(digest):
+        with store.open(digest) as f:
+            file_format = sniff_format(f.read(16))
+        source, etag = store.path_for(digest), digest
+    elif legacy_data:
+        file_format = sniff_format(bytes(legacy_data[:16]))
+        source, etag = legacy_data, None
+    else:
+        if digest:
+            logger.error(f"Blob {digest} is referenced but missing from {store.root}")
+        return None
+
+    if download_name and file_format:
+        download_name = f"{download_name}.{'jpg' if file_format == 'jpeg' else file_format}"
+    return send_document(
+        source,
+        etag=etag,
+        mimetype=BLOB_MIMETYPES.get(file_format, 'application/octet-stream'),
+        as_attachment=as_attachment,
+        download_name=download_name,
+    )
@@ -70,12 +70,12 @@ def register_breadcrumbs(app):
                 g.pending_masuk_count = pending_masuk
                 g.pending_keluar_count = pending_keluar
 
-                recent_masuk = SuratMasuk.query.filter_by(status_suratMasuk='pending')\
+                recent_masuk = SuratMasuk.list_query().filter_by(status_suratMasuk='pending')\
                     .order_by(SuratMasuk.created_at.desc())\
                     .limit(15)\
                     .all()
 
-                recent_keluar = SuratKeluar.query.filter_by(status_suratKeluar='pending')\
+                recent_keluar = SuratKeluar.list_query().filter_by(status_suratKeluar='pending')\
                     .order_by(SuratKeluar.created_at.desc())\
                     .limit(15)\
                     .all()
@@ -92,7 +92,7 @@ def register_breadcrumbs(app):
                         'tanggal_display': surat.tanggal_suratMasuk.strftime('%d %b %Y') if surat.tanggal_suratMasuk else 'Tanggal tidak diketahui',
                         'created_at_display': surat.created_at.strftime('%d %b %Y %H:%M') if surat.created_at else '',
                         'created_at_sort': surat.created_at.isoformat() if surat.created_at else '',
-                        'ringkasan': (surat.isi_suratMasuk[:100] + '...') if surat.isi_suratMasuk and len(surat.isi_suratMasuk) > 100 else (surat.isi_suratMasuk or '')
+                        'ringkasan': surat.ringkasan_isi
                     })
 
                 for surat in recent_keluar:
@@ -105,7 +105,7 @@ def register_breadcrumbs(app):
                         'tanggal_display': surat.tanggal_suratKeluar.strftime('%d %b %Y') if surat.tanggal_suratKeluar else 'Tanggal tidak diketahui',
                         'created_at_display': surat.created_at.strftime('%d %b %Y %H:%M') if surat.created_at else '',
                         'created_at_sort': surat.created_at.isoformat() if surat.created_at else '',
-                        'ringkasan': (surat.isi_suratKeluar[:100] + '...') if surat.isi_suratKeluar and len(surat.isi_suratKeluar) > 100 else (surat.isi_suratKeluar or '')
+                        'ringkasan': surat.ringkasan_isi
                     })
 
                 notification_items.sort(key=lambda item: item.get('created_at_sort') or '', reverse=True)
@@ -4,20 +4,18 @@ Leave/vacation management functionality
 """
 
 import os
-import qrcode
 import tempfile
 from io import BytesIO
 from datetime import datetime
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, current_app, Response
 from flask_login import login_required, current_user
-from docx import Document
-from mailmerge import MailMerge
 
 from config.extensions import db
 from config.models import Cuti, Pegawai
 from config.forms import CutiForm, InputCutiForm
 from config.route_utils import role_required
+from config.file_responses import send_document
 
 cuti_bp = Blueprint('cuti', __name__)
 
@@ -31,20 +29,19 @@ def create_download_response(file_path, filename, mimetype='application/pdf'):
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Create response with proper headers for forced download
-        response = send_file(
+        # ETag dari hash isi PDF; selalu direvalidasi (PDF bisa dibuat ulang di path yang sama),
+        # unduhan ulang PDF yang tidak berubah dijawab 304
+        response = send_document(
             file_path,
             as_attachment=True,
             download_name=filename,
-            mimetype=mimetype
+            mimetype=mimetype,
+            max_age=0
         )
         
         # Enhanced headers to force download to Downloads folder
         response.headers['Content-Type'] = mimetype
         response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
         
         # Additional headers to ensure proper download behavior
         response.headers['X-Content-Type-Options'] = 'nosniff'
@@ -66,8 +66,8 @@ def dashboard():
     ).count()
 
     # Limit to 10 items for better performance and UI
-    recent_surat_keluar = SuratKeluar.query.order_by(SuratKeluar.created_at.desc()).limit(10).all()
-    recent_surat_masuk = SuratMasuk.query.order_by(SuratMasuk.created_at.desc()).limit(10).all()
+    recent_surat_keluar = SuratKeluar.list_query().order_by(SuratKeluar.created_at.desc()).limit(10).all()
+    recent_surat_masuk = SuratMasuk.list_query().order_by(SuratMasuk.created_at.desc()).limit(10).all()
 
     # Limit to 10 users for recent login display
     users = User.query.order_by(User.last_login.desc()).limit(10).all()
@@ -0,0 +1,120 @@
+"""
+File Responses
+==============
+Response untuk dokumen (scan surat, PDF cuti) yang bisa di-cache browser.
+
+``send_document`` memberi ETag kuat dari hash isi file (BLAKE2b, sama dengan
+``calculate_file_hash``), Last-Modified dari mtime file, dan menjawab
+conditional GET (304 Not Modified) serta Range (206 Partial Content) lewat
+werkzeug. Cache-Control selalu ``private`` karena semua dokumen butuh login.
+
+Jika file ada di disk dan ``OCR_SENDFILE_MODE`` diisi, isi file dikirim oleh
+web server di depan aplikasi (aplikasi hanya mengirim header):
+
+- ``x-sendfile`` (Apache mod_xsendfile, lighttpd): header X-Sendfile berisi path file;
+- ``x-accel-redirect`` (nginx): header X-Accel-Redirect berisi URI internal dari
+  ``OCR_ACCEL_REDIRECT_MAP`` (``/folder/di/disk=/uri-internal``, dipisah koma).
+  File di luar folder yang dipetakan tetap dikirim oleh aplikasi.
+"""
+
+import io
+import os
+from functools import lru_cache
+from urllib.parse import quote
+
+from flask import current_app, request
+from werkzeug.utils import send_file
+
+from config.ocr_utils import calculate_bytes_hash, calculate_file_hash
+
+# Lama browser boleh memakai scan surat tanpa bertanya ulang (detik); 0 = selalu revalidasi (304)
+OCR_FILE_CACHE_MAX_AGE = int(os.environ.get('OCR_FILE_CACHE_MAX_AGE', 3600))
+# '', 'x-sendfile' atau 'x-accel-redirect'
+OCR_SENDFILE_MODE = os.environ.get('OCR_SENDFILE_MODE', '').strip().lower()
+OCR_ACCEL_REDIRECT_MAP = os.environ.get('OCR_ACCEL_REDIRECT_MAP', '')
+
+SENDFILE_MODES = ('x-sendfile', 'x-accel-redirect')
+
+
+def _parse_accel_map(value):
+    """[(folder absolut, prefix URI internal)], folder terpanjang dulu"""
+    mapping = []
+    for entry in value.split(','):
+        if '=' not in entry:
+            continue
+        root, prefix = entry.split('=', 1)
+        if root.strip() and prefix.strip():
+            mapping.append((os.path.abspath(root.strip()), '/' + prefix.strip().strip('/')))
+    mapping.sort(key=lambda item: len(item[0]), reverse=True)
+    return mapping
+
+
+_ACCEL_MAP = _parse_accel_map(OCR_ACCEL_REDIRECT_MAP)
+
+
+def accel_redirect_uri(path):
+    """URI internal nginx untuk ``path``, atau None jika di luar OCR_ACCEL_REDIRECT_MAP"""
+    for root, prefix in _ACCEL_MAP:
+        if path.startswith(root + os.sep):
+            return prefix + '/' + quote(os.path.relpath(path, root).replace(os.sep, '/'))
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _file_etag(path, mtime_ns, size):
+    return calculate_file_hash(path)
+
+
+def file_etag(path):
+    """Hash isi file; dihitung ulang hanya jika mtime atau ukuran file berubah"""
+    stat = os.stat(path)
+    return _file_etag(path, stat.st_mtime_ns, stat.st_size)
+
+
+def send_document(source, etag=None, mimetype=None, as_attachment=False, download_name=None,
+                  max_age=OCR_FILE_CACHE_MAX_AGE):
+    """
+    Kirim ``source`` (path file atau bytes) dengan ETag, Last-Modified, 304 dan Range.
+    ``etag`` adalah hash isi jika sudah diketahui (mis. hash blob store).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        path = None
+        etag = etag or calculate_bytes_hash(source)
+        source = io.BytesIO(source)
+    else:
+        path = os.path.abspath(source)
+        etag = etag or file_etag(path)
+
+    offload = OCR_SENDFILE_MODE if path is not None and OCR_SENDFILE_MODE in SENDFILE_MODES else None
+    accel_uri = accel_redirect_uri(path) if offload == 'x-accel-redirect' else None
+    if offload == 'x-accel-redirect' and accel_uri is None:
+        offload = None
+
+    response = send_file(
+        path or source,
+        request.environ,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=etag,
+        # Range untuk file yang di-offload dilayani web server
+        conditional=not offload,
+        max_age=max_age,
+        use_x_sendfile=bool(offload),
+        response_class=current_app.response_class,
+    )
+
+    if offload:
+        response.make_conditional(request.environ)
+        if response.status_code != 200:
+            response.headers.pop('X-Sendfile', None)
+        elif offload == 'x-accel-redirect':
+            response.headers.pop('X-Sendfile', None)
+            response.headers['X-Accel-Redirect'] = accel_uri
+            # Body kosong; panjang isi ditentukan nginx
+            response.headers.pop('Content-Length', None)
+
+    # Dokumen butuh login: hanya cache browser, bukan proxy bersama
+    response.cache_control.public = None
+    response.cache_control.private = True
+    return response
@@ -0,0 +1,34 @@
+"""
+Lazy Imports
+============
+Dependensi berat (Tesseract, PIL/NumPy/OpenCV, pdf2image, docx, ...) tidak
+diimpor saat aplikasi start. Modul yang membutuhkannya mengimpor di dalam
+fungsi saat pertama dipakai, sehingga boot worker gunicorn dan perintah CLI
+tidak ikut membayar biayanya.
+
+Ketersediaan dependensi opsional dicek lewat ``optional_module``: impor
+dicoba sekali per proses saat pertama dibutuhkan, lalu hasilnya di-cache.
+"""
+
+import importlib
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Modul yang tidak boleh ikut termuat oleh ``import app`` (dicek scripts/check_import_time.py)
+HEAVY_MODULES = (
+    'cv2', 'docx', 'mailmerge', 'numpy', 'pdf2image', 'PIL', 'pytesseract',
+    'qrcode', 'reportlab', 'skimage', 'sklearn', 'tesserocr',
+)
+
+
+@lru_cache(maxsize=None)
+def optional_module(name):
+    """Modul ``name`` jika bisa diimpor, None jika tidak terpasang atau gagal dimuat"""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        # OpenCV bisa terpasang tetapi gagal dimuat (mis. libGL tidak ada)
+        logger.warning(f"Optional dependency {name} not available: {str(e)}")
+        return None
@@ -1,8 +1,21 @@
 from config.extensions import db
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import deferred, load_only, query_expression, with_expression
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# Panjang ringkasan isi surat di daftar/notifikasi; dipotong di SQL (list_query)
+ISI_SUMMARY_LENGTH = 100
+
+
+def _ringkasan(summary):
+    # summary diambil 1 karakter lebih panjang agar tahu isinya terpotong
+    if len(summary) > ISI_SUMMARY_LENGTH:
+        return summary[:ISI_SUMMARY_LENGTH] + '...'
+    return summary
+
+
 class User(db.Model, UserMixin):
     __tablename__ = 'user'
     id = db.Column(db.Integer, primary_key=True)
@@ -30,8 +43,13 @@ class SuratMasuk(db.Model):
     kode_suratMasuk = db.Column(db.Text, nullable=False)
     jenis_suratMasuk = db.Column(db.Text, nullable=False)
     isi_suratMasuk = db.Column(db.Text, nullable=False)
-    gambar_suratMasuk = db.Column(db.LargeBinary, nullable=True)
-    file_suratMasuk = db.Column(db.LargeBinary, nullable=True)
+    # Kolom blob lama; isi baru disimpan di blob store (lihat *_blob_suratMasuk)
+    # Deferred: hanya dimuat saat diakses, tidak ikut query daftar surat
+    gambar_suratMasuk = deferred(db.Column(db.LargeBinary, nullable=True))
+    file_suratMasuk = deferred(db.Column(db.LargeBinary, nullable=True))
+    # Hash isi gambar/file di blob store (config.blob_store)
+    gambar_blob_suratMasuk = db.Column(db.String(64), nullable=True)
+    file_blob_suratMasuk = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     ocr_accuracy_suratMasuk = db.Column(db.Float)
     initial_full_letter_number = db.Column(db.String(255))
@@ -44,6 +62,57 @@ class SuratMasuk(db.Model):
     tempat_suratMasuk = db.Column(db.Text, nullable=True)
     tanggal_acara_suratMasuk = db.Column(db.Date, nullable=True)
     jam_suratMasuk = db.Column(db.String(10), nullable=True)
+    # Hash file hasil upload (calculate_file_hash); upload ulang file yang sama tidak di-OCR lagi
+    file_hash = db.Column(db.String(64), nullable=True, index=True)
+    # pHash gambar (config.ocr_phash) untuk menyarankan bahwa upload adalah scan ulang surat tersimpan
+    phash = db.Column(db.String(256), nullable=True)
+    # Potongan isi dari SQL, hanya terisi pada query dari list_query()
+    isi_summary = query_expression()
+
+    # Kolom yang ditampilkan di daftar surat (tabel, dashboard, notifikasi)
+    LIST_COLUMNS = (
+        'nomor_suratMasuk', 'tanggal_suratMasuk', 'pengirim_suratMasuk', 'penerima_suratMasuk',
+        'status_suratMasuk', 'created_at',
+    )
+
+    @classmethod
+    def list_query(cls):
+        """Query untuk daftar surat: hanya LIST_COLUMNS dan isi_summary, tanpa isi lengkap maupun blob"""
+        return cls.query.options(
+            load_only(*(getattr(cls, name) for name in cls.LIST_COLUMNS)),
+            with_expression(
+                cls.isi_summary,
+                func.coalesce(func.substr(cls.isi_suratMasuk, 1, ISI_SUMMARY_LENGTH + 1), ''),
+            ),
+        )
+
+    @property
+    def ringkasan_isi(self):
+        """Ringkasan isi (maks. ISI_SUMMARY_LENGTH karakter + '...')"""
+        if self.isi_summary is None:
+            return _ringkasan((self.isi_suratMasuk or '')[:ISI_SUMMARY_LENGTH + 1])
+        return _ringkasan(self.isi_summary)
+
+    @classmethod
+    def find_by_file_hash(cls, file_hash):
+        """Surat pertama yang disimpan dari file dengan hash ini, atau None"""
+        if not file_hash:
+            return None
+        return cls.query.filter_by(file_hash=file_hash).order_by(cls.id_suratMasuk).first()
+
+    @classmethod
+    def find_similar_scan(cls, phash):
+        """(surat, jarak) dengan perceptual hash terdekat dalam batas OCR_PHASH_MAX_DISTANCE, atau None"""
+        from config.ocr_phash import phash_index
+        return phash_index.find_similar(cls, cls.id_suratMasuk, phash)
+
+    @property
+    def has_gambar(self):
+        return bool(self.gambar_blob_suratMasuk or self.gambar_suratMasuk)
+
+    @property
+    def has_file(self):
+        return bool(self.file_blob_suratMasuk or self.file_suratMasuk)
 
 class SuratKeluar(db.Model):
     id_suratKeluar = db.Column(db.Integer, primary_key=True)
@@ -52,8 +121,13 @@ class SuratKeluar(db.Model):
     penerima_suratKeluar = db.Column(db.Text, nullable=False)
     nomor_suratKeluar = db.Column(db.Text, nullable=False)
     isi_suratKeluar = db.Column(db.Text, nullable=False)
-    gambar_suratKeluar = db.Column(db.LargeBinary, nullable=True)
-    file_suratKeluar = db.Column(db.LargeBinary, nullable=True)
+    # Kolom blob lama; isi baru disimpan di blob store (lihat *_blob_suratKeluar)
+    # Deferred: hanya dimuat saat diakses, tidak ikut query daftar surat
+    gambar_suratKeluar = deferred(db.Column(db.LargeBinary, nullable=True))
+    file_suratKeluar = deferred(db.Column(db.LargeBinary, nullable=True))
+    # Hash isi gambar/file di blob store (config.blob_store)
+    gambar_blob_suratKeluar = db.Column(db.String(64), nullable=True)
+    file_blob_suratKeluar = db.Column(db.String(64), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     ocr_accuracy_suratKeluar = db.Column(db.Float)
     initial_nomor_suratKeluar = db.Column(db.String(255))
@@ -67,6 +141,57 @@ class SuratKeluar(db.Model):
     status_suratKeluar = db.Column(db.String(20), default='pending', nullable=False)
     kode_suratKeluar = db.Column(db.String(100), nullable=False)
     jenis_suratKeluar = db.Column(db.String(100), nullable=False)
+    # Hash file hasil upload (calculate_file_hash); upload ulang file yang sama tidak di-OCR lagi
+    file_hash = db.Column(db.String(64), nullable=True, index=True)
+    # pHash gambar (config.ocr_phash) untuk menyarankan bahwa upload adalah scan ulang surat tersimpan
+    phash = db.Column(db.String(256), nullable=True)
+    # Potongan isi dari SQL, hanya terisi pada query dari list_query()
+    isi_summary = query_expression()
+
+    # Kolom yang ditampilkan di daftar surat (tabel, dashboard, notifikasi)
+    LIST_COLUMNS = (
+        'nomor_suratKeluar', 'tanggal_suratKeluar', 'pengirim_suratKeluar', 'penerima_suratKeluar',
+        'status_suratKeluar', 'created_at',
+    )
+
+    @classmethod
+    def list_query(cls):
+        """Query untuk daftar surat: hanya LIST_COLUMNS dan isi_summary, tanpa isi lengkap maupun blob"""
+        return cls.query.options(
+            load_only(*(getattr(cls, name) for name in cls.LIST_COLUMNS)),
+            with_expression(
+                cls.isi_summary,
+                func.coalesce(func.substr(cls.isi_suratKeluar, 1, ISI_SUMMARY_LENGTH + 1), ''),
+            ),
+        )
+
+    @property
+    def ringkasan_isi(self):
+        """Ringkasan isi (maks. ISI_SUMMARY_LENGTH karakter + '...')"""
+        if self.isi_summary is None:
+            return _ringkasan((self.isi_suratKeluar or '')[:ISI_SUMMARY_LENGTH + 1])
+        return _ringkasan(self.isi_summary)
+
+    @classmethod
+    def find_by_file_hash(cls, file_hash):
+        """Surat pertama yang disimpan dari file dengan hash ini, atau None"""
+        if not file_hash:
+            return None
+        return cls.query.filter_by(file_hash=file_hash).order_by(cls.id_suratKeluar).first()
+
+    @classmethod
+    def find_similar_scan(cls, phash):
+        """(surat, jarak) dengan perceptual hash terdekat dalam batas OCR_PHASH_MAX_DISTANCE, atau None"""
+        from config.ocr_phash import phash_index
+        return phash_index.find_similar(cls, cls.id_suratKeluar, phash)
+
+    @property
+    def has_gambar(self):
+        return bool(self.gambar_blob_suratKeluar or self.gambar_suratKeluar)
+
+    @property
+    def has_file(self):
+        return bool(self.file_blob_suratKeluar or self.file_suratKeluar)
 
 class Cuti(db.Model):
     __tablename__ = 'cuti'
@@ -3,9 +3,8 @@ import json
 from flask import render_template, request, Blueprint, url_for, flash, redirect
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-import pytesseract
-from PIL import Image
 from functools import wraps
+from config import ocr_engine
 from .ocr_utils import (
     clean_text,
     extract_dates,
@@ -17,6 +16,7 @@ from .ocr_utils import (
 )
 from config.ocr_surat_keluar import extract_ocr_data as extract_ocr_data_surat_keluar
 from config.ocr_surat_masuk import extract_ocr_data_surat_masuk
+from config.uploads import UploadError, ingest_upload
 
 ocr_bp = Blueprint('ocr', __name__)
 
@@ -45,10 +45,14 @@ def ocr():
             return render_template('ocr/ocr.html', extracted_text='No selected file')
         if file:
             filename = secure_filename(file.filename)
-            file_path = os.path.join('static/ocr/uploads', filename)
-            file.save(file_path)
             try:
-                extracted_text = pytesseract.image_to_string(Image.open(file_path))
+                file_path = ingest_upload(file, 'static/ocr/uploads', filename).path
+            except UploadError as e:
+                return render_template('ocr/ocr.html', extracted_text=str(e))
+            try:
+                from PIL import Image
+
+                extracted_text = ocr_engine.image_to_string(Image.open(file_path), lang='eng')
                 extracted_text = clean_text(extracted_text)  # Clean OCR output
             except Exception as e:
                 extracted_text = f"Error during OCR processing: {e}"
@@ -0,0 +1,139 @@
+"""
+OCR Batch Engine
+================
+OCR paralel untuk satu folder scan (mis. backfill bulanan ribuan file).
+
+File dibagi ke process pool, hasil di-stream begitu selesai (tidak menunggu
+seluruh batch), kegagalan satu file tidak menghentikan batch, dan jumlah file
+yang sedang diproses dibatasi agar pemakaian memori tetap terkendali.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+OCR_BATCH_WORKERS = int(os.environ.get('OCR_BATCH_WORKERS', os.cpu_count() or 1))
+# Maksimum file yang dikirim ke pool sekaligus; membatasi gambar yang didekode di memori
+OCR_BATCH_MAX_IN_FLIGHT = int(os.environ.get('OCR_BATCH_MAX_IN_FLIGHT', OCR_BATCH_WORKERS * 2))
+# Thread Tesseract per proses worker; paralelisme utama sudah di level proses
+OCR_BATCH_THREADS_PER_WORKER = int(os.environ.get('OCR_BATCH_THREADS_PER_WORKER', 1))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp')
+
+
+def list_image_files(folder_path, max_files=None):
+    """Daftar file gambar di folder, urut nama agar batch bisa dilanjutkan"""
+    image_files = sorted(
+        entry.path for entry in os.scandir(folder_path)
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if max_files:
+        image_files = image_files[:max_files]
+    return image_files
+
+
+def _init_worker(threads_per_worker):
+    """Batasi thread di setiap proses worker agar CPU tidak oversubscribed"""
+    # Tesseract memakai OpenMP; satu thread per proses lebih cepat untuk batch
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    from config import ocr_utils
+    ocr_utils.OCR_MAX_WORKERS = max(1, threads_per_worker)
+
+
+def _extract_one(extractor, file_path):
+    """Jalankan extractor untuk satu file; error dikembalikan, bukan dilempar"""
+    try:
+        return file_path, extractor(file_path), None
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {str(e)}"
+
+
+def iter_batch_ocr(extractor, file_paths, max_workers=None, max_in_flight=None):
+    """
+    Generator (file_path, data, error) yang menghasilkan hasil begitu setiap
+    file selesai (urutan tidak dijamin).
+
+    ``extractor`` harus fungsi level modul (bisa di-pickle) yang menerima path
+    file dan mengembalikan dict hasil atau None.
+    """
+    max_workers = max(1, max_workers or OCR_BATCH_WORKERS)
+    max_in_flight = max(max_workers, max_in_flight or OCR_BATCH_MAX_IN_FLIGHT)
+    # spawn: proses web sudah punya thread (executor OCR, job queue) sehingga fork tidak aman
+    mp_context = multiprocessing.get_context('spawn')
+
+    def new_pool():
+        return ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp_context,
+            initializer=_init_worker, initargs=(OCR_BATCH_THREADS_PER_WORKER,)
+        )
+
+    pending_paths = iter(file_paths)
+    pool = new_pool()
+    in_flight = {}
+    try:
+        while True:
+            while len(in_flight) < max_in_flight:
+                file_path = next(pending_paths, None)
+                if file_path is None:
+                    break
+                in_flight[pool.submit(_extract_one, extractor, file_path)] = file_path
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                file_path = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    yield file_path, None, 'Worker process crashed'
+                except Exception as e:
+                    yield file_path, None, f"{type(e).__name__}: {str(e)}"
+
+            if broken:
+                # Proses worker mati (mis. crash di Tesseract): file lain yang sedang
+                # diproses ikut gagal, lalu batch dilanjutkan dengan pool baru
+                for future, file_path in in_flight.items():
+                    yield file_path, None, 'Worker process crashed'
+                in_flight.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_folder_batch(extractor, folder_path, max_files=None, max_workers=None):
+    """
+    OCR semua gambar di folder. Mengembalikan (results, extracted_text) seperti
+    fungsi batch lama; hasil diurutkan sesuai nama file.
+    """
+    file_paths = list_image_files(folder_path, max_files=max_files)
+    logger.info(f"Found {len(file_paths)} image files to process")
+
+    results = {}
+    failed = 0
+    for file_path, data, error in iter_batch_ocr(extractor, file_paths, max_workers=max_workers):
+        filename = os.path.basename(file_path)
+        if error:
+            failed += 1
+            logger.error(f"Error processing file {filename}: {error}")
+        elif data:
+            data['filename'] = filename
+            results[file_path] = data
+            logger.info(f"Processed file: {filename} ({len(results)}/{len(file_paths)})")
+        else:
+            logger.warning(f"No data extracted from file: {filename}")
+
+    ordered = [results[path] for path in file_paths if path in results]
+    extracted_text = "".join(
+        f"--- Dokumen: {data['filename']} ---\n{data.get('isi', 'Tidak ada teks')}\n\n"
+        for data in ordered
+    )
+    logger.info(f"Batch finished: {len(ordered)} succeeded, {failed} failed")
+    return ordered, extracted_text
@@ -0,0 +1,150 @@
+"""
+OCR Result Cache
+================
+Cache hasil OCR berbasis isi file (content-addressed) yang disimpan di SQLite.
+
+Key cache = hash file + bahasa + konfigurasi Tesseract + versi preprocessing,
+sehingga upload ulang scan yang sama tidak perlu menjalankan Tesseract lagi.
+Ukuran cache dibatasi dengan eviction LRU berdasarkan waktu akses terakhir.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.environ.get('OCR_CACHE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+OCR_CACHE_PATH = os.environ.get(
+    'OCR_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'ocr_cache.db'),
+)
+OCR_CACHE_MAX_BYTES = int(os.environ.get('OCR_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    cache_key TEXT PRIMARY KEY,
+    file_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tsv TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ocr_cache_last_access ON ocr_cache (last_access);
+"""
+
+
+def make_cache_key(file_hash, lang, config, preprocess_version):
+    """Gabungkan semua parameter yang mempengaruhi hasil OCR menjadi satu key"""
+    if isinstance(config, (list, tuple)):
+        config = '\x1f'.join(config)
+    raw = '\x1e'.join([file_hash, lang or '', config or '', str(preprocess_version)])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class OCRCache:
+    def __init__(self, path=OCR_CACHE_PATH, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def get(self, cache_key):
+        """Kembalikan dict {'text', 'tsv'} atau None jika tidak ada di cache"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT text, tsv FROM ocr_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE ocr_cache SET last_access = ? WHERE cache_key = ?",
+                    (time.time(), cache_key),
+                )
+                conn.commit()
+                return {'text': row[0], 'tsv': row[1]}
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"OCR cache read failed: {str(e)}")
+            return None
+
+    def set(self, cache_key, file_hash, text, tsv=None):
+        size = len(text.encode('utf-8')) + (len(tsv.encode('utf-8')) if tsv else 0)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache "
+                    "(cache_key, file_hash, text, tsv, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, file_hash, text, tsv, size, now, now),
+                )
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"OCR cache write failed: {str(e)}")
+
+    def _evict(self, conn):
+        """Hapus entri yang paling lama tidak diakses sampai ukuran di bawah batas"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale_keys = []
+        for cache_key, size in conn.execute(
+            "SELECT cache_key, size FROM ocr_cache ORDER BY last_access ASC"
+        ):
+            stale_keys.append((cache_key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM ocr_cache WHERE cache_key = ?", stale_keys)
+        logger.info(f"OCR cache evicted {len(stale_keys)} entries ({freed} bytes)")
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM ocr_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    """Instance cache bersama, atau None jika cache dinonaktifkan"""
+    global _ocr_cache
+    if not OCR_CACHE_ENABLED:
+        return None
+    if _ocr_cache is None:
+        with _ocr_cache_lock:
+            if _ocr_cache is None:
+                os.makedirs(os.path.dirname(OCR_CACHE_PATH), exist_ok=True)
+                _ocr_cache = OCRCache()
+    return _ocr_cache
@@ -10,60 +10,63 @@ from flask import Blueprint, flash, jsonify, redirect, render_template, request,
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
 
+from config import ocr_engine, ocr_timing
 from config.extensions import db
 from config.models import Cuti, SuratKeluar
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from config.ocr_cache import get_ocr_cache, make_cache_key
+from config.ocr_jobs import (
+    JOB_OCR,
+    JOB_PREPROCESSING,
+    collect_job_results,
+    get_job_queue,
+    job_event_response,
+    job_status_payload,
+    parse_job_ids,
+    report_job_stage,
 )
-logger = logging.getLogger(__name__)
-
-# Import untuk PDF processing
-try:
-    import pdf2image
-
-    PDF_SUPPORT = True
-    logger.info("pdf2image successfully imported")
-
-    # Check if poppler is available
-    try:
-        test_images = pdf2image.convert_from_path.__doc__
-        logger.info("pdf2image.convert_from_path is available")
-    except Exception as e:
-        logger.warning(f"pdf2image imported but may have issues: {e}")
+from config.ocr_pdf import (
+    OCR_PDF_DPI,
+    OCR_PDF_TEXT_LAYER,
+    iter_pdf_page_texts,
+    join_page_texts,
+    pdf_support,
+)
+from config.ocr_utils import calculate_file_hash
+from config.uploads import IMAGE_FORMATS, PDF_FORMATS, UploadError, ingest_upload
 
-except ImportError as e:
-    PDF_SUPPORT = False
-    logger.warning(
-        f"pdf2image not installed. PDF processing will be disabled. Error: {e}"
-    )
-    logger.warning("Install with: pip install pdf2image")
-    logger.warning(
-        "Also install poppler: brew install poppler (macOS) or apt-get install poppler-utils (Linux)"
-    )
+logger = logging.getLogger(__name__)
 
 ocr_cuti_v2_bp = Blueprint("ocr_cuti_v2", __name__, template_folder="../templates/home")
 
 UPLOAD_FOLDER = "static/ocr/cuti"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Naikkan versi ini jika cara rasterisasi/OCR PDF berubah agar cache lama tidak dipakai
+PDF_OCR_VERSION = 4
+
+# Formulir cuti hanya butuh halaman pertama; halaman lain tidak perlu di-OCR
+CUTI_PDF_LAST_PAGE = int(os.environ.get("OCR_CUTI_PDF_PAGES", 1)) or None
+
 
-def extract_text_from_pdf(pdf_file_or_path):
+def extract_text_from_pdf(pdf_file_or_path, first_page=1, last_page=None, file_hash=None):
     """
-    Extract text from PDF file using OCR
+    Extract text from PDF file using OCR; returns an OCRResult (None on failure)
     Args:
         pdf_file_or_path: Either a file object or a file path string
+        first_page, last_page: rentang halaman yang di-OCR (default semua)
+        file_hash: hash isi file jika sudah dihitung saat upload
+    Text layer PDF dipakai langsung jika ada; halaman tanpa teks dirasterisasi
+    dan di-OCR satu per satu (lihat config.ocr_pdf).
     """
-    if not PDF_SUPPORT:
+    if not pdf_support():
         return None
 
+    temp_file_created = False
     try:
         # Determine if input is a file path or file object
         if isinstance(pdf_file_or_path, str):
             # It's already a file path
             pdf_path = pdf_file_or_path
-            temp_file_created = False
         else:
             # It's a file object, save it temporarily
             with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_pdf:
@@ -71,37 +74,54 @@ def extract_text_from_pdf(pdf_file_or_path):
                 pdf_path = tmp_pdf.name
             temp_file_created = True
 
-        # Konversi PDF ke gambar
-        images = pdf2image.convert_from_path(pdf_path)
+        # Cek cache OCR sebelum rasterisasi PDF
+        cache = get_ocr_cache()
+        cache_key = None
+        if cache is not None:
+            file_hash = file_hash or calculate_file_hash(pdf_path)
+            cache_key = make_cache_key(
+                file_hash, "ind",
+                ["pdf", str(OCR_PDF_DPI), str(first_page), str(last_page), str(OCR_PDF_TEXT_LAYER)],
+                PDF_OCR_VERSION,
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OCR cache hit for PDF {pdf_path} ({file_hash})")
+                return ocr_engine.OCRResult.from_cache(cached["text"], cached["tsv"])
 
-        # Ekstrak teks dari setiap halaman
-        full_text = ""
-        for i, image in enumerate(images):
-            import pytesseract
+        result = join_page_texts(
+            iter_pdf_page_texts(pdf_path, first_page=first_page, last_page=last_page)
+        )
 
-            page_text = pytesseract.image_to_string(image, lang="ind")
-            full_text += page_text
-            if len(images) > 1:
-                full_text += f"\n\n--- PAGE {i + 1} ---\n\n"
+        # TSV ikut disimpan agar confidence per field tetap ada saat cache hit
+        if cache_key is not None and result.text.strip():
+            cache.set(cache_key, file_hash, result.text, result.tsv)
 
-        # Hapus file sementara jika kita yang membuat
-        if temp_file_created:
-            os.unlink(pdf_path)
-
-        return full_text
+        return result
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         import traceback
 
         logger.error(traceback.format_exc())
         return None
+    finally:
+        # Hapus file sementara jika kita yang membuat
+        if temp_file_created:
+            os.unlink(pdf_path)
 
 
-def extract_cuti_fields(text):
+@ocr_timing.timed("extract_cuti_fields")
+def extract_cuti_fields(ocr_result):
     """
     Ekstrak field dari formulir cuti dengan strategi line-by-line parsing
-    untuk menangani layout 2 kolom yang dibaca OCR secara vertikal
+    untuk menangani layout 2 kolom yang dibaca OCR secara vertikal.
+    ``ocr_result`` berupa ``OCRResult`` (confidence per field ikut dihitung)
+    atau teks biasa (mis. text layer PDF).
     """
+    if not isinstance(ocr_result, ocr_engine.OCRResult):
+        ocr_result = ocr_engine.OCRResult.from_text(ocr_result)
+    text = ocr_result.text
+
     print("\n" + "=" * 70)
     print("OCR CUTI V2 - EXTRACTION")
     print("=" * 70)
@@ -379,12 +399,23 @@ def extract_cuti_fields(text):
         f"Surat Permintaan Cuti oleh {result['nama']} (NIP: {result['nip']}) - {result['jenis_cuti']}"
     )
 
+    # Confidence Tesseract (0-100) per field; None untuk teks tanpa data OCR
+    result["ocr_confidence"] = ocr_result.mean_confidence
+    result["field_confidence"] = ocr_result.field_confidences(
+        {
+            key: value
+            for key, value in result.items()
+            if key in ("nama", "nip", "jabatan", "unit_kerja", "jenis_cuti", "nomor_surat")
+            and value != "Tidak terbaca"
+        }
+    )
+
     # Print summary
     print("\n" + "=" * 70)
     print("HASIL EKSTRAKSI")
     print("=" * 70)
     for key, value in result.items():
-        if key not in ["jenis_surat", "pengirim", "penerima", "isi"]:
+        if key not in ["jenis_surat", "pengirim", "penerima", "isi", "ocr_confidence", "field_confidence"]:
             status = "✓" if value != "Tidak terbaca" else "✗"
             print(f"{status} {key:25s}: {value}")
     print("=" * 70 + "\n")
@@ -407,11 +438,93 @@ def extract_cuti_fields(text):
     return result
 
 
+def run_cuti_ocr_job(file_path, relative_path, original_filename, file_ext, file_hash=None):
+    """Job background: OCR satu formulir cuti (gambar atau PDF) dan ekstrak field-nya"""
+    with ocr_timing.trace("cuti") as timings:
+        extracted_data = _run_cuti_ocr_job(file_path, relative_path, original_filename, file_ext, file_hash)
+    if timings is not None:
+        extracted_data["timings"] = timings
+    return extracted_data
+
+
+def _run_cuti_ocr_job(file_path, relative_path, original_filename, file_ext, file_hash=None):
+    if file_ext == "pdf":
+        # Proses file PDF
+        if not pdf_support():
+            raise ValueError(
+                "Dukungan PDF tidak tersedia. Install pdf2image: pip install pdf2image"
+            )
+
+        logger.info(f"Processing PDF file: {file_path}")
+        logger.info(f"File size: {os.path.getsize(file_path)} bytes")
+
+        report_job_stage(JOB_OCR)
+        with ocr_timing.span("pdf_text"):
+            extracted_text = extract_text_from_pdf(file_path, last_page=CUTI_PDF_LAST_PAGE, file_hash=file_hash)
+
+        if extracted_text is None:
+            logger.error(f"Failed to extract text from PDF: {original_filename}")
+            logger.error(f"PDF_SUPPORT status: {pdf_support()}")
+            raise ValueError(
+                f"Gagal memproses PDF: {original_filename}. Pastikan pdf2image dan poppler terinstall dengan benar."
+            )
+
+        logger.info(
+            f"Successfully extracted {len(extracted_text.text)} characters from PDF"
+        )
+    else:
+        # Proses file gambar
+        from PIL import Image
+
+        logger.info(f"Processing image file: {file_path}")
+        report_job_stage(JOB_PREPROCESSING)
+        with ocr_timing.span("load_image"):
+            image = Image.open(file_path)
+            image.load()
+        report_job_stage(JOB_OCR)
+        with ocr_timing.span("ocr"):
+            extracted_text = ocr_engine.run_ocr(image, lang="ind")
+        logger.info(
+            f"Successfully extracted {len(extracted_text.text)} characters from image"
+        )
+
+    if not extracted_text.text.strip():
+        raise ValueError(
+            f"Tidak ada teks yang dapat diekstrak dari {original_filename}."
+        )
+
+    # Extract specific fields for cuti form
+    logger.info(f"Extracting cuti fields from {original_filename}")
+    extracted_data = extract_cuti_fields(extracted_text)
+    extracted_data["filename"] = original_filename
+    extracted_data["file_path"] = relative_path
+    extracted_data["file_type"] = file_ext
+
+    logger.info(f"Successfully processed {original_filename}")
+    return extracted_data
+
+
 @ocr_cuti_v2_bp.route("/", methods=["GET", "POST"])
 @login_required
 def ocr_cuti_v2():
     if request.method == "GET":
-        return render_template("cuti/ocr_cuti_v2.html")
+        # GET dengan ?jobs=...: tampilkan progres atau hasil job OCR
+        job_ids = parse_job_ids(request.args.get("jobs"))
+        if not job_ids:
+            return render_template("cuti/ocr_cuti_v2.html")
+
+        extracted_data_list, failures, pending = collect_job_results(
+            job_ids, owner_id=current_user.id
+        )
+        if pending:
+            return render_template("cuti/ocr_cuti_v2.html", pending_jobs=job_ids)
+        for label, error in failures:
+            flash(error or f"Error saat memproses {label}", "error")
+        if extracted_data_list:
+            flash(f"{len(extracted_data_list)} dokumen berhasil diproses.", "success")
+        return render_template(
+            "cuti/ocr_cuti_v2.html", extracted_data_list=extracted_data_list
+        )
 
     # Handle POST request for OCR processing
     if "image" not in request.files:
@@ -423,7 +536,8 @@ def ocr_cuti_v2():
         flash("Tidak ada file yang dipilih.", "error")
         return render_template("cuti/ocr_cuti_v2.html")
 
-    extracted_data_list = []
+    job_queue = get_job_queue()
+    job_ids = []
 
     for file in files:
         if file.filename == "":
@@ -452,103 +566,58 @@ def ocr_cuti_v2():
             file_ext = original_filename.rsplit(".", 1)[1].lower()
             unique_filename = f"cuti_{timestamp}_{random_str}.{file_ext}"
 
-            # Save file to upload folder
-            file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-
-            # Reset file pointer and save
-            file.seek(0)
-            file.save(file_path)
+            # Simpan, hash, dan cek magic bytes dalam satu kali baca; isi file harus sesuai ekstensinya
+            upload = ingest_upload(
+                file, UPLOAD_FOLDER, unique_filename,
+                allowed_formats=PDF_FORMATS if file_ext == "pdf" else IMAGE_FORMATS,
+            )
+            file_path = upload.path
 
             # Store relative path for database and URL
             relative_path = f"ocr/cuti/{unique_filename}"
 
-            extracted_text = ""
-
-            if file_ext == "pdf":
-                # Proses file PDF
-                if not PDF_SUPPORT:
-                    flash(
-                        f"Dukungan PDF tidak tersedia. Install pdf2image: pip install pdf2image",
-                        "error",
-                    )
-                    continue
-
-                # Read file from saved path for OCR
-                logger.info(f"Processing PDF file: {file_path}")
-                logger.info(f"File size: {os.path.getsize(file_path)} bytes")
-
-                if not os.path.exists(file_path):
-                    flash(f"File tidak ditemukan: {file.filename}", "error")
-                    logger.error(f"File not found: {file_path}")
-                    continue
-
-                extracted_text = extract_text_from_pdf(file_path)
-
-                if not extracted_text:
-                    flash(
-                        f"Gagal memproses PDF: {file.filename}. Pastikan pdf2image dan poppler terinstall dengan benar.",
-                        "error",
-                    )
-                    logger.error(f"Failed to extract text from PDF: {file.filename}")
-                    logger.error(f"PDF_SUPPORT status: {PDF_SUPPORT}")
-                    continue
-
-                logger.info(
-                    f"Successfully extracted {len(extracted_text)} characters from PDF"
+            # OCR dijalankan di background; hasil dikirim per file lewat SSE
+            job_ids.append(
+                job_queue.submit(
+                    "cuti",
+                    run_cuti_ocr_job,
+                    file_path,
+                    relative_path,
+                    original_filename,
+                    file_ext,
+                    file_hash=upload.file_hash,
+                    owner_id=current_user.id,
+                    label=original_filename,
                 )
-            else:
-                # Proses file gambar
-                import pytesseract
-                from PIL import Image
-
-                logger.info(f"Processing image file: {file_path}")
-                try:
-                    image = Image.open(file_path)
-                    extracted_text = pytesseract.image_to_string(image, lang="ind")
-                    logger.info(
-                        f"Successfully extracted {len(extracted_text)} characters from image"
-                    )
-                except Exception as img_error:
-                    flash(
-                        f"Gagal memproses gambar: {file.filename}. Error: {str(img_error)}",
-                        "error",
-                    )
-                    logger.error(
-                        f"Failed to process image {file.filename}: {str(img_error)}"
-                    )
-                    continue
-
-            if not extracted_text.strip():
-                flash(
-                    f"Tidak ada teks yang dapat diekstrak dari {file.filename}.",
-                    "error",
-                )
-                continue
-
-            # Extract specific fields for cuti form
-            logger.info(f"Extracting cuti fields from {original_filename}")
-            extracted_data = extract_cuti_fields(extracted_text)
-            extracted_data["filename"] = original_filename
-            extracted_data["file_path"] = relative_path
-            extracted_data["file_type"] = file_ext
-            extracted_data_list.append(extracted_data)
-
-            logger.info(f"Successfully processed {original_filename}")
+            )
 
+        except UploadError as e:
+            flash(str(e), "error")
+            continue
         except Exception as e:
             flash(f"Error saat memproses {file.filename}: {str(e)}", "error")
-            logger.error(f"Exception processing {file.filename}: {str(e)}")
-            import traceback
-
-            logger.error(traceback.format_exc())
+            logger.error(f"Exception queueing {file.filename}: {str(e)}")
             continue
 
-    if extracted_data_list:
-        flash(f"{len(extracted_data_list)} dokumen berhasil diproses.", "success")
+    if not job_ids:
+        return render_template("cuti/ocr_cuti_v2.html")
+    return redirect(url_for("ocr_cuti_v2.ocr_cuti_v2", jobs=",".join(job_ids)))
+
 
-    return render_template(
-        "cuti/ocr_cuti_v2.html", extracted_data_list=extracted_data_list
-    )
+@ocr_cuti_v2_bp.route("/ocr_jobs", methods=["GET"])
+@login_required
+def ocr_cuti_v2_jobs():
+    """Status job OCR untuk polling (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get("ids"))
+    return jsonify(job_status_payload(job_ids, owner_id=current_user.id))
+
+
+@ocr_cuti_v2_bp.route("/ocr_jobs/stream", methods=["GET"])
+@login_required
+def ocr_cuti_v2_job_stream():
+    """Server-Sent Events progres OCR per file (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get("ids"))
+    return job_event_response(job_ids, owner_id=current_user.id)
 
 
 @ocr_cuti_v2_bp.route("/list", methods=["GET"])
@@ -657,7 +726,7 @@ def check_dependencies():
         {
             "success": True,
             "dependencies": dependencies_status,
-            "PDF_SUPPORT": PDF_SUPPORT,
+            "PDF_SUPPORT": pdf_support(),
         }
     )
 
@@ -0,0 +1,453 @@
+"""
+OCR Engine
+==========
+Backend Tesseract bersama untuk semua pemanggilan OCR di aplikasi.
+
+Jika binding in-process ``tesserocr`` terpasang, model bahasa dimuat sekali
+per worker dan gambar dikirim langsung dari memori. Worker dipakai ulang dari
+pool dan di-recycle setelah sejumlah job. Jika tidak tersedia, engine jatuh
+kembali ke ``pytesseract`` (satu proses tesseract per pemanggilan).
+
+``run_ocr`` menjalankan Tesseract satu kali dan mengembalikan ``OCRResult``
+berisi teks, TSV dan hOCR sekaligus, lengkap dengan kotak, confidence dan
+struktur baris/blok per kata.
+"""
+
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from config.lazy_imports import optional_module
+
+logger = logging.getLogger(__name__)
+
+# Jumlah worker per bahasa dan jumlah job sebelum worker di-recycle
+OCR_ENGINE_POOL_SIZE = int(os.environ.get('OCR_ENGINE_POOL_SIZE', os.cpu_count() or 1))
+# Interval (detik) pengecekan ulang slot pool saat menunggu worker yang sedang dipakai
+OCR_ENGINE_POOL_WAIT = 1.0
+OCR_ENGINE_MAX_JOBS = int(os.environ.get('OCR_ENGINE_MAX_JOBS', 200))
+# Kosong = tesserocr jika terpasang, jika tidak pytesseract (dicek saat OCR pertama)
+OCR_ENGINE_BACKEND = os.environ.get('OCR_ENGINE_BACKEND', '')
+
+_PSM_RE = re.compile(r'--psm\s+(\d+)')
+_OEM_RE = re.compile(r'--oem\s+(\d+)')
+_VAR_RE = re.compile(r'-c\s+(\w+)=(\S+)')
+
+
+def parse_config(config):
+    """Pecah string config Tesseract menjadi (oem, psm, variables)"""
+    config = config or ''
+    oem = _OEM_RE.search(config)
+    psm = _PSM_RE.search(config)
+    return (
+        int(oem.group(1)) if oem else None,
+        int(psm.group(1)) if psm else None,
+        dict(_VAR_RE.findall(config)),
+    )
+
+
+class _TesseractWorker:
+    """Satu instance API tesserocr dengan model bahasa yang sudah dimuat"""
+
+    def __init__(self, lang, oem):
+        import tesserocr
+
+        kwargs = {'lang': lang}
+        if oem is not None:
+            # Enum tesserocr (OEM/PSM) bukan kelas yang bisa dibuat; nilainya int biasa
+            kwargs['oem'] = oem
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self.jobs = 0
+
+    def image_to_string(self, image, psm, variables, output='txt'):
+        """
+        OCR satu gambar. ``output`` 'txt' atau 'tsv' mengembalikan string;
+        'all' mengembalikan dict txt/tsv/hocr dari satu kali recognition.
+        """
+        import tesserocr
+
+        api = self.api
+        api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+        for key, value in variables.items():
+            api.SetVariable(key, value)
+        try:
+            if isinstance(image, str):
+                api.SetImageFile(image)
+            else:
+                api.SetImage(image)
+            if output == 'tsv':
+                return api.GetTSVText(0)
+            if output == 'all':
+                # Recognize sekali; semua renderer memakai hasil yang sama
+                text = api.GetUTF8Text()
+                return {'txt': text, 'tsv': api.GetTSVText(0), 'hocr': api.GetHOCRText(0)}
+            return api.GetUTF8Text()
+        finally:
+            # Reset variabel agar tidak terbawa ke job berikutnya
+            for key in variables:
+                api.SetVariable(key, '')
+            api.Clear()
+            self.jobs += 1
+
+    def close(self):
+        self.api.End()
+
+
+class OCREnginePool:
+    """
+    Pool worker Tesseract resident per (bahasa, oem).
+    Worker dibuat saat dibutuhkan hingga ``size`` buah dan di-recycle setelah
+    ``max_jobs`` job untuk membatasi pertumbuhan memori.
+    """
+
+    def __init__(self, size=OCR_ENGINE_POOL_SIZE, max_jobs=OCR_ENGINE_MAX_JOBS):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self._pools = {}
+        self._created = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, key):
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue()
+                self._created[key] = 0
+            return self._pools[key]
+
+    @contextmanager
+    def worker(self, lang, oem):
+        key = (lang, oem)
+        pool = self._get_pool(key)
+        worker = None
+        while worker is None:
+            try:
+                worker = pool.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created[key] < self.size
+                if can_create:
+                    self._created[key] += 1
+            if can_create:
+                try:
+                    logger.info(f"Loading Tesseract model '{lang}' (oem={oem})")
+                    worker = _TesseractWorker(lang, oem)
+                except Exception:
+                    with self._lock:
+                        self._created[key] -= 1
+                    raise
+            else:
+                # Tunggu dengan timeout: worker yang gagal dibuat ulang saat recycle
+                # tidak pernah kembali ke pool, slotnya harus diambil alih di sini
+                try:
+                    worker = pool.get(timeout=OCR_ENGINE_POOL_WAIT)
+                except queue.Empty:
+                    continue
+
+        try:
+            yield worker
+        finally:
+            if self.max_jobs and worker.jobs >= self.max_jobs:
+                logger.info(f"Recycling Tesseract worker '{lang}' after {worker.jobs} jobs")
+                worker.close()
+                try:
+                    worker = _TesseractWorker(lang, oem)
+                except Exception as e:
+                    logger.error(f"Failed to recreate Tesseract worker: {str(e)}")
+                    with self._lock:
+                        self._created[key] -= 1
+                    worker = None
+            if worker is not None:
+                pool.put(worker)
+
+    def shutdown(self):
+        with self._lock:
+            for pool in self._pools.values():
+                while True:
+                    try:
+                        pool.get_nowait().close()
+                    except queue.Empty:
+                        break
+            self._pools.clear()
+            self._created.clear()
+
+
+_engine_pool = None
+_engine_pool_lock = threading.Lock()
+
+
+def get_engine_pool():
+    global _engine_pool
+    if _engine_pool is None:
+        with _engine_pool_lock:
+            if _engine_pool is None:
+                _engine_pool = OCREnginePool()
+    return _engine_pool
+
+
+def uses_inprocess_engine():
+    if OCR_ENGINE_BACKEND not in ('', 'tesserocr'):
+        return False
+    return optional_module('tesserocr') is not None
+
+
+def image_to_string(image, lang='ind', config=''):
+    """
+    Pengganti langsung ``pytesseract.image_to_string``.
+    ``image`` dapat berupa PIL Image atau path file.
+    """
+    if uses_inprocess_engine():
+        oem, psm, variables = parse_config(config)
+        with get_engine_pool().worker(lang, oem) as worker:
+            return worker.image_to_string(image, psm, variables)
+    import pytesseract
+
+    return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+def image_to_tsv(image, lang='ind', config=''):
+    """
+    Jalankan OCR dan kembalikan output TSV Tesseract (posisi dan confidence
+    per kata) dalam bentuk teks.
+    """
+    if uses_inprocess_engine():
+        oem, psm, variables = parse_config(config)
+        with get_engine_pool().worker(lang, oem) as worker:
+            return worker.image_to_string(image, psm, variables, output='tsv')
+    import pytesseract
+
+    return pytesseract.image_to_data(image, lang=lang, config=config)
+
+
+TSV_FIELDS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text',
+)
+
+
+def parse_tsv(tsv):
+    """Ubah output TSV Tesseract menjadi list dict per kata (level 5)"""
+    words = []
+    for row in (tsv or '').splitlines():
+        cols = row.split('\t')
+        if len(cols) < 12 or cols[0] == 'level':
+            continue
+        try:
+            word = {key: int(cols[i]) for i, key in enumerate(TSV_FIELDS[:10])}
+            word['conf'] = float(cols[10])
+        except ValueError:
+            continue
+        word['text'] = '\t'.join(cols[11:])
+        if word['level'] == 5 and word['text'].strip():
+            words.append(word)
+    return words
+
+
+def _normalize_token(token):
+    return token.strip(".,:;()[]'\"").lower()
+
+
+def group_lines(words):
+    """
+    Gabungkan kata hasil TSV menjadi baris dengan bounding box dan rata-rata
+    confidence. Kata dari pass OCR berbeda tidak pernah digabung.
+    """
+    lines = {}
+    for word in words:
+        key = (word.get('pass', 0), word['block_num'], word['par_num'], word['line_num'])
+        line = lines.get(key)
+        right = word['left'] + word['width']
+        bottom = word['top'] + word['height']
+        if line is None:
+            lines[key] = {
+                'words': [word['text']], 'confs': [word['conf']],
+                'pass': key[0], 'block_num': word['block_num'],
+                'left': word['left'], 'top': word['top'], 'right': right, 'bottom': bottom,
+            }
+        else:
+            line['words'].append(word['text'])
+            line['confs'].append(word['conf'])
+            line['left'] = min(line['left'], word['left'])
+            line['top'] = min(line['top'], word['top'])
+            line['right'] = max(line['right'], right)
+            line['bottom'] = max(line['bottom'], bottom)
+    result = []
+    for line in lines.values():
+        line['text'] = ' '.join(line.pop('words'))
+        confs = [conf for conf in line.pop('confs') if conf >= 0]
+        line['conf'] = sum(confs) / len(confs) if confs else None
+        result.append(line)
+    result.sort(key=lambda l: (l['pass'], l['top'], l['left']))
+    return result
+
+
+# Pemisah TSV antar pass OCR saat disimpan sebagai satu string (mis. di cache)
+TSV_PASS_SEPARATOR = '\f'
+
+
+class OCRResult:
+    """
+    Hasil OCR: teks, TSV, hOCR dan daftar kata (kotak, confidence, nomor
+    blok/paragraf/baris). Hasil beberapa pass dapat digabung dengan ``combine``.
+    """
+
+    def __init__(self, text='', tsv=None, hocr=None, words=None):
+        self.text = text or ''
+        self.tsv = tsv
+        self.hocr = hocr
+        self.words = words if words is not None else parse_tsv(tsv)
+        self._token_confidence = None
+
+    @classmethod
+    def from_text(cls, text):
+        """Hasil tanpa geometri (mis. text layer PDF); confidence tidak tersedia"""
+        return cls(text=text, words=[])
+
+    @classmethod
+    def combine(cls, results, separator='\n'):
+        """Gabungkan hasil beberapa pass; kata diberi nomor pass masing-masing"""
+        results = [result for result in results if result is not None and result.text.strip()]
+        words = []
+        for index, result in enumerate(results):
+            for word in result.words:
+                words.append(dict(word, **{'pass': index}))
+        tsv = TSV_PASS_SEPARATOR.join(result.tsv or '' for result in results) or None
+        return cls(separator.join(result.text for result in results), tsv=tsv, words=words)
+
+    @classmethod
+    def from_cache(cls, text, tsv):
+        """Bangun ulang hasil gabungan dari teks dan TSV yang disimpan di cache"""
+        words = []
+        for index, pass_tsv in enumerate((tsv or '').split(TSV_PASS_SEPARATOR)):
+            for word in parse_tsv(pass_tsv):
+                word['pass'] = index
+                words.append(word)
+        return cls(text, tsv=tsv, words=words)
+
+    def offset(self, dx, dy):
+        """Geser koordinat kata (mis. hasil OCR potongan gambar ke koordinat halaman)"""
+        for word in self.words:
+            word['left'] += dx
+            word['top'] += dy
+        return self
+
+    @property
+    def lines(self):
+        return group_lines(self.words)
+
+    @property
+    def blocks(self):
+        """Blok teks (per pass dan block_num) dengan bounding box dan baris-barisnya"""
+        blocks = {}
+        for line in self.lines:
+            key = (line['pass'], line['block_num'])
+            block = blocks.setdefault(key, {
+                'lines': [], 'left': line['left'], 'top': line['top'],
+                'right': line['right'], 'bottom': line['bottom'],
+            })
+            block['lines'].append(line)
+            block['left'] = min(block['left'], line['left'])
+            block['top'] = min(block['top'], line['top'])
+            block['right'] = max(block['right'], line['right'])
+            block['bottom'] = max(block['bottom'], line['bottom'])
+        for block in blocks.values():
+            block['text'] = '\n'.join(line['text'] for line in block['lines'])
+        return list(blocks.values())
+
+    @property
+    def mean_confidence(self):
+        confs = [word['conf'] for word in self.words if word['conf'] >= 0]
+        return round(sum(confs) / len(confs), 1) if confs else None
+
+    def field_confidence(self, value):
+        """
+        Confidence (0-100) untuk nilai field hasil ekstraksi: rata-rata confidence
+        kata OCR yang membentuk nilai tersebut. None jika tidak bisa dicocokkan.
+        """
+        if not value or not self.words:
+            return None
+        if self._token_confidence is None:
+            index = {}
+            for word in self.words:
+                token = _normalize_token(word['text'])
+                if token and word['conf'] >= 0:
+                    index[token] = max(index.get(token, 0.0), word['conf'])
+            self._token_confidence = index
+        confs = [
+            self._token_confidence[token]
+            for token in (_normalize_token(part) for part in str(value).split())
+            if token in self._token_confidence
+        ]
+        return round(sum(confs) / len(confs), 1) if confs else None
+
+    def field_confidences(self, fields):
+        """Confidence untuk setiap field dalam dict nama -> nilai"""
+        return {name: self.field_confidence(value) for name, value in fields.items()}
+
+
+_OUTPUT_CONFIG = '-c tessedit_create_txt=1 -c tessedit_create_tsv=1 -c tessedit_create_hocr=1'
+
+
+def _run_pytesseract_all(image, lang, config):
+    """Satu proses tesseract yang menulis txt, tsv dan hocr sekaligus"""
+    from pytesseract.pytesseract import run_tesseract
+
+    tmp_dir = tempfile.mkdtemp(prefix='ocr_')
+    output_base = os.path.join(tmp_dir, 'out')
+    input_path = image
+    try:
+        if not isinstance(image, str):
+            input_path = os.path.join(tmp_dir, 'input.png')
+            image.save(input_path, format='PNG')
+        run_tesseract(
+            input_path, output_base, extension=None, lang=lang,
+            config=f'{config or ""} {_OUTPUT_CONFIG}'.strip(),
+        )
+        outputs = {}
+        for ext in ('txt', 'tsv', 'hocr'):
+            with open(f'{output_base}.{ext}', encoding='utf-8') as f:
+                outputs[ext] = f.read()
+        return outputs
+    finally:
+        for name in os.listdir(tmp_dir):
+            os.unlink(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def run_ocr(image, lang='ind', config=''):
+    """
+    Jalankan Tesseract satu kali dan kembalikan ``OCRResult`` (teks, TSV,
+    hOCR dan kata-kata beserta kotak dan confidence).
+    """
+    if uses_inprocess_engine():
+        oem, psm, variables = parse_config(config)
+        with get_engine_pool().worker(lang, oem) as worker:
+            outputs = worker.image_to_string(image, psm, variables, output='all')
+    else:
+        outputs = _run_pytesseract_all(image, lang, config)
+    return OCRResult(outputs['txt'], tsv=outputs['tsv'], hocr=outputs['hocr'])
+
+
+@contextmanager
+def shared_image(image):
+    """
+    Siapkan satu gambar untuk dipakai beberapa pemanggilan OCR.
+    Engine in-process memakai gambar langsung dari memori; backend
+    pytesseract menerima path sehingga gambar hanya ditulis ke disk sekali.
+    """
+    if uses_inprocess_engine():
+        yield image
+        return
+
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+        path = tmp.name
+    try:
+        image.save(path, format='PNG')
+        yield path
+    finally:
+        os.unlink(path)
@@ -0,0 +1,566 @@
+"""
+OCR Field Extraction
+====================
+Ekstraksi semua field metadata surat dari teks OCR dalam satu panggilan.
+
+Semua pola dikompilasi sekali saat modul diimpor. Teks dipecah per baris dan
+baris-baris itu dilewati satu kali; setiap baris dikirim ke matcher field yang
+bekerja per baris (nomor surat, tanggal, baris pengirim, fallback isi).
+Field yang polanya berlaku untuk seluruh teks (perihal, acara, tempat, jam,
+penerima, ...) memakai posisi pertama kata kuncinya, dicari sekali per teks dan
+dipakai bersama oleh semua field, sehingga pola tanpa kata kuncinya di teks
+tidak dijalankan sama sekali dan pola lainnya mulai mencari dari kemunculan
+kata kunci pertama.
+
+Hasil setiap field sama dengan fungsi ``extract_*`` lama di ``ocr_utils``,
+yang sekarang menjadi pembungkus tipis modul ini.
+"""
+
+import logging
+import re
+from functools import lru_cache
+
+from config import ocr_timing
+from config.ocr_utils import (
+    convert_indonesian_date_to_datetime, get_dictionary, normalize_case,
+    normalize_ocr_text, split_merged_words, word_breaker
+)
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = 'Not found'
+
+FIELD_NOMOR_SURAT = 'nomor_surat'
+FIELD_DOCUMENT_CODE = 'document_code'
+FIELD_ROMAN_NUMERAL = 'roman_numeral'
+FIELD_TANGGAL = 'tanggal'
+FIELD_PENGIRIM = 'pengirim'
+FIELD_PENERIMA = 'penerima'
+FIELD_ISI_SURATMASUK = 'isi_suratmasuk'
+FIELD_ISI_SURATKELUAR = 'isi_suratkeluar'
+FIELD_ACARA = 'acara'
+FIELD_TEMPAT = 'tempat'
+FIELD_TANGGAL_ACARA = 'tanggal_acara'
+FIELD_JAM = 'jam'
+
+# --- Pola (dikompilasi sekali) ---------------------------------------------
+# Setiap pola seluruh-teks dipasangkan dengan kata kunci (huruf kecil) yang
+# pasti menjadi awal setiap match-nya.
+
+NOMOR_SURAT_PATTERNS = (
+    re.compile(r'(?:Nomor|No|Nomer|NOMOR|NO|N0|Nomar|Nomur|Nomot|Nomoe)\s*[:：\.-]?\s*([\w\./-]+)', re.IGNORECASE),
+    re.compile(r'(?:Nomor|No|Nomer|NOMOR|NO|N0|Nomar|Nomur|Nomot|Nomoe)[^\w\d]{0,3}([\w\./-]+)', re.IGNORECASE),
+    re.compile(r'(\d{1,4}/[\w\./-]+/\d{4})', re.IGNORECASE),  # fallback: nomor surat umum
+)
+
+DATE_PART_SPLIT_RE = re.compile(r'[,:\-]')
+MONTH_DATE_RE = re.compile(r'(\d{1,2})[\s\-/]*([A-Za-z]+)[\s\-/]*(\d{4})')
+NUMERIC_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+# Kedua pola tanggal butuh tahun empat digit; baris tanpanya langsung dilewati
+YEAR_DIGITS_RE = re.compile(r'\d{4}')
+MONTH_NUMBERS = {
+    'januari': '01', 'februari': '02', 'maret': '03', 'april': '04', 'mei': '05', 'juni': '06',
+    'juli': '07', 'agustus': '08', 'september': '09', 'oktober': '10', 'november': '11', 'desember': '12',
+}
+
+PENGIRIM_PATTERNS = (
+    (re.compile(r'Dari\s*:\s*([^\n]+)', re.IGNORECASE | re.MULTILINE), ('dari',)),
+    (re.compile(r'Pengirim\s*:\s*([^\n]+)', re.IGNORECASE | re.MULTILINE), ('pengirim',)),
+    (re.compile(r'Yang\s*[Bb]ersangkutan\s*:\s*([^\n]+)', re.IGNORECASE | re.MULTILINE), ('yang',)),
+    (re.compile(r'(?:Nama|Penulis)\s*[:\-]?\s*([A-Z\s]+)', re.IGNORECASE | re.MULTILINE), ('nama', 'penulis')),
+    (re.compile(r'Perihal\s*[:\-]?\s*([^\n]+)', re.IGNORECASE | re.MULTILINE), ('perihal',)),
+)
+PENGIRIM_IRRELEVANT = ('assalamu', 'dengan', 'hormat')
+NON_WORD_RE = re.compile(r'[^\w\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+PENERIMA_PATTERNS = (
+    (re.compile(r'Yth\.?\s*(.*?)(?:\n|di\s+tempat|Assalamualaikum|Dengan hormat)', re.IGNORECASE | re.DOTALL), ('yth',)),
+    (re.compile(r'Kepada\s+Yth\.?\s*(.*?)(?:\n|di\s+tempat|Assalamualaikum|Dengan hormat)', re.IGNORECASE | re.DOTALL), ('kepada',)),
+)
+DI_TEMPAT_SUFFIX_RE = re.compile(r'di\s*tempat\s*$', re.IGNORECASE)
+
+ISI_SURATMASUK_PATTERNS = (
+    (re.compile(r"(?:Perihal|Hal|HaI|Ha1|PERIHAL|HAL)\s*[:\-]?\s*(.*?)\n", re.DOTALL | re.IGNORECASE),
+     ('perihal', 'hal', 'hai', 'ha1')),
+    (re.compile(r"(?:Isi\s*[Ss]urat|Maksud)\s*[:\-]?\s*(.*?)\n", re.DOTALL | re.IGNORECASE), ('isi', 'maksud')),
+    (re.compile(r"Tentang\s*[:\-]?\s*(.*?)\n", re.DOTALL | re.IGNORECASE), ('tentang',)),
+    (re.compile(r"(?:Di-|Tempat)\s*\n(.*?)\n", re.DOTALL | re.IGNORECASE), ('di-', 'tempat')),
+)
+ISI_SURATMASUK_IRRELEVANT = ('assalamu', 'yth', 'dengan', 'hormat')
+ISI_SURATMASUK_FALLBACK_STOPWORDS = ("assalamu", "wr.wb", "yth")
+
+ISI_SURATKELUAR_PATTERNS = (
+    (re.compile(r"perihal\s*[:\-]?\s*(.*?)(?:\n|$)", re.IGNORECASE), ('perihal',)),
+    (re.compile(r"hal\s*[:\-]?\s*(.*?)(?:\n|$)", re.IGNORECASE), ('hal',)),
+    (re.compile(r"tentang\s*[:\-]?\s*(.*?)(?:\n|$)", re.IGNORECASE), ('tentang',)),
+    (re.compile(r"maksud\s*[:\-]?\s*(.*?)(?:\n|$)", re.IGNORECASE), ('maksud',)),
+)
+ISI_SURATKELUAR_FALLBACK_STOPWORDS = ('assalamu', 'yth', 'kepada', 'dengan', 'hormat')
+
+ACARA_PATTERN = (
+    re.compile(r"(?:Acara|acara)\s*[:\-]?\s*(.*?)(?=\n|tempat|tanggal|jam|pukul|$)", re.IGNORECASE), ('acara',)
+)
+
+TEMPAT_PATTERNS = (
+    (re.compile(r"Tempat\s*:\s*(.*?)\n", re.IGNORECASE), ('tempat',)),
+    (re.compile(r"Tempat\s*:?\s*(.*?)\n", re.IGNORECASE), ('tempat',)),
+    (re.compile(r"(?:Tempat|tempat|lokasi)\s*[:\-]?\s*(.*?)(?=\n|$|Hari|Tanggal|Pukul|Jam)", re.IGNORECASE),
+     ('tempat', 'lokasi')),
+)
+TEMPAT_SALAM = ("Assalamu", "Wassalamu", "Warahmatullahi")
+
+TANGGAL_ACARA_PATTERN = (
+    re.compile(r"(?:Tanggal Acara|Tanggal|tanggal acara|tgl)\s*[:\-]?\s*(.*?)(?=\n|jam|pukul|$)", re.IGNORECASE),
+    ('tanggal', 'tgl'),
+)
+
+JAM_PATTERN = (
+    re.compile(r"(?:Pukul|Jam|Waktu)\s*[:\-]?\s*(\d{1,2}[.:]\d{2})", re.IGNORECASE), ('pukul', 'jam', 'waktu')
+)
+
+DOCUMENT_CODE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    # HM patterns
+    r'(?:\/|\.)([HM]{2}\d+\.\d+\.?\d*)(?:\/|\.)',        # Match HM2.1.4 between separators
+    r'([HM]{2}[\s.-]*\d+[\s.-]*\d+[\s.-]*\d*)',          # Handle spaces or separators in HM code
+    r'(?:\/|\.|\s)([HM]{2}\s*\d+[\s.]*\d+[\s.]*\d*)',    # Even more flexible with spaces
+
+    # HK patterns
+    r'(?:\/|\.)([HK]{2}\d*\.\d+\.?\d*)(?:\/|\.)',        # Match HK.2.6 between separators
+    r'([HK]{2}[\s.-]*\d*[\s.-]*\d+[\s.-]*\d*)',          # Handle spaces or separators in HK code
+    r'(?:\/|\.|\s)([HK]{2}\s*\d*[\s.]*\d+[\s.]*\d*)',    # Even more flexible with spaces for HK
+
+    # Generic patterns for any 2-letter code
+    r'(?:\/|\.)([A-Z]{2}\d*\.\d+\.?\d*)(?:\/|\.)',       # Any 2-letter code with numbers
+    r'([A-Z]{2}[\s.-]*\d*[\s.-]*\d+[\s.-]*\d*)',         # Any 2-letter code with flexible separators
+    r'(?:\/|\.|\s)([A-Z]{2}\s*\d*[\s.]*\d+[\s.]*\d*)',   # Any 2-letter code with spaces
+
+    # Specific patterns for this particular case
+    r'W15-A12\/([A-Z]{2}[0-9.]+\.[0-9]+)',               # Extract after W15-A12/
+    r'[\/\.](?:[A-Z]{2})[.\s-]*(\d*)[.\s-]*(\d+)[.\s-]*(\d*)[\/\.]',  # Extract code parts
+))
+DOCUMENT_CODE_VALID_RE = re.compile(r'^[A-Z]{2}\d*\.\d+', re.IGNORECASE)
+# Setiap pola kode dokumen butuh dua huruf yang (setelah pemisah) diikuti angka
+DOCUMENT_CODE_CANDIDATE_RE = re.compile(r'[A-Z]{2}[\s.\-]*\d', re.IGNORECASE)
+DOCUMENT_CODE_DOTTED_RE = re.compile(r'([A-Z]{2})\s*(\d+)\.\s*(\d+)', re.IGNORECASE)
+DOCUMENT_CODE_LAST_RESORT_RE = re.compile(r'[A-Z]{2}\s*\d+', re.IGNORECASE)
+DOCUMENT_CODE_SPLIT_RE = re.compile(r'([A-Z]{2})(\d)(\d+)')
+DOCUMENT_CODE_FINAL_PATTERNS = (
+    re.compile(r'[\/\.](?:[A-Z]{2})[.\s-]*(\d*)[.\s-]*(\d+)[.\s-]*(\d*)[\/\.]', re.IGNORECASE),
+    re.compile(r'W15-A12\/([A-Z]{2}[0-9.]+\.[0-9]+)', re.IGNORECASE),
+)
+
+ROMAN_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\/\s*((?:IX|IV|V?I{1,3}|X{1,2}I{0,3}))\s*\/',  # Between slashes: /IX/
+    r'[^A-Z]((?:IX|IV|V?I{1,3}|X{1,2}I{0,3}))[^A-Z]',  # Roman numeral surrounded by non-letters
+    r'([IVX]+)[\s\/.-]*(\d{4})',  # Roman numeral followed by year
+    r'(\d+)[\s\/.-]*([IVX]+)',  # Digits followed by Roman numeral (day and month)
+))
+# 1X sering merupakan IX yang salah dibaca OCR
+ROMAN_1X_RE = re.compile(r'[/\s.:-](\d{0,1}X)[/\s.:-]')
+ROMAN_MONTHS = {'I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X', 'XI', 'XII'}
+ARABIC_TO_ROMAN = {
+    '1': 'I', '2': 'II', '3': 'III', '4': 'IV',
+    '5': 'V', '6': 'VI', '7': 'VII', '8': 'VIII',
+    '9': 'IX', '10': 'X', '11': 'XI', '12': 'XII'
+}
+
+# Pemisah baris lain yang dikenali str.splitlines() selain '\n'
+EXTRA_LINE_BREAK_RE = re.compile('[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+# Karakter yang membuat str.lower() tidak sejajar dengan re.IGNORECASE
+# (mengubah panjang teks atau cocok dengan huruf ASCII hanya lewat case folding)
+UNSAFE_LOWER_RE = re.compile('[\u0130\u0131\u017f]')
+
+
+@lru_cache(maxsize=1)
+def _pengirim_keyword_re():
+    """Regex gabungan kata kunci pengirim dari dictionary.json (dimuat sekali)"""
+    keywords = get_dictionary().get('pengirim_keywords', [])
+    if not keywords:
+        return None
+    return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
+
+
+# --- Teks yang diindeks -----------------------------------------------------
+
+class FieldText:
+    """
+    Teks OCR beserta baris-barisnya dan posisi pertama setiap kata kunci,
+    dihitung sekali lalu dipakai bersama oleh semua matcher field.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.lines = text.split('\n')
+        # Tanpa karakter khusus, posisi di text.lower() sama dengan di text
+        self.indexed = not UNSAFE_LOWER_RE.search(text)
+        self.lower = text.lower() if self.indexed else None
+        self.keyword_positions = {}
+
+    def keyword_position(self, keyword):
+        """Posisi pertama kata kunci (huruf kecil) di teks, -1 jika tidak ada"""
+        position = self.keyword_positions.get(keyword)
+        if position is None:
+            position = self.keyword_positions[keyword] = self.lower.find(keyword)
+        return position
+
+    def search(self, pattern, keywords):
+        """
+        Sama dengan ``pattern.search(text)``: dilewati jika tidak ada kata kunci
+        pola di teks, dan dimulai dari kemunculan kata kunci pertama.
+        """
+        if not self.indexed:
+            return pattern.search(self.text)
+        positions = [
+            position for position in map(self.keyword_position, keywords) if position >= 0
+        ]
+        if not positions:
+            return None
+        return pattern.search(self.text, min(positions))
+
+    def iter_splitlines(self):
+        """Baris seperti text.splitlines() (baris kosong bisa terlewat)"""
+        for line in self.lines:
+            if EXTRA_LINE_BREAK_RE.search(line):
+                yield from line.splitlines()
+            else:
+                yield line
+
+
+# --- Matcher per baris ------------------------------------------------------
+# Dipanggil dengan setiap baris teks (urutan atas ke bawah) sampai done=True.
+
+class NomorSuratLineMatcher:
+    """Baris pertama yang cocok dengan salah satu pola nomor surat"""
+
+    def __init__(self):
+        self.done = False
+        self.value = NOT_FOUND
+
+    def feed(self, line):
+        for segment in (line.splitlines() if EXTRA_LINE_BREAK_RE.search(line) else (line,)):
+            for pattern in NOMOR_SURAT_PATTERNS:
+                match = pattern.search(segment)
+                if match:
+                    self.value = match.group(1).strip()
+                    self.done = True
+                    return
+
+
+class DateLineMatcher:
+    """Tanggal pertama dengan nama bulan Indonesia, atau dd/mm/yyyy pertama"""
+
+    def __init__(self):
+        self.done = False
+        self.value = None
+        self.numeric = None
+
+    def feed(self, line):
+        if not YEAR_DIGITS_RE.search(line):
+            return
+        for segment in (line.splitlines() if EXTRA_LINE_BREAK_RE.search(line) else (line,)):
+            for part in DATE_PART_SPLIT_RE.split(segment):
+                match = MONTH_DATE_RE.search(part)
+                if match:
+                    day, month, year = match.groups()
+                    month_num = MONTH_NUMBERS.get(month.lower())
+                    if month_num:
+                        self.value = f"{int(day):02d}/{month_num}/{year}"
+                        self.done = True
+                        return
+            if self.numeric is None:
+                match = NUMERIC_DATE_RE.search(segment)
+                if match:
+                    self.numeric = f"{int(match.group(1)):02d}/{int(match.group(2)):02d}/{match.group(3)}"
+
+    def result(self):
+        return self.value or self.numeric
+
+
+class PengirimLineMatcher:
+    """Baris terbawah yang mengandung kata kunci pengirim"""
+
+    def __init__(self):
+        self.done = False
+        self.value = None
+        self.keyword_re = _pengirim_keyword_re()
+        if self.keyword_re is None:
+            self.done = True
+
+    def feed(self, line):
+        line = line.strip()
+        if line and self.keyword_re.search(line.lower()):
+            self.value = line
+
+
+class FirstLongLineMatcher:
+    """Baris pertama dengan lebih dari ``min_words`` kata tanpa stopword"""
+
+    def __init__(self, min_words, stopwords, splitlines=False):
+        self.done = False
+        self.value = None
+        self.min_words = min_words
+        self.stopwords = stopwords
+        self.splitlines = splitlines
+
+    def feed(self, line):
+        segments = (line,)
+        if self.splitlines and EXTRA_LINE_BREAK_RE.search(line):
+            segments = line.splitlines()
+        for segment in segments:
+            segment = segment.strip()
+            if len(segment.split()) > self.min_words:
+                lowered = segment.lower()
+                if not any(word in lowered for word in self.stopwords):
+                    self.value = segment
+                    self.done = True
+                    return
+
+
+def scan_lines(field_text, matchers):
+    """Lewati baris teks satu kali, kirim setiap baris ke matcher yang belum selesai"""
+    active = [matcher for matcher in matchers if not matcher.done]
+    for line in field_text.lines:
+        if not active:
+            break
+        for matcher in active:
+            matcher.feed(line)
+        active = [matcher for matcher in active if not matcher.done]
+    return matchers
+
+
+# --- Matcher seluruh teks ---------------------------------------------------
+
+def _first_pattern_group(field_text, patterns, accept):
+    """Group 1 dari match pertama pola berprioritas tertinggi yang lolos ``accept``"""
+    for pattern, keywords in patterns:
+        match = field_text.search(pattern, keywords)
+        if match:
+            value = match.group(1).strip()
+            if accept(value):
+                return value
+    return None
+
+
+def match_pengirim_patterns(field_text):
+    value = _first_pattern_group(
+        field_text, PENGIRIM_PATTERNS,
+        lambda pengirim: not any(irrelevant in pengirim.lower() for irrelevant in PENGIRIM_IRRELEVANT)
+    )
+    return normalize_case(value) if value is not None else NOT_FOUND
+
+
+def normalize_pengirim_line(line):
+    cleaned_line = NON_WORD_RE.sub(' ', line)  # Remove special characters
+    cleaned_line = WHITESPACE_RE.sub(' ', cleaned_line).strip()  # Normalize spaces
+    return normalize_case(cleaned_line)
+
+
+def match_penerima(field_text):
+    # Import di sini: normalize_recipient_text tidak dibutuhkan field lain
+    from config.ocr_utils import normalize_recipient_text
+
+    for pattern, keywords in PENERIMA_PATTERNS:
+        match = field_text.search(pattern, keywords)
+        if match:
+            # Only take up to the first newline if present
+            recipient_text = match.group(1).strip().split('\n')[0].strip()
+            recipient_text = WHITESPACE_RE.sub(' ', recipient_text)
+            recipient_text = DI_TEMPAT_SUFFIX_RE.sub('', recipient_text).strip()
+            return normalize_recipient_text(recipient_text)
+    return NOT_FOUND
+
+
+def match_isi_suratmasuk_patterns(field_text):
+    def accept(isi):
+        if '\n' in isi:
+            isi = isi.split('\n')[0].strip()
+        return not any(irrelevant in isi.lower() for irrelevant in ISI_SURATMASUK_IRRELEVANT)
+
+    value = _first_pattern_group(field_text, ISI_SURATMASUK_PATTERNS, accept)
+    if value is None:
+        return None
+    if '\n' in value:
+        value = value.split('\n')[0].strip()
+    return word_breaker(normalize_case(value))
+
+
+def match_isi_suratkeluar_patterns(field_text):
+    value = _first_pattern_group(field_text, ISI_SURATKELUAR_PATTERNS, lambda isi: isi and len(isi) > 3)
+    if value is None:
+        return None
+    return split_merged_words(word_breaker(normalize_case(value)))
+
+
+def match_acara(field_text):
+    match = field_text.search(*ACARA_PATTERN)
+    return normalize_case(match.group(1).strip()) if match else NOT_FOUND
+
+
+def match_tempat(field_text):
+    value = _first_pattern_group(
+        field_text, TEMPAT_PATTERNS,
+        lambda tempat: not any(salam in tempat for salam in TEMPAT_SALAM)
+    )
+    return normalize_case(value) if value is not None else NOT_FOUND
+
+
+def match_tanggal_acara(field_text):
+    match = field_text.search(*TANGGAL_ACARA_PATTERN)
+    return normalize_case(match.group(1).strip()) if match else NOT_FOUND
+
+
+def match_jam(field_text):
+    match = field_text.search(*JAM_PATTERN)
+    return match.group(1).strip() if match else NOT_FOUND
+
+
+def match_document_code(text):
+    """Kode dokumen seperti HM2.1.4 atau HK.2.6"""
+    text = normalize_ocr_text(text)
+    if not DOCUMENT_CODE_CANDIDATE_RE.search(text):
+        return NOT_FOUND
+
+    for pattern in DOCUMENT_CODE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            # Normalize the format (remove spaces, standardize separators)
+            code = WHITESPACE_RE.sub('', match.group(1).strip())
+            if DOCUMENT_CODE_VALID_RE.match(code):
+                return code
+
+    # Dari pola spesifik lama hanya hasil pola terakhir yang pernah dipakai
+    match = DOCUMENT_CODE_DOTTED_RE.search(text)
+    if match:
+        return f"{match.group(1)}{match.group(2)}.{match.group(3)}"
+
+    # Last resort: look for any pattern that could be a document code
+    match = DOCUMENT_CODE_LAST_RESORT_RE.search(text)
+    if match:
+        code_text = match.group(0).upper().replace(' ', '')
+        if len(code_text) >= 4:  # At least 2 letters followed by 2 digits
+            if '.' not in code_text:
+                # Insert dot if missing: HK26 -> HK.2.6
+                parts = DOCUMENT_CODE_SPLIT_RE.findall(code_text)
+                if parts:
+                    code_text = f"{parts[0][0]}.{parts[0][1]}.{parts[0][2]}"
+            return code_text
+
+    for pattern in DOCUMENT_CODE_FINAL_PATTERNS:
+        match = pattern.search(text)
+        if match and len(match.groups()) > 0:
+            if len(match.groups()) == 1:
+                return match.groups()[0]
+            return f"{match.group(1)}.{match.group(2)}.{match.group(3) if match.group(3) else ''}"
+
+    return NOT_FOUND
+
+
+def match_roman_numeral(text):
+    """Bulan dalam angka romawi (I-XII)"""
+    for pattern in ROMAN_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            month = match.group(1).upper()
+            if month in ROMAN_MONTHS:
+                return month
+            if month in ARABIC_TO_ROMAN:
+                return ARABIC_TO_ROMAN[month]
+
+    match = ROMAN_1X_RE.search(text)
+    if match:
+        value = match.group(1)
+        if value == 'X':
+            return 'X'  # October
+        if value == '1X':
+            return 'IX'  # September
+
+    return NOT_FOUND
+
+
+def _date_to_iso(date_str):
+    if date_str:
+        date_obj = convert_indonesian_date_to_datetime(date_str)
+        if date_obj:
+            return date_obj.strftime('%Y-%m-%d')
+    return NOT_FOUND
+
+
+ALL_FIELDS = (
+    FIELD_NOMOR_SURAT, FIELD_DOCUMENT_CODE, FIELD_ROMAN_NUMERAL, FIELD_TANGGAL,
+    FIELD_PENGIRIM, FIELD_PENERIMA, FIELD_ISI_SURATMASUK, FIELD_ISI_SURATKELUAR,
+    FIELD_ACARA, FIELD_TEMPAT, FIELD_TANGGAL_ACARA, FIELD_JAM,
+)
+
+# Field yang cukup memakai pola seluruh teks
+TEXT_MATCHERS = {
+    FIELD_PENERIMA: match_penerima,
+    FIELD_ACARA: match_acara,
+    FIELD_TEMPAT: match_tempat,
+    FIELD_TANGGAL_ACARA: match_tanggal_acara,
+    FIELD_JAM: match_jam,
+}
+
+
+@ocr_timing.timed('extract_fields')
+def extract_fields(text, fields=ALL_FIELDS):
+    """
+    Ekstrak field metadata surat dari teks OCR dalam satu panggilan.
+    Mengembalikan dict nama_field -> nilai ('Not found' jika tidak ada).
+    """
+    field_text = FieldText(text or '')
+    results = {}
+    line_matchers = {}
+
+    for field in fields:
+        if field in TEXT_MATCHERS:
+            results[field] = TEXT_MATCHERS[field](field_text)
+        elif field == FIELD_DOCUMENT_CODE:
+            results[field] = match_document_code(field_text.text)
+        elif field == FIELD_ROMAN_NUMERAL:
+            results[field] = match_roman_numeral(field_text.text)
+        elif field == FIELD_NOMOR_SURAT:
+            line_matchers[field] = NomorSuratLineMatcher()
+        elif field == FIELD_TANGGAL:
+            line_matchers[field] = DateLineMatcher()
+        elif field == FIELD_PENGIRIM:
+            line_matchers[field] = PengirimLineMatcher()
+        elif field == FIELD_ISI_SURATMASUK:
+            # Baris fallback hanya dicari jika pola perihal tidak menemukan apa-apa
+            isi = match_isi_suratmasuk_patterns(field_text)
+            if isi is not None:
+                results[field] = isi
+            else:
+                line_matchers[field] = FirstLongLineMatcher(3, ISI_SURATMASUK_FALLBACK_STOPWORDS)
+        elif field == FIELD_ISI_SURATKELUAR:
+            isi = match_isi_suratkeluar_patterns(field_text)
+            if isi is not None:
+                results[field] = isi
+            else:
+                line_matchers[field] = FirstLongLineMatcher(
+                    10, ISI_SURATKELUAR_FALLBACK_STOPWORDS, splitlines=True
+                )
+        else:
+            raise ValueError(f"Unknown OCR field: {field}")
+
+    scan_lines(field_text, line_matchers.values())
+
+    for field, matcher in line_matchers.items():
+        if field == FIELD_NOMOR_SURAT:
+            results[field] = matcher.value
+        elif field == FIELD_TANGGAL:
+            results[field] = _date_to_iso(matcher.result())
+        elif field == FIELD_PENGIRIM:
+            if matcher.value is not None:
+                results[field] = normalize_pengirim_line(matcher.value)
+            else:
+                results[field] = match_pengirim_patterns(field_text)
+        elif field == FIELD_ISI_SURATMASUK:
+            results[field] = word_breaker(normalize_case(matcher.value)) if matcher.value else NOT_FOUND
+        elif field == FIELD_ISI_SURATKELUAR:
+            results[field] = (
+                split_merged_words(word_breaker(normalize_case(matcher.value))) if matcher.value else NOT_FOUND
+            )
+
+    logger.debug(f"Extracted OCR fields: {results}")
+    return {field: results[field] for field in fields}
@@ -0,0 +1,318 @@
+"""
+OCR Job Queue
+=============
+Antrian job OCR di luar request HTTP. Route upload hanya menyimpan file,
+mendaftarkan job, lalu langsung mengembalikan job ID; OCR dijalankan oleh
+thread worker di background.
+
+Status dan hasil job disimpan di SQLite (bukan di memori proses) sehingga
+endpoint status dan stream SSE bisa dilayani oleh worker web mana pun.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Response, current_app
+
+logger = logging.getLogger(__name__)
+
+# Jumlah job OCR yang berjalan bersamaan; setiap job sudah memakai executor Tesseract sendiri
+OCR_JOB_WORKERS = int(os.environ.get('OCR_JOB_WORKERS', 2))
+OCR_JOB_DB_PATH = os.environ.get(
+    'OCR_JOB_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'ocr_jobs.db'),
+)
+# Job yang sudah selesai dihapus setelah TTL ini (detik)
+OCR_JOB_TTL = int(os.environ.get('OCR_JOB_TTL', 24 * 3600))
+# Job 'queued'/'running' yang tidak diperbarui selama ini dianggap gagal (proses mati/restart)
+OCR_JOB_STALE_SECONDS = int(os.environ.get('OCR_JOB_STALE_SECONDS', 1800))
+
+# Interval cek perubahan status untuk stream SSE (detik)
+OCR_JOB_STREAM_INTERVAL = float(os.environ.get('OCR_JOB_STREAM_INTERVAL', 0.5))
+# Kirim komentar keep-alive agar proxy tidak menutup koneksi SSE yang diam
+OCR_JOB_STREAM_KEEPALIVE = 15
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_PREPROCESSING = 'preprocessing'
+JOB_OCR = 'ocr'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+# Job yang sedang dijalankan oleh thread saat ini (untuk report_job_stage)
+_current_job = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner_id INTEGER,
+    label TEXT,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ocr_jobs_updated_at ON ocr_jobs (updated_at);
+"""
+
+
+class OCRJobStore:
+    """Penyimpanan status job di SQLite"""
+
+    def __init__(self, path=OCR_JOB_DB_PATH):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def create(self, job_id, kind, owner_id=None, label=None):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO ocr_jobs (job_id, kind, owner_id, label, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, owner_id, label, JOB_QUEUED, now, now),
+            )
+            conn.execute(
+                "DELETE FROM ocr_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_DONE, JOB_FAILED, now - OCR_JOB_TTL),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def update(self, job_id, status, result=None, error=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE ocr_jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (
+                    status,
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_many(self, job_ids, owner_id=None):
+        """Kembalikan dict job_id -> job (dict); job milik user lain diabaikan"""
+        if not job_ids:
+            return {}
+        placeholders = ','.join('?' for _ in job_ids)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM ocr_jobs WHERE job_id IN ({placeholders})", list(job_ids)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        jobs = {}
+        now = time.time()
+        for row in rows:
+            if owner_id is not None and row['owner_id'] is not None and row['owner_id'] != owner_id:
+                continue
+            job = dict(row)
+            job['result'] = json.loads(job['result']) if job['result'] else None
+            if job['status'] not in FINISHED_STATUSES and now - job['updated_at'] > OCR_JOB_STALE_SECONDS:
+                job['status'] = JOB_FAILED
+                job['error'] = 'Job tidak selesai (server dimulai ulang?)'
+            jobs[job['job_id']] = job
+        return jobs
+
+
+class OCRJobQueue:
+    """Executor background untuk job OCR dengan status yang bisa ditanyakan"""
+
+    def __init__(self, store=None, max_workers=OCR_JOB_WORKERS):
+        self.store = store or OCRJobStore()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix='ocr-job'
+        )
+
+    def submit(self, kind, func, *args, owner_id=None, label=None, **kwargs):
+        """
+        Daftarkan job dan jalankan ``func(*args, **kwargs)`` di background
+        dalam app context. Mengembalikan job ID.
+        """
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, kind, owner_id=owner_id, label=label)
+        app = current_app._get_current_object()
+        self.executor.submit(self._run, app, job_id, func, args, kwargs)
+        logger.info(f"Queued OCR job {job_id} ({kind}: {label})")
+        return job_id
+
+    def _run(self, app, job_id, func, args, kwargs):
+        with app.app_context():
+            self.store.update(job_id, JOB_RUNNING)
+            _current_job.job_id = job_id
+            _current_job.store = self.store
+            try:
+                result = func(*args, **kwargs)
+                self.store.update(job_id, JOB_DONE, result=result)
+                logger.info(f"OCR job {job_id} finished")
+            except Exception as e:
+                logger.exception(f"OCR job {job_id} failed")
+                self.store.update(job_id, JOB_FAILED, error=str(e))
+            finally:
+                _current_job.job_id = None
+
+    def get_jobs(self, job_ids, owner_id=None):
+        return self.store.get_many(job_ids, owner_id=owner_id)
+
+
+def report_job_stage(stage):
+    """
+    Catat tahap job yang sedang berjalan (mis. JOB_PREPROCESSING, JOB_OCR).
+    Tidak melakukan apa-apa jika dipanggil di luar job (mis. OCR sinkron).
+    """
+    job_id = getattr(_current_job, 'job_id', None)
+    if job_id is None:
+        return
+    try:
+        _current_job.store.update(job_id, stage)
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to report stage '{stage}' for job {job_id}: {str(e)}")
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Instance antrian job bersama"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                os.makedirs(os.path.dirname(OCR_JOB_DB_PATH), exist_ok=True)
+                _job_queue = OCRJobQueue()
+    return _job_queue
+
+
+def parse_job_ids(raw):
+    """Ambil daftar job ID dari query string 'a,b,c'"""
+    return [job_id for job_id in (raw or '').split(',') if job_id]
+
+
+def job_status_payload(job_ids, owner_id=None):
+    """Ringkasan status untuk endpoint polling (tanpa hasil lengkap)"""
+    jobs = get_job_queue().get_jobs(job_ids, owner_id=owner_id)
+    items = []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            items.append({'job_id': job_id, 'status': JOB_FAILED, 'error': 'Job tidak ditemukan'})
+            continue
+        items.append({
+            'job_id': job_id,
+            'label': job['label'],
+            'status': job['status'],
+            'error': job['error'],
+        })
+    done = all(item['status'] in FINISHED_STATUSES for item in items)
+    return {'success': True, 'done': done, 'jobs': items}
+
+
+def collect_job_results(job_ids, owner_id=None):
+    """
+    Kumpulkan hasil job untuk dirender ulang di halaman upload.
+    Mengembalikan (results, failures, pending): hasil job yang selesai (urut
+    sesuai job_ids), label job yang gagal/tanpa hasil, dan ID job yang belum selesai.
+    """
+    jobs = get_job_queue().get_jobs(job_ids, owner_id=owner_id)
+    results, failures, pending = [], [], []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            continue
+        if job['status'] not in FINISHED_STATUSES:
+            pending.append(job_id)
+        elif job['status'] == JOB_DONE and job['result']:
+            results.append(job['result'])
+        else:
+            failures.append((job['label'], job['error']))
+    return results, failures, pending
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def job_event_stream(job_ids, owner_id=None):
+    """
+    Generator Server-Sent Events untuk sekumpulan job. Setiap perubahan status
+    dikirim sebagai event bernama status tersebut (queued, running,
+    preprocessing, ocr); job selesai dikirim sebagai 'extracted' beserta
+    field hasilnya atau 'failed' beserta pesan error. Stream ditutup dengan
+    event 'complete' setelah semua job selesai.
+    """
+    job_queue = get_job_queue()
+    last_status = {}
+    last_sent = time.time()
+    while True:
+        jobs = job_queue.get_jobs(job_ids, owner_id=owner_id)
+        for job_id in job_ids:
+            job = jobs.get(job_id)
+            status = job['status'] if job else JOB_FAILED
+            if last_status.get(job_id) == status:
+                continue
+            last_status[job_id] = status
+            payload = {'job_id': job_id, 'label': job['label'] if job else None, 'status': status}
+            if status == JOB_DONE and job['result']:
+                payload['data'] = job['result']
+                yield _sse_event('extracted', payload)
+            elif status in FINISHED_STATUSES:
+                payload['error'] = job['error'] if job else 'Job tidak ditemukan'
+                payload['error'] = payload['error'] or 'Tidak ada data yang diekstrak'
+                yield _sse_event('failed', payload)
+            else:
+                yield _sse_event(status, payload)
+            last_sent = time.time()
+
+        if all(status in FINISHED_STATUSES for status in last_status.values()) \
+                and len(last_status) == len(job_ids):
+            yield _sse_event('complete', {'jobs': len(job_ids)})
+            return
+
+        if time.time() - last_sent > OCR_JOB_STREAM_KEEPALIVE:
+            yield ": keep-alive\n\n"
+            last_sent = time.time()
+        time.sleep(OCR_JOB_STREAM_INTERVAL)
+
+
+def job_event_response(job_ids, owner_id=None):
+    """Response Flask text/event-stream untuk job_event_stream"""
+    return Response(
+        job_event_stream(job_ids, owner_id=owner_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Matikan buffering nginx agar event langsung sampai ke browser
+            'X-Accel-Buffering': 'no',
+        },
+    )
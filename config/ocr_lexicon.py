@@ -0,0 +1,235 @@
+"""
+OCR Lexicon
+===========
+Leksikon kata bahasa Indonesia dan segmentasi kata OCR yang menempel
+(mis. "menerimapraktekkerja" -> "menerima praktek kerja").
+
+Leksikon berasal dari daftar kata bawaan (config/data/indonesian_words.txt)
+ditambah kosakata yang dipanen dari surat tersimpan (scripts/build_lexicon.py),
+disimpan sebagai trie dengan biaya -log(peluang) per kata, dan dimuat sekali
+per proses. Segmentasi memakai Viterbi (DP) atas unigram: setiap posisi hanya
+menelusuri trie sejauh awalan yang ada, sehingga waktunya hampir linear
+terhadap panjang token.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+basedir = os.path.abspath(os.path.dirname(__file__) + '/../')
+
+OCR_LEXICON_PATH = os.environ.get(
+    'OCR_LEXICON_PATH', os.path.join(os.path.dirname(__file__), 'data', 'indonesian_words.txt')
+)
+# Kosakata hasil panen dari surat tersimpan (kata<TAB>frekuensi)
+OCR_LEXICON_HARVEST_PATH = os.environ.get(
+    'OCR_LEXICON_HARVEST_PATH', os.path.join(basedir, 'instance', 'ocr_lexicon.txt')
+)
+# Kata yang muncul kurang dari ini di surat tersimpan tidak dipanen (kemungkinan salah OCR)
+OCR_LEXICON_MIN_COUNT = int(os.environ.get('OCR_LEXICON_MIN_COUNT', 2))
+
+SEGMENT_CACHE_SIZE = 4096
+HARVEST_WORD_RE = re.compile(r'[a-z]{2,}')
+_TERMINAL = ''
+
+
+def _read_word_counts(path):
+    """Baca daftar kata; baris 'kata<TAB>frekuensi' atau 'kata' (urutan = peringkat)"""
+    words = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            word, _, count = line.partition('\t')
+            words.append((word.lower(), int(count) if count else None))
+    return words
+
+
+def _word_probabilities(word_counts):
+    """
+    Peluang unigram: frekuensi eksplisit jika ada, jika tidak bobot Zipf dari
+    peringkat di daftar (1 / (peringkat * ln N)).
+    """
+    if not word_counts:
+        return {}
+    if all(count is not None for _, count in word_counts):
+        total = sum(count for _, count in word_counts) or 1
+        return {word: count / total for word, count in word_counts}
+    log_n = math.log(len(word_counts) + 1)
+    probabilities = {}
+    for rank, (word, _) in enumerate(word_counts, start=1):
+        probabilities.setdefault(word, 1 / (rank * log_n))
+    return probabilities
+
+
+class Lexicon:
+    """Trie kata -> biaya (-log peluang) dengan segmentasi Viterbi"""
+
+    def __init__(self, probabilities):
+        self.trie = {}
+        self.size = 0
+        for word, probability in probabilities.items():
+            if word and probability > 0:
+                self._insert(word, -math.log(probability))
+        max_cost = max((-math.log(p) for p in probabilities.values() if p > 0), default=0.0)
+        # Karakter di luar leksikon selalu lebih mahal dari kata apa pun
+        self.unknown_cost = max_cost + 10.0
+        self.segment = lru_cache(maxsize=SEGMENT_CACHE_SIZE)(self._segment)
+
+    def _insert(self, word, cost):
+        node = self.trie
+        for char in word:
+            node = node.setdefault(char, {})
+        if _TERMINAL not in node:
+            self.size += 1
+        node[_TERMINAL] = min(cost, node.get(_TERMINAL, cost))
+
+    def __contains__(self, word):
+        node = self.trie
+        for char in word.lower():
+            node = node.get(char)
+            if node is None:
+                return False
+        return _TERMINAL in node
+
+    def __len__(self):
+        return self.size
+
+    def _segment(self, token):
+        """
+        Segmentasi token (huruf kecil) dengan biaya total minimum.
+        Mengembalikan list (bagian, dikenal) sesuai urutan.
+        """
+        n = len(token)
+        best = [math.inf] * (n + 1)
+        back = [None] * (n + 1)  # (awal, dikenal)
+        best[0] = 0.0
+        for start in range(n):
+            base = best[start]
+            if base == math.inf:
+                continue
+            # Satu karakter tak dikenal agar setiap token tetap bisa disegmentasi
+            if base + self.unknown_cost < best[start + 1]:
+                best[start + 1] = base + self.unknown_cost
+                back[start + 1] = (start, False)
+            node = self.trie
+            for end in range(start, n):
+                node = node.get(token[end])
+                if node is None:
+                    break
+                cost = node.get(_TERMINAL)
+                if cost is not None and base + cost < best[end + 1]:
+                    best[end + 1] = base + cost
+                    back[end + 1] = (start, True)
+
+        parts = []
+        end = n
+        while end > 0:
+            start, known = back[end]
+            parts.append((token[start:end], known))
+            end = start
+        parts.reverse()
+        return parts
+
+
+def load_lexicon(path=None, harvest_path=None):
+    """Bangun leksikon dari daftar kata bawaan dan kosakata hasil panen (jika ada)"""
+    path = path or OCR_LEXICON_PATH
+    harvest_path = harvest_path or OCR_LEXICON_HARVEST_PATH
+    try:
+        probabilities = _word_probabilities(_read_word_counts(path))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Lexicon {path} could not be loaded: {str(e)}")
+        probabilities = {}
+
+    if os.path.exists(harvest_path):
+        try:
+            harvested = _word_probabilities(_read_word_counts(harvest_path))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Harvested lexicon {harvest_path} could not be loaded: {str(e)}")
+            harvested = {}
+        # Interpolasi sama rata antara daftar bawaan dan kosakata surat tersimpan
+        if harvested and probabilities:
+            probabilities = {
+                word: 0.5 * probabilities.get(word, 0.0) + 0.5 * harvested.get(word, 0.0)
+                for word in probabilities.keys() | harvested.keys()
+            }
+        elif harvested:
+            probabilities = harvested
+
+    lexicon = Lexicon(probabilities)
+    logger.info(f"OCR lexicon loaded: {len(lexicon)} words")
+    return lexicon
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon():
+    """Leksikon bersama, dimuat sekali per proses"""
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                _lexicon = load_lexicon()
+    return _lexicon
+
+
+def segment_word(word, lexicon=None, min_part_len=3):
+    """
+    Pecah satu kata yang menempel menjadi kata-kata leksikon. Mengembalikan
+    list bagian (huruf asli dipertahankan), atau [word] jika tidak bisa dipecah
+    seluruhnya menjadi kata dikenal yang panjangnya minimal ``min_part_len``.
+    """
+    lexicon = lexicon or get_lexicon()
+    parts = lexicon.segment(word.lower())
+    if len(parts) < 2 or not all(known and len(part) >= min_part_len for part, known in parts):
+        return [word]
+    result = []
+    offset = 0
+    for part, _ in parts:
+        result.append(word[offset:offset + len(part)])
+        offset += len(part)
+    return result
+
+
+def harvest_vocabulary(texts, min_count=OCR_LEXICON_MIN_COUNT):
+    """Hitung frekuensi kata (huruf kecil, minimal 2 huruf) dari teks surat"""
+    counts = Counter()
+    for text in texts:
+        if text:
+            counts.update(HARVEST_WORD_RE.findall(text.lower()))
+    return Counter({word: count for word, count in counts.items() if count >= min_count})
+
+
+def iter_stored_letter_texts():
+    """Teks field surat masuk/keluar yang sudah diverifikasi (butuh app context)"""
+    from config.extensions import db
+    from config.models import SuratKeluar, SuratMasuk
+
+    columns = (
+        SuratMasuk.pengirim_suratMasuk, SuratMasuk.penerima_suratMasuk, SuratMasuk.isi_suratMasuk,
+        SuratMasuk.acara_suratMasuk, SuratMasuk.tempat_suratMasuk,
+    ), (
+        SuratKeluar.pengirim_suratKeluar, SuratKeluar.penerima_suratKeluar, SuratKeluar.isi_suratKeluar,
+        SuratKeluar.acara_suratKeluar, SuratKeluar.tempat_suratKeluar,
+    )
+    for model_columns in columns:
+        for row in db.session.query(*model_columns).yield_per(500):
+            yield from row
+
+
+def write_word_counts(counts, path):
+    """Simpan kosakata sebagai 'kata<TAB>frekuensi', urut frekuensi menurun"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for word, count in counts.most_common():
+            f.write(f"{word}\t{count}\n")
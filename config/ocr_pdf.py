@@ -0,0 +1,219 @@
+"""
+OCR PDF
+=======
+OCR PDF halaman per halaman. Setiap halaman dirasterisasi sendiri-sendiri
+(grayscale, pada DPI tertentu) lalu di-OCR paralel dengan jumlah halaman
+in-flight yang dibatasi, sehingga PDF banyak halaman tidak pernah dimuat
+seluruhnya ke memori. Hasil halaman (``OCRResult``: teks, kata, confidence)
+dihasilkan lewat generator sesuai urutan.
+
+PDF born-digital tidak perlu di-OCR: text layer setiap halaman dibaca dulu
+dengan ``pdftotext`` (poppler), dan hanya halaman tanpa teks atau dengan teks
+rusak yang dirasterisasi dan di-OCR.
+"""
+
+import logging
+import os
+import re
+import subprocess
+from collections import deque
+from functools import lru_cache
+
+from config import ocr_engine, ocr_timing
+from config.lazy_imports import optional_module
+
+logger = logging.getLogger(__name__)
+
+# DPI rasterisasi halaman PDF untuk OCR
+OCR_PDF_DPI = int(os.environ.get("OCR_PDF_DPI", 300))
+# Maksimum halaman yang dirasterisasi/di-OCR bersamaan (membatasi memori)
+OCR_PDF_MAX_IN_FLIGHT = int(os.environ.get("OCR_PDF_MAX_IN_FLIGHT", 2))
+
+PAGE_SEPARATOR = "\n\n--- PAGE {} ---\n\n"
+
+# Pakai text layer PDF jika ada; set 0 untuk selalu OCR
+OCR_PDF_TEXT_LAYER = os.environ.get("OCR_PDF_TEXT_LAYER", "1").lower() not in ("0", "false", "no")
+# Text layer dianggap kosong jika karakter non-spasi kurang dari ini
+TEXT_LAYER_MIN_CHARS = 20
+# Minimal proporsi karakter "wajar" dan token mirip kata agar text layer dipercaya
+TEXT_LAYER_MIN_PRINTABLE_RATIO = 0.9
+TEXT_LAYER_MIN_WORD_RATIO = 0.5
+PDFTOTEXT_TIMEOUT = 30
+
+_WORD_RE = re.compile(r"^[A-Za-z][A-Za-z'\-]*[A-Za-z]$")
+_VOWEL_RE = re.compile(r"[aiueoAIUEO]")
+_ALLOWED_CHAR_RE = re.compile(r"[\w\s.,:;()/\-'\"&%@#+=*?!<>\[\]]")
+
+
+@lru_cache(maxsize=None)
+def pdf_support():
+    """True jika pdf2image terpasang; dicek sekali saat PDF pertama diproses"""
+    if optional_module("pdf2image") is None:
+        logger.warning("pdf2image not installed. PDF processing will be disabled.")
+        logger.warning("Install with: pip install pdf2image")
+        logger.warning(
+            "Also install poppler: brew install poppler (macOS) or apt-get install poppler-utils (Linux)"
+        )
+        return False
+    return True
+
+
+def get_page_count(pdf_path):
+    """Jumlah halaman PDF (via pdfinfo poppler)"""
+    import pdf2image
+
+    return int(pdf2image.pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def rasterize_page(pdf_path, page_number, dpi=OCR_PDF_DPI):
+    """Rasterisasi satu halaman PDF menjadi gambar grayscale"""
+    import pdf2image
+
+    images = pdf2image.convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=True
+    )
+    return images[0] if images else None
+
+
+def ocr_pdf_page(pdf_path, page_number, dpi=OCR_PDF_DPI, lang="ind"):
+    """Rasterisasi lalu OCR satu halaman (OCRResult); gambar dilepas begitu hasil didapat"""
+    with ocr_timing.span("pdf_rasterize"):
+        image = rasterize_page(pdf_path, page_number, dpi=dpi)
+    if image is None:
+        return ocr_engine.OCRResult.from_text("")
+    try:
+        with ocr_timing.span("ocr"):
+            return ocr_engine.run_ocr(image, lang=lang)
+    finally:
+        image.close()
+
+
+def extract_text_layer(pdf_path, first_page, last_page):
+    """
+    Baca text layer halaman first_page..last_page dengan pdftotext.
+    Mengembalikan dict nomor_halaman -> teks, atau {} jika pdftotext gagal.
+    """
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-f", str(first_page), "-l", str(last_page),
+             "-layout", "-enc", "UTF-8", pdf_path, "-"],
+            capture_output=True, timeout=PDFTOTEXT_TIMEOUT, check=True,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"pdftotext failed for {pdf_path}: {str(e)}")
+        return {}
+    # pdftotext memisahkan halaman dengan form feed
+    pages = result.stdout.decode("utf-8", errors="replace").split("\f")
+    return {
+        first_page + i: text
+        for i, text in enumerate(pages[:last_page - first_page + 1])
+    }
+
+
+def is_usable_text_layer(text):
+    """
+    True jika text layer cukup panjang dan terlihat seperti teks asli, bukan
+    hasil font tanpa mapping Unicode (karakter acak) atau scan tanpa teks.
+    """
+    stripped = "".join(text.split())
+    if len(stripped) < TEXT_LAYER_MIN_CHARS:
+        return False
+    allowed = len(_ALLOWED_CHAR_RE.findall(text))
+    if allowed / len(text) < TEXT_LAYER_MIN_PRINTABLE_RATIO:
+        return False
+    tokens = [token.strip(".,:;()\"'") for token in text.split()]
+    tokens = [token for token in tokens if len(token) > 1 and not token.isdigit()]
+    if not tokens:
+        return False
+    words = sum(1 for token in tokens if _WORD_RE.match(token) and _VOWEL_RE.search(token))
+    return words / len(tokens) >= TEXT_LAYER_MIN_WORD_RATIO
+
+
+def resolve_page_range(pdf_path, first_page=1, last_page=None):
+    """Batasi rentang halaman ke jumlah halaman PDF yang sebenarnya"""
+    page_count = get_page_count(pdf_path)
+    first_page = max(1, first_page or 1)
+    last_page = min(page_count, last_page or page_count)
+    return first_page, last_page, page_count
+
+
+def iter_pdf_page_texts(pdf_path, first_page=1, last_page=None, dpi=OCR_PDF_DPI,
+                        lang="ind", max_in_flight=OCR_PDF_MAX_IN_FLIGHT,
+                        use_text_layer=OCR_PDF_TEXT_LAYER):
+    """
+    Generator (nomor_halaman, OCRResult) sesuai urutan halaman.
+    Halaman dengan text layer yang layak langsung dikembalikan tanpa OCR
+    (tanpa kata/confidence, lihat ``OCRResult.from_text``).
+    Halaman lain di-OCR paralel sementara halaman sebelumnya dikonsumsi,
+    tapi tidak lebih dari ``max_in_flight`` halaman sekaligus.
+    """
+    # Import di sini agar ocr_pdf tidak bergantung pada ocr_utils saat diimpor
+    from config.ocr_utils import get_ocr_executor
+
+    first_page, last_page, page_count = resolve_page_range(pdf_path, first_page, last_page)
+    logger.info(f"OCR PDF {pdf_path}: pages {first_page}-{last_page} of {page_count} at {dpi} DPI")
+
+    text_layer = {}
+    if use_text_layer:
+        with ocr_timing.span("pdf_text_layer"):
+            text_layer = extract_text_layer(pdf_path, first_page, last_page)
+
+    executor = get_ocr_executor()
+    # Halaman di-OCR di thread pool; span-nya tetap masuk ke trace dokumen ini
+    page_ocr = ocr_timing.bind(ocr_pdf_page)
+    pages = iter(range(first_page, last_page + 1))
+    # Isi antrian: (nomor_halaman, OCRResult) dari text layer atau (nomor_halaman, future OCR)
+    in_flight = deque()
+    ocr_in_flight = 0
+    try:
+        while True:
+            while ocr_in_flight < max(1, max_in_flight):
+                page_number = next(pages, None)
+                if page_number is None:
+                    break
+                page_text = text_layer.get(page_number, "")
+                if is_usable_text_layer(page_text):
+                    logger.info(f"PDF page {page_number}: using embedded text layer")
+                    in_flight.append((page_number, ocr_engine.OCRResult.from_text(page_text)))
+                    continue
+                in_flight.append(
+                    (page_number, executor.submit(page_ocr, pdf_path, page_number, dpi, lang))
+                )
+                ocr_in_flight += 1
+            if not in_flight:
+                return
+            page_number, item = in_flight.popleft()
+            if isinstance(item, ocr_engine.OCRResult):
+                yield page_number, item
+            else:
+                ocr_in_flight -= 1
+                yield page_number, item.result()
+    finally:
+        # Konsumen berhenti lebih awal atau error: batalkan halaman yang belum mulai
+        for _, item in in_flight:
+            if not isinstance(item, ocr_engine.OCRResult):
+                item.cancel()
+
+
+def join_page_texts(page_results):
+    """
+    Gabungkan OCRResult halaman menjadi satu OCRResult. Teks memakai pemisah
+    '--- PAGE n ---' (format lama); kata setiap halaman diberi nomor pass
+    sesuai urutan halaman, dan TSV per halaman dipisah TSV_PASS_SEPARATOR
+    (halaman tanpa TSV tetap mendapat segmen kosong) sehingga
+    ``OCRResult.from_cache`` membangun ulang kata dengan nomor yang sama.
+    """
+    page_results = list(page_results)
+    if len(page_results) == 1:
+        texts = [page_results[0][1].text]
+    else:
+        texts = [result.text + PAGE_SEPARATOR.format(page_number) for page_number, result in page_results]
+    words = [
+        dict(word, **{"pass": index})
+        for index, (_, result) in enumerate(page_results)
+        for word in result.words
+    ]
+    tsv = None
+    if any(result.tsv for _, result in page_results):
+        tsv = ocr_engine.TSV_PASS_SEPARATOR.join(result.tsv or "" for _, result in page_results)
+    return ocr_engine.OCRResult("".join(texts), tsv=tsv, words=words)
@@ -0,0 +1,275 @@
+"""
+OCR Perceptual Hash
+===================
+Deteksi scan ulang surat yang sama (resolusi, kompresi, kecerahan, sedikit
+miring atau bergeser) dengan DCT pHash 1024-bit dari halaman yang sudah
+dinormalisasi:
+
+1. gambar dikecilkan ke sisi terpanjang PHASH_PREVIEW_SIZE, median filter 3x3
+   untuk noise scan, lalu tinta dipisahkan dari kertas dengan ambang Otsu;
+2. kemiringan dikoreksi (sudut -4..4 derajat dengan variasi profil baris tinta
+   terbesar) dan halaman dipotong ke kotak tinta, sehingga margin dan posisi
+   kertas di scanner tidak berpengaruh;
+3. kontras dinormalisasi (kertas 0, tinta 255), diperkecil ke 128x128, dan
+   setiap bit menyatakan apakah koefisien DCT 32x32 frekuensi terendah lebih
+   besar dari median.
+
+Surat dengan template yang sama (kop, tata letak) dibedakan oleh panjang baris
+dan paragraf isinya, yang tidak tertangkap hash kecil seperti dHash 9x8.
+Kalibrasi dengan 70 surat dari benchmarks/synthetic_letters.py, masing-masing
+dengan 8 scan ulang (profil noisy/skewed/blurred/low_dpi/mixed, JPEG q55,
+kontras/kecerahan diubah, halaman digeser dan diperkecil 3%): 559 dari 560 scan
+ulang berjarak <= 104 bit (terjauh 110), sedangkan pasangan surat berbeda
+paling dekat 112 bit. Kecocokan hanya saran; surat tetap di-OCR.
+
+Hash disimpan per surat (kolom ``phash``, 256 digit hex) dan diindeks di memori
+dengan BK-tree per tabel, sehingga pencarian tetangga dalam jarak tertentu tidak
+perlu membandingkan dengan semua surat. Index dibangun saat pertama dipakai
+dan diperbarui dengan baris baru (id lebih besar) sebelum setiap pencarian,
+jadi tetap konsisten antar worker tanpa invalidasi.
+"""
+
+import io
+import logging
+import os
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Jarak Hamming maksimum (dari 1024 bit) agar upload disarankan sebagai scan ulang surat tersimpan
+OCR_PHASH_MAX_DISTANCE = int(os.environ.get('OCR_PHASH_MAX_DISTANCE', 104))
+
+# Sisi gambar untuk DCT dan blok frekuensi rendah yang diambil (32x32 = 1024 bit)
+PHASH_SIZE = 128
+PHASH_LOW_FREQ = 32
+PHASH_HEX_LENGTH = PHASH_LOW_FREQ * PHASH_LOW_FREQ // 4
+# Gambar dikecilkan dulu ke sisi terpanjang ini sebelum normalisasi halaman
+PHASH_PREVIEW_SIZE = 1024
+# Pencarian sudut kemiringan pada mask tinta yang lebih kecil lagi
+DESKEW_PREVIEW_SIZE = 512
+DESKEW_MAX_ANGLE = 4.0
+DESKEW_STEP = 0.25
+# Baris/kolom dengan tinta di bawah fraksi ini dianggap margin kosong
+CROP_MIN_INK = 0.002
+
+
+def _otsu_threshold(pixels):
+    """Ambang grayscale yang memisahkan tinta dan kertas (metode Otsu)"""
+    import numpy as np
+
+    histogram = np.bincount(pixels.astype(np.uint8).ravel(), minlength=256).astype(np.float64)
+    weights = np.cumsum(histogram / histogram.sum())
+    means = np.cumsum(histogram / histogram.sum() * np.arange(256))
+    between = (means[-1] * weights - means) ** 2 / (weights * (1 - weights) + 1e-12)
+    return int(np.argmax(between))
+
+
+def _deskew_angle(mask):
+    """Sudut rotasi (derajat) yang membuat baris teks paling datar"""
+    import numpy as np
+    from PIL import Image
+
+    small = mask.copy()
+    small.thumbnail((DESKEW_PREVIEW_SIZE, DESKEW_PREVIEW_SIZE), Image.BILINEAR)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP):
+        profile = np.asarray(small.rotate(angle, resample=Image.BILINEAR), dtype=np.float32).sum(axis=1)
+        # Baris teks yang lurus memberi profil dengan lompatan tajam antar baris
+        score = float(np.var(np.diff(profile)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def _normalize_page(image):
+    """Halaman grayscale lurus, dipotong ke isi, dengan tinta 255 dan kertas 0"""
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    # Decode JPEG langsung pada skala kecil; hash hanya butuh 128x128 piksel
+    image.draft('L', (PHASH_PREVIEW_SIZE, PHASH_PREVIEW_SIZE))
+    gray = image.convert('L')
+    gray.thumbnail((PHASH_PREVIEW_SIZE, PHASH_PREVIEW_SIZE), Image.BILINEAR)
+    pixels = np.asarray(gray.filter(ImageFilter.MedianFilter(3)), dtype=np.float32)
+
+    threshold = _otsu_threshold(pixels)
+    is_ink = pixels < threshold
+    paper = float(np.median(pixels[~is_ink])) if (~is_ink).any() else 255.0
+    ink = float(np.median(pixels[is_ink])) if is_ink.any() else 0.0
+    mask = Image.fromarray((is_ink * 255).astype(np.uint8))
+    angle = _deskew_angle(mask)
+
+    levels = np.clip((paper - pixels) / max(paper - ink, 1.0) * 255, 0, 255).astype(np.uint8)
+    page = Image.fromarray(levels).rotate(angle, resample=Image.BILINEAR)
+    inked = np.asarray(mask.rotate(angle, resample=Image.BILINEAR)) > 64
+    rows = np.flatnonzero(inked.mean(axis=1) > CROP_MIN_INK)
+    cols = np.flatnonzero(inked.mean(axis=0) > CROP_MIN_INK)
+    if rows.size and cols.size:
+        page = page.crop((int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1))
+    return page
+
+
+@lru_cache(maxsize=4)
+def _dct_matrix(size):
+    """Matriks DCT-II ortonormal ``size`` x ``size``"""
+    import numpy as np
+
+    k = np.arange(size)[:, None]
+    x = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def _phash_image(image):
+    import numpy as np
+    from PIL import Image
+
+    small = _normalize_page(image).resize((PHASH_SIZE, PHASH_SIZE), Image.BOX)
+    dct = _dct_matrix(PHASH_SIZE)
+    coefficients = (dct @ np.asarray(small, dtype=np.float64) @ dct.T)[:PHASH_LOW_FREQ, :PHASH_LOW_FREQ].ravel()
+    # Median tanpa komponen DC (rata-rata tinta), yang selalu jauh di atas median
+    bits = coefficients > np.median(coefficients[1:])
+    return np.packbits(bits).tobytes().hex()
+
+
+def compute_phash(file_path):
+    """pHash (256 digit hex) gambar di ``file_path``, atau None jika bukan gambar yang bisa dibuka"""
+    from PIL import Image
+
+    try:
+        with Image.open(file_path) as image:
+            return _phash_image(image)
+    except Exception as e:
+        logger.warning(f"Cannot compute perceptual hash for {file_path}: {str(e)}")
+        return None
+
+
+def compute_phash_bytes(data):
+    """pHash dari isi file gambar (mis. blob di database)"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return _phash_image(image)
+    except Exception as e:
+        logger.warning(f"Cannot compute perceptual hash from blob: {str(e)}")
+        return None
+
+
+def parse_phash(value):
+    """Hash sebagai int, atau None jika kosong atau bukan format hash ini (mis. dHash lama)"""
+    if not value or len(value) != PHASH_HEX_LENGTH:
+        return None
+    try:
+        return int(value, 16)
+    except ValueError:
+        return None
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    BK-tree atas jarak Hamming. Setiap node menyimpan hash dan anak per jarak;
+    pencarian radius r hanya menelusuri anak dengan jarak d-r..d+r
+    (ketidaksamaan segitiga), jauh lebih sedikit dari semua node.
+    """
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """List (jarak, item) dalam ``max_distance`` dari ``value``, terdekat dulu"""
+        if self._root is None:
+            return []
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in items)
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in children.items() if low <= d <= high)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class PerceptualHashIndex:
+    """BK-tree per model (SuratMasuk/SuratKeluar) berisi (phash, id surat)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}
+        self._last_ids = {}
+
+    def _refresh(self, model, id_column):
+        """Masukkan baris dengan id di atas yang terakhir diindeks (baris baru dari worker mana pun)"""
+        from config.extensions import db
+
+        key = model.__tablename__
+        tree = self._trees.setdefault(key, BKTree())
+        last_id = self._last_ids.get(key, 0)
+        rows = (
+            db.session.query(id_column, model.phash)
+            .filter(id_column > last_id, model.phash.isnot(None))
+            .order_by(id_column)
+            .all()
+        )
+        for record_id, phash in rows:
+            last_id = record_id
+            value = parse_phash(phash)
+            if value is None:
+                logger.warning(f"Invalid phash on {key} #{record_id}; run scripts/backfill_file_hash.py --phash")
+                continue
+            tree.add(value, record_id)
+        self._last_ids[key] = last_id
+        return tree
+
+    def find_similar(self, model, id_column, phash, max_distance=OCR_PHASH_MAX_DISTANCE):
+        """
+        Surat ``model`` terdekat dengan jarak <= ``max_distance`` dari ``phash``,
+        sebagai (surat, jarak), atau None.
+        """
+        value = parse_phash(phash)
+        if value is None:
+            return None
+        with self._lock:
+            matches = self._refresh(model, id_column).search(value, max_distance)
+        for distance, record_id in matches:
+            record = model.query.get(record_id)
+            # Surat yang sudah dihapus atau hash-nya berubah tetap ada di tree; lewati
+            stored = parse_phash(record.phash) if record is not None else None
+            if stored is not None and hamming_distance(stored, value) <= max_distance:
+                return record, distance
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._trees.clear()
+            self._last_ids.clear()
+
+
+phash_index = PerceptualHashIndex()
@@ -0,0 +1,301 @@
+"""
+OCR Image Preprocessing
+=======================
+Tahap preprocessing gambar sebelum OCR: normalisasi DPI dan pemotongan
+margin kosong, sehingga jumlah piksel yang masuk ke Tesseract lebih sedikit.
+
+Jika OpenCV tersedia, preprocessing dijalankan sebagai pipeline NumPy yang
+bisa dikonfigurasi (hapus border, normalisasi DPI, denoise, deskew,
+binarisasi Sauvola) dengan catatan waktu per langkah. NumPy, PIL dan
+OpenCV diimpor saat fungsi pertama kali dipakai, bukan saat modul diimpor.
+"""
+
+import logging
+import os
+import time
+
+from config.lazy_imports import optional_module
+
+logger = logging.getLogger(__name__)
+
+OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', 300))
+
+# Lebar sisi pendek kertas A4 (inci), dipakai untuk memperkirakan DPI efektif
+A4_SHORT_SIDE_INCHES = 8.27
+# DPI di metadata di luar rentang ini dianggap tidak valid (mis. default 72 dari scanner)
+MIN_TRUSTED_DPI = 100
+MAX_TRUSTED_DPI = 1200
+# Toleransi skala sebelum resampling benar-benar dilakukan
+DPI_SCALE_TOLERANCE = 0.1
+# Batas pembesaran agar potongan kecil (bukan halaman penuh) tidak membengkak
+MAX_UPSCALE = 2.0
+
+
+def estimate_dpi(image):
+    """
+    Perkirakan DPI efektif gambar.
+    Pakai metadata DPI jika masuk akal, jika tidak anggap halaman berukuran A4.
+    """
+    dpi = image.info.get('dpi')
+    if dpi:
+        try:
+            dpi_x = float(dpi[0])
+            if MIN_TRUSTED_DPI <= dpi_x <= MAX_TRUSTED_DPI:
+                return dpi_x
+        except (TypeError, ValueError, IndexError):
+            pass
+    return min(image.size) / A4_SHORT_SIDE_INCHES
+
+
+def load_image_for_ocr(file_path, target_dpi=OCR_TARGET_DPI):
+    """
+    Buka gambar untuk OCR. JPEG yang jauh lebih besar dari target DPI
+    didekode langsung pada ukuran yang lebih kecil memakai draft mode PIL.
+    Mengembalikan (image, source_dpi).
+    """
+    from PIL import Image
+
+    image = Image.open(file_path)
+    source_dpi = estimate_dpi(image)
+
+    if image.format == 'JPEG' and source_dpi > target_dpi * 2:
+        scale = target_dpi / source_dpi
+        requested = (int(image.size[0] * scale), int(image.size[1] * scale))
+        original_size = image.size
+        # draft() hanya mengecilkan dengan faktor 1/2, 1/4, 1/8 dan tidak pernah
+        # di bawah ukuran yang diminta, jadi hasilnya tetap >= target DPI
+        image.draft('L', requested)
+        if image.size != original_size:
+            source_dpi = source_dpi * image.size[0] / original_size[0]
+            logger.info(f"JPEG draft decode {original_size} -> {image.size}")
+
+    return image, source_dpi
+
+
+def normalize_dpi(image, source_dpi, target_dpi=OCR_TARGET_DPI):
+    """Resample gambar ke target DPI efektif"""
+    from PIL import Image
+
+    if not source_dpi:
+        return image
+    scale = min(target_dpi / source_dpi, MAX_UPSCALE)
+    if abs(scale - 1.0) <= DPI_SCALE_TOLERANCE:
+        return image
+    new_size = (max(1, round(image.size[0] * scale)), max(1, round(image.size[1] * scale)))
+    logger.info(f"Resampling {image.size} -> {new_size} ({source_dpi:.0f} -> {target_dpi} DPI)")
+    return image.resize(new_size, Image.LANCZOS)
+
+
+def crop_margins(gray, dark_threshold=160, min_ink_ratio=0.002, padding=20):
+    """
+    Potong margin kosong memakai proyeksi baris/kolom piksel gelap.
+    ``gray`` harus gambar mode 'L'. Gambar dikembalikan apa adanya jika
+    tidak ditemukan konten.
+    """
+    import numpy as np
+
+    pixels = np.asarray(gray)
+    ink = pixels < dark_threshold
+
+    rows = np.flatnonzero(ink.sum(axis=1) > ink.shape[1] * min_ink_ratio)
+    cols = np.flatnonzero(ink.sum(axis=0) > ink.shape[0] * min_ink_ratio)
+    if rows.size == 0 or cols.size == 0:
+        return gray
+
+    top = max(0, rows[0] - padding)
+    bottom = min(ink.shape[0], rows[-1] + 1 + padding)
+    left = max(0, cols[0] - padding)
+    right = min(ink.shape[1], cols[-1] + 1 + padding)
+
+    if (left, top, right, bottom) == (0, 0, ink.shape[1], ink.shape[0]):
+        return gray
+    logger.info(f"Cropped margins {gray.size} -> {(right - left, bottom - top)}")
+    return gray.crop((int(left), int(top), int(right), int(bottom)))
+
+
+# ---------------------------------------------------------------------------
+# Pipeline preprocessing berbasis NumPy/OpenCV
+# ---------------------------------------------------------------------------
+
+def opencv_support():
+    """True jika OpenCV bisa dimuat (dicek sekali, saat pertama dibutuhkan)"""
+    return optional_module('cv2') is not None
+
+# Urutan langkah default; bisa diubah lewat OCR_PREPROCESS_STEPS (dipisah koma)
+DEFAULT_PIPELINE_STEPS = ['remove_borders', 'normalize_dpi', 'denoise', 'deskew', 'binarize']
+OCR_PREPROCESS_STEPS = [
+    step.strip()
+    for step in os.environ.get('OCR_PREPROCESS_STEPS', ','.join(DEFAULT_PIPELINE_STEPS)).split(',')
+    if step.strip()
+]
+
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+SAUVOLA_WINDOW = 25
+SAUVOLA_K = 0.2
+
+
+def step_remove_borders(gray, ctx):
+    """
+    Hapus border gelap dari scanner (baris/kolom tepi yang hampir seluruhnya
+    hitam) lalu potong margin kosong.
+    """
+    import numpy as np
+
+    ink = gray < 128
+    row_ink = ink.mean(axis=1)
+    col_ink = ink.mean(axis=0)
+
+    top, bottom = 0, gray.shape[0]
+    while top < bottom and row_ink[top] > 0.5:
+        top += 1
+    while bottom > top and row_ink[bottom - 1] > 0.5:
+        bottom -= 1
+    left, right = 0, gray.shape[1]
+    while left < right and col_ink[left] > 0.5:
+        left += 1
+    while right > left and col_ink[right - 1] > 0.5:
+        right -= 1
+    gray = gray[top:bottom, left:right]
+    if gray.size == 0:
+        return gray
+
+    ink = gray < 160
+    rows = np.flatnonzero(ink.sum(axis=1) > ink.shape[1] * 0.002)
+    cols = np.flatnonzero(ink.sum(axis=0) > ink.shape[0] * 0.002)
+    if rows.size == 0 or cols.size == 0:
+        return gray
+    pad = 20
+    return gray[
+        max(0, rows[0] - pad):min(gray.shape[0], rows[-1] + 1 + pad),
+        max(0, cols[0] - pad):min(gray.shape[1], cols[-1] + 1 + pad),
+    ]
+
+
+def step_normalize_dpi(gray, ctx):
+    """Resample array ke target DPI efektif"""
+    import cv2
+
+    source_dpi = ctx.get('source_dpi')
+    if not source_dpi:
+        return gray
+    scale = min(ctx.get('target_dpi', OCR_TARGET_DPI) / source_dpi, MAX_UPSCALE)
+    if abs(scale - 1.0) <= DPI_SCALE_TOLERANCE:
+        return gray
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def step_denoise(gray, ctx):
+    """Hilangkan noise bintik (salt-and-pepper) dari hasil scan"""
+    import cv2
+
+    return cv2.medianBlur(gray, 3)
+
+
+def _projection_score(binary, angle):
+    import cv2
+    import numpy as np
+
+    h, w = binary.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    rotated = cv2.warpAffine(binary, matrix, (w, h), flags=cv2.INTER_NEAREST, borderValue=0)
+    profile = rotated.sum(axis=1, dtype=np.float64)
+    return np.var(profile)
+
+
+def step_deskew(gray, ctx):
+    """
+    Luruskan kemiringan halaman dengan projection profile: sudut terbaik adalah
+    yang membuat jumlah piksel per baris paling 'bergaris' (variansi terbesar).
+    """
+    import cv2
+    import numpy as np
+
+    # Cari sudut pada versi kecil agar cepat
+    scale = min(1.0, 800.0 / max(gray.shape))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+    _, binary = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    angles = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP)
+    scores = [_projection_score(binary, angle) for angle in angles]
+    best_angle = float(angles[int(np.argmax(scores))])
+    ctx['skew_angle'] = best_angle
+    if abs(best_angle) < DESKEW_STEP / 2:
+        return gray
+
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), best_angle, 1.0)
+    return cv2.warpAffine(
+        gray, matrix, (w, h), flags=cv2.INTER_CUBIC,
+        borderMode=cv2.BORDER_CONSTANT, borderValue=255
+    )
+
+
+def step_binarize(gray, ctx):
+    """Binarisasi adaptif (Sauvola) agar tulisan pudar tetap terbaca"""
+    import cv2
+    import numpy as np
+
+    skimage_filters = optional_module('skimage.filters')
+    if skimage_filters is not None:
+        threshold = skimage_filters.threshold_sauvola(gray, window_size=SAUVOLA_WINDOW, k=SAUVOLA_K)
+        return np.where(gray > threshold, 255, 0).astype(np.uint8)
+    return cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, SAUVOLA_WINDOW, 10
+    )
+
+
+PIPELINE_STEPS = {
+    'remove_borders': step_remove_borders,
+    'normalize_dpi': step_normalize_dpi,
+    'denoise': step_denoise,
+    'deskew': step_deskew,
+    'binarize': step_binarize,
+}
+
+
+class PreprocessPipeline:
+    """
+    Pipeline preprocessing yang bekerja langsung pada array NumPy grayscale.
+    Setiap langkah dicatat waktunya (ms) di ``timings``.
+    """
+
+    def __init__(self, steps=None):
+        steps = steps or OCR_PREPROCESS_STEPS
+        unknown = [step for step in steps if step not in PIPELINE_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {unknown}")
+        self.steps = steps
+
+    def run(self, gray, source_dpi=None, target_dpi=OCR_TARGET_DPI, timings=None):
+        """Jalankan semua langkah; ``timings`` (dict) diisi durasi tiap langkah"""
+        ctx = {'source_dpi': source_dpi, 'target_dpi': target_dpi}
+        timings = timings if timings is not None else {}
+        for name in self.steps:
+            start = time.perf_counter()
+            result = PIPELINE_STEPS[name](gray, ctx)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            if result is None or result.size == 0:
+                logger.warning(f"Preprocessing step '{name}' produced an empty image, skipped")
+                continue
+            gray = result
+        if 'skew_angle' in ctx:
+            logger.info(f"Deskew angle: {ctx['skew_angle']:.1f} deg")
+        logger.info(f"Preprocessing timings (ms): {timings}")
+        return gray
+
+
+def preprocess_array(image, source_dpi=None, steps=None, timings=None):
+    """
+    Preprocess PIL image lewat pipeline NumPy/OpenCV. Gambar hanya dikonversi
+    sekali di awal (PIL -> array) dan sekali di akhir (array -> PIL untuk Tesseract).
+    """
+    import numpy as np
+    from PIL import Image
+
+    if image.mode != 'L':
+        image = image.convert('L')
+    gray = np.asarray(image)
+    gray = PreprocessPipeline(steps).run(gray, source_dpi=source_dpi, timings=timings)
+    return Image.fromarray(np.ascontiguousarray(gray))
@@ -0,0 +1,173 @@
+"""
+OCR Region of Interest
+======================
+OCR coarse-to-fine untuk field metadata surat. Pass layout beresolusi rendah
+mencari blok header (Nomor, Lampiran, Hal/Perihal, tanggal) dan blok alamat
+tujuan (Kepada Yth), lalu OCR resolusi penuh hanya dijalankan pada potongan
+tersebut. Isi surat bisa di-OCR belakangan atau dilewati sama sekali.
+"""
+
+import logging
+import re
+
+from config import ocr_engine, ocr_timing
+from config.ocr_cache import get_ocr_cache, make_cache_key
+from config.ocr_jobs import JOB_OCR, JOB_PREPROCESSING, report_job_stage
+from config.ocr_preprocess import OCR_TARGET_DPI, load_image_for_ocr
+from config.ocr_utils import (
+    calculate_file_hash, get_ocr_executor, preprocess_image, preprocess_version
+)
+
+logger = logging.getLogger(__name__)
+
+# Resolusi pass layout; cukup untuk menemukan baris teks, tidak untuk membacanya akurat
+COARSE_DPI = 100
+COARSE_CONFIG = r'--oem 3 --psm 3'
+REGION_CONFIG = r'--oem 3 --psm 6'
+# Jumlah baris maksimum blok alamat tujuan setelah baris "Kepada"
+ADDRESSEE_MAX_LINES = 6
+REGION_PADDING = 15
+
+HEADER_LINE_RE = re.compile(
+    r'^\W*(?:nomor|nomer|no|n0|lampiran|lamp|hal|hai|ha1|perihal|sifat)\b', re.IGNORECASE
+)
+ADDRESSEE_LINE_RE = re.compile(r'^\W*(?:kepada|yth)\b', re.IGNORECASE)
+DATE_LINE_RE = re.compile(
+    r'\d{1,2}\s*(?:Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|'
+    r'September|Oktober|November|Desember)\s*\d{4}',
+    re.IGNORECASE
+)
+
+
+def locate_letter_regions(gray, source_dpi=OCR_TARGET_DPI):
+    """
+    Cari blok header dan alamat tujuan pada gambar grayscale.
+    Mengembalikan dict nama -> (left, top, right, bottom) dalam koordinat
+    gambar asli, atau None jika layout tidak dikenali.
+    """
+    from PIL import Image
+
+    scale = min(1.0, COARSE_DPI / float(source_dpi or OCR_TARGET_DPI))
+    small = gray.resize(
+        (max(1, int(gray.size[0] * scale)), max(1, int(gray.size[1] * scale))),
+        Image.BILINEAR
+    )
+    lines = ocr_engine.group_lines(ocr_engine.parse_tsv(
+        ocr_engine.image_to_tsv(small, lang='ind', config=COARSE_CONFIG)
+    ))
+    if not lines:
+        return None
+
+    header_lines = [l for l in lines if HEADER_LINE_RE.search(l['text']) or DATE_LINE_RE.search(l['text'])]
+    addressee_idx = next((i for i, l in enumerate(lines) if ADDRESSEE_LINE_RE.search(l['text'])), None)
+    if not header_lines and addressee_idx is None:
+        return None
+
+    width, height = small.size
+    regions = {}
+    meta_bottom = 0
+    if header_lines:
+        # Header dimulai dari atas halaman agar kop surat (pengirim) ikut terbaca
+        meta_bottom = max(l['bottom'] for l in header_lines)
+        regions['header'] = (0, 0, width, meta_bottom)
+
+    if addressee_idx is not None:
+        block = [lines[addressee_idx]]
+        line_height = max(1, block[0]['bottom'] - block[0]['top'])
+        for line in lines[addressee_idx + 1:addressee_idx + ADDRESSEE_MAX_LINES]:
+            if line['top'] - block[-1]['bottom'] > line_height * 2:
+                break
+            block.append(line)
+        top = min(l['top'] for l in block)
+        bottom = max(l['bottom'] for l in block)
+        if 'header' in regions and top <= meta_bottom + line_height * 2:
+            # Blok alamat menempel dengan header, jadikan satu potongan
+            regions['header'] = (0, 0, width, max(meta_bottom, bottom))
+        else:
+            regions['addressee'] = (0, top, width, bottom)
+        meta_bottom = max(meta_bottom, bottom)
+
+    if meta_bottom < height:
+        regions['body'] = (0, meta_bottom, width, height)
+
+    pad = REGION_PADDING
+    full_w, full_h = gray.size
+    scaled = {}
+    for name, (left, top, right, bottom) in regions.items():
+        scaled[name] = (
+            max(0, int(left / scale) - pad),
+            max(0, int(top / scale) - pad),
+            min(full_w, int(right / scale) + pad),
+            min(full_h, int(bottom / scale) + pad),
+        )
+    logger.info(f"Located letter regions: {scaled}")
+    return scaled
+
+
+def extract_ocr_result_by_regions(file_path, file_hash=None, include_body=False):
+    """
+    OCR hanya bagian header dan alamat tujuan pada resolusi penuh.
+    Isi surat di-OCR setelahnya jika ``include_body`` True.
+    Mengembalikan ``OCRResult`` (koordinat kata dalam koordinat halaman), atau
+    None jika region tidak ditemukan sehingga pemanggil bisa kembali ke OCR
+    halaman penuh.
+    """
+    try:
+        cache = get_ocr_cache()
+        cache_key = None
+        if cache is not None:
+            file_hash = file_hash or calculate_file_hash(file_path)
+            cache_key = make_cache_key(
+                file_hash, 'ind', ['regions', REGION_CONFIG, str(include_body), 'txt+tsv'],
+                preprocess_version()
+            )
+            with ocr_timing.span('cache_lookup'):
+                cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OCR cache hit for regions of {file_path} ({file_hash})")
+                if not cached['text']:
+                    return None
+                return ocr_engine.OCRResult.from_cache(cached['text'], cached['tsv'])
+
+        report_job_stage(JOB_PREPROCESSING)
+        with ocr_timing.span('load_image'):
+            img, source_dpi = load_image_for_ocr(file_path)
+        with ocr_timing.span('preprocess'):
+            gray = preprocess_image(img, source_dpi)
+        report_job_stage(JOB_OCR)
+        with ocr_timing.span('locate_regions'):
+            regions = locate_letter_regions(gray)
+        if not regions:
+            logger.info(f"No header regions found in {file_path}, falling back to full page")
+            return None
+
+        executor = get_ocr_executor()
+        names = [name for name in ('header', 'addressee') if name in regions]
+        if include_body and 'body' in regions:
+            # Body dikirim terakhir sehingga header selesai lebih dulu
+            names.append('body')
+        # Span 'ocr' mengukur waktu tunggu (wall clock) semua region paralel
+        with ocr_timing.span('ocr'):
+            futures = [
+                executor.submit(ocr_engine.run_ocr, gray.crop(regions[name]), 'ind', REGION_CONFIG)
+                for name in names
+            ]
+
+            results = []
+            for name, future in zip(names, futures):
+                try:
+                    left, top = regions[name][:2]
+                    results.append(future.result().offset(left, top))
+                except Exception as e:
+                    logger.error(f"Error OCR region '{name}': {str(e)}")
+
+        combined = ocr_engine.OCRResult.combine(results)
+        if cache_key is not None and combined.text:
+            with ocr_timing.span('cache_store'):
+                cache.set(cache_key, file_hash, combined.text, combined.tsv)
+        return combined if combined.text else None
+
+    except Exception as e:
+        logger.error(f"Error extracting regions from {file_path}: {str(e)}")
+        return None
+
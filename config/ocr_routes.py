@@ -6,11 +6,12 @@ OCR testing and processing functionality
 import os
 import tempfile
 
-import pytesseract
 from flask import Blueprint, render_template, request, flash, current_app, send_from_directory
 from flask_login import login_required
 from werkzeug.utils import secure_filename
 
+from config import ocr_engine
+
 ocr_routes_bp = Blueprint('ocr_routes', __name__)
 
 
@@ -39,7 +40,7 @@ def ocr_test():
                     file.save(temp_path)
                     
                     # Perform OCR
-                    extracted_text = pytesseract.image_to_string(temp_path, lang='ind+eng')
+                    extracted_text = ocr_engine.image_to_string(temp_path, lang='ind+eng')
                     
                     # Clean up
                     os.remove(temp_path)
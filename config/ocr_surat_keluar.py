@@ -5,32 +5,35 @@ import logging
 import traceback
 from flask import (
     render_template, request, Blueprint, url_for, flash, redirect, 
-    jsonify, send_file, session, current_app, send_from_directory, abort
+    jsonify, session, current_app, abort
 )
 from flask_login import login_required, current_user
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
-import pytesseract
-from PIL import Image
 import hashlib
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
+from config import ocr_timing
 from config.extensions import db, load_metadata, save_metadata
 from config.models import SuratKeluar
 from config.ocr_utils import (
-    clean_text, extract_dates, extract_penerima_surat_keluar, extract_pengirim,
-    calculate_file_hash, extract_isi_suratmasuk, calculate_ocr_accuracy,
-    is_formulir_cuti, extract_formulir_cuti_data, extract_text_with_multiple_configs,
-    extract_document_code, extract_roman_numeral, normalize_ocr_text, extract_tanggal,
-    extract_nomor_surat
+    clean_text, extract_dates, calculate_file_hash, calculate_ocr_accuracy,
+    is_formulir_cuti, extract_formulir_cuti_data, extract_ocr_result, normalize_ocr_text
 )
-import io
+from config.ocr_fields import extract_fields
 from functools import wraps
 from config.forms import OCRSuratKeluarForm
+from config.ocr_batch import run_folder_batch
+from config.blob_store import get_blob_store, send_blob
+from config.file_responses import send_document
+from config.ocr_phash import compute_phash
+from config.uploads import UploadError, ingest_upload
+from config.ocr_jobs import (
+    collect_job_results, get_job_queue, job_event_response, job_status_payload, parse_job_ids
+)
 import random
 import string
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 ocr_surat_keluar_bp = Blueprint('ocr_surat_keluar', __name__)
@@ -75,19 +78,36 @@ def load_metadata():
     else:
         return {"surat_keluar": {}}
 
-def extract_ocr_data(file_path):
+def extract_ocr_data(file_path, file_hash=None):
+    """
+    Ekstrak data surat keluar (atau formulir cuti) dari gambar.
+    ``file_hash`` bisa diisi jika hash file sudah dihitung pemanggil.
+    Jika OCR_TIMING_ENABLED aktif, waktu per tahap dilampirkan sebagai 'timings'.
+    """
+    with ocr_timing.trace('surat_keluar') as timings:
+        result = _extract_ocr_data(file_path, file_hash)
+    if result is not None and timings is not None:
+        result['timings'] = timings
+    return result
+
+def _extract_ocr_data(file_path, file_hash=None):
     try:
         logger.debug(f"Processing file: {file_path}")
         
+        # Hash dihitung di awal agar bisa dipakai sebagai key cache OCR
+        file_hash = file_hash or calculate_file_hash(file_path)
+
         # Use new text extraction method
-        ocr_output = extract_text_with_multiple_configs(file_path)
+        ocr_result = extract_ocr_result(file_path, file_hash=file_hash)
         
-        if not ocr_output:
+        if not ocr_result:
             logger.warning(f"No text extracted from {file_path}")
             return None
         
+        ocr_output = ocr_result.text
         cleaned_text = clean_text(ocr_output)
-        normalized_text = normalize_ocr_text(cleaned_text)
+        with ocr_timing.span('normalize_text'):
+            normalized_text = normalize_ocr_text(cleaned_text)
         
         # Add more detailed logging for debugging
         logger.debug("===== RAW OCR OUTPUT =====")
@@ -98,12 +118,16 @@ def extract_ocr_data(file_path):
         logger.debug(normalized_text)
 
         # Deteksi formulir cuti
-        if is_formulir_cuti(cleaned_text):
-            cuti_data = extract_formulir_cuti_data(cleaned_text)
-            nomor_surat_cuti = extract_nomor_surat(cleaned_text)
-            kode_dokumen = extract_document_code(cleaned_text)
+        with ocr_timing.span('detect_cuti'):
+            formulir_cuti = is_formulir_cuti(cleaned_text)
+        if formulir_cuti:
+            with ocr_timing.span('cuti_fields'):
+                cuti_data = extract_formulir_cuti_data(cleaned_text)
+            cuti_fields = extract_fields(cleaned_text, ('nomor_surat', 'document_code', 'tanggal'))
+            nomor_surat_cuti = cuti_fields['nomor_surat']
+            kode_dokumen = cuti_fields['document_code']
             # Ambil tanggal dari hasil ekstraksi tanggal jika ada, jika tidak baru ambil dari cuti_data
-            tanggal_ekstrak = extract_tanggal(cleaned_text)
+            tanggal_ekstrak = cuti_fields['tanggal']
             tanggal_final = tanggal_ekstrak if tanggal_ekstrak and tanggal_ekstrak != 'Not found' else cuti_data.get('tanggal', 'N/A')
             # Tentukan jenis surat dari kode dokumen
             if kode_dokumen and kode_dokumen.startswith('KP'):
@@ -123,7 +147,12 @@ def extract_ocr_data(file_path):
                 'pengirim': cuti_data.get('nama', 'N/A'),
                 'penerima': 'Ketua Pengadilan Agama',
                 'isi': isi_cuti,
-                'file_hash': calculate_file_hash(file_path)
+                'file_hash': file_hash,
+                'ocr_confidence': ocr_result.mean_confidence,
+                'field_confidence': ocr_result.field_confidences({
+                    'nomor_surat': nomor_surat_cuti,
+                    'pengirim': cuti_data.get('nama'),
+                })
             }
 
         # Use ORIGINAL cleaned text for document number extraction to preserve structure
@@ -149,71 +178,75 @@ def extract_ocr_data(file_path):
         tahun = 'Not found'
         full_letter_number = 'Not found'
 
-        # Try to match with the patterns using ORIGINAL text
-        for i, pattern in enumerate(nomor_patterns):
-            logger.debug(f"Trying pattern {i}: {pattern}")
-            match = re.search(pattern, text_for_nomor, re.IGNORECASE)
-            if match:
-                logger.debug(f"Pattern {i} matched: {match.groups()}")
+        with ocr_timing.span('nomor_surat'):
+            # Try to match with the patterns using ORIGINAL text
+            for i, pattern in enumerate(nomor_patterns):
+                logger.debug(f"Trying pattern {i}: {pattern}")
+                match = re.search(pattern, text_for_nomor, re.IGNORECASE)
+                if match:
+                    logger.debug(f"Pattern {i} matched: {match.groups()}")
                 
-                if len(match.groups()) >= 5:  # Complete pattern
-                    nomor_suratKeluar = match.group(1)
-                    kodesurat1 = match.group(2)  # Preserve original like "PAN.PA"
-                    kodePA = 'W15-A12'  # Standard code
-                    kodesurat2 = match.group(3)  # Preserve original like "HK.2.6"
-                    bulan = match.group(4).upper().replace('1X', 'IX')
-                    tahun = match.group(5)
-                    logger.debug(f"nomor_suratKeluar: {nomor_suratKeluar}")
-                    logger.debug(f"kodesurat1: {kodesurat1}")
-                    logger.debug(f"kodePA: {kodePA}")
-                    logger.debug(f"kodesurat2: {kodesurat2}")
-                    logger.debug(f"bulan: {bulan}")
-                    logger.debug(f"tahun: {tahun}")
-                elif len(match.groups()) == 4:  # Flexible pattern
-                    nomor_suratKeluar = match.group(1)
-                    kodesurat1 = 'PAN.PA'  # Default to original structure
-                    kodePA = 'W15-A12'  # Standard code
-                    kodesurat2 = match.group(2)
-                    bulan = match.group(3)
-                    tahun = match.group(4)
+                    if len(match.groups()) >= 5:  # Complete pattern
+                        nomor_suratKeluar = match.group(1)
+                        kodesurat1 = match.group(2)  # Preserve original like "PAN.PA"
+                        kodePA = 'W15-A12'  # Standard code
+                        kodesurat2 = match.group(3)  # Preserve original like "HK.2.6"
+                        bulan = match.group(4).upper().replace('1X', 'IX')
+                        tahun = match.group(5)
+                        logger.debug(f"nomor_suratKeluar: {nomor_suratKeluar}")
+                        logger.debug(f"kodesurat1: {kodesurat1}")
+                        logger.debug(f"kodePA: {kodePA}")
+                        logger.debug(f"kodesurat2: {kodesurat2}")
+                        logger.debug(f"bulan: {bulan}")
+                        logger.debug(f"tahun: {tahun}")
+                    elif len(match.groups()) == 4:  # Flexible pattern
+                        nomor_suratKeluar = match.group(1)
+                        kodesurat1 = 'PAN.PA'  # Default to original structure
+                        kodePA = 'W15-A12'  # Standard code
+                        kodesurat2 = match.group(2)
+                        bulan = match.group(3)
+                        tahun = match.group(4)
                 
-                # Construct the full letter number preserving original structure
-                full_letter_number = f"{nomor_suratKeluar}/{kodesurat1.rstrip('.')}.{kodePA}/{kodesurat2}/{bulan}/{tahun}"
-                logger.debug(f"Full letter number: {full_letter_number}")
-                break
-
-        # If no match found with the standard patterns, try to extract parts
-        if full_letter_number == 'Not found':
-            # Extract document code using original text
-            hm_code = extract_document_code(text_for_nomor)
+                    # Construct the full letter number preserving original structure
+                    full_letter_number = f"{nomor_suratKeluar}/{kodesurat1.rstrip('.')}.{kodePA}/{kodesurat2}/{bulan}/{tahun}"
+                    logger.debug(f"Full letter number: {full_letter_number}")
+                    break
+
+            # If no match found with the standard patterns, try to extract parts
+            nomor_fields = None
+            if full_letter_number == 'Not found':
+                # Extract document code and Roman numeral for month using original text
+                nomor_fields = extract_fields(text_for_nomor, ('document_code', 'roman_numeral'))
+                hm_code = nomor_fields['document_code']
+                roman_numeral = nomor_fields['roman_numeral']
             
-            # Extract Roman numeral for month using original text
-            roman_numeral = extract_roman_numeral(text_for_nomor)
+                # Extract basic number using original text
+                nomor_match = re.search(r'(?:Nomor|No|Nomer|NOMOR)\s*[:.\-]?\s*(\d+)', text_for_nomor, re.IGNORECASE)
+                if nomor_match:
+                    nomor_suratKeluar = nomor_match.group(1)
             
-            # Extract basic number using original text
-            nomor_match = re.search(r'(?:Nomor|No|Nomer|NOMOR)\s*[:.\-]?\s*(\d+)', text_for_nomor, re.IGNORECASE)
-            if nomor_match:
-                nomor_suratKeluar = nomor_match.group(1)
+                # Extract year using original text
+                year_match = re.search(r'\b(20\d{2})\b', text_for_nomor)
+                if year_match:
+                    tahun = year_match.group(1)
             
-            # Extract year using original text
-            year_match = re.search(r'\b(20\d{2})\b', text_for_nomor)
-            if year_match:
-                tahun = year_match.group(1)
-            
-            # If we have all the essential parts, construct the full letter number
-            if nomor_suratKeluar != 'Not found' and hm_code != 'Not found' and roman_numeral != 'Not found' and tahun != 'Not found':
-                full_letter_number = f"{nomor_suratKeluar}/PAN.PA.W15-A12/{hm_code}/{roman_numeral}/{tahun}"
-                logger.debug(f"Constructed full letter number: {full_letter_number}")
+                # If we have all the essential parts, construct the full letter number
+                if nomor_suratKeluar != 'Not found' and hm_code != 'Not found' and roman_numeral != 'Not found' and tahun != 'Not found':
+                    full_letter_number = f"{nomor_suratKeluar}/PAN.PA.W15-A12/{hm_code}/{roman_numeral}/{tahun}"
+                    logger.debug(f"Constructed full letter number: {full_letter_number}")
 
         # Ensure kodesurat2 is always filled if possible
         if kodesurat2 == 'Not found':
-            kodesurat2 = extract_document_code(text_for_nomor)
+            if nomor_fields is None:
+                nomor_fields = extract_fields(text_for_nomor, ('document_code',))
+            kodesurat2 = nomor_fields['document_code']
 
         # Extract other information using normalized text for better accuracy
-        tanggal = extract_tanggal(normalized_text)
-        pengirim = extract_pengirim(normalized_text)
-        penerima = extract_penerima_surat_keluar(normalized_text)
-        isi_surat = extract_isi_suratmasuk(normalized_text)
+        fields = extract_fields(normalized_text, ('tanggal', 'pengirim', 'penerima', 'isi_suratmasuk'))
+        tanggal = fields['tanggal']
+        pengirim = fields['pengirim']
+        penerima = fields['penerima']
+        isi_surat = fields['isi_suratmasuk']
         
         # Log extracted tanggal for debugging
         logger.debug(f"Extracted tanggal: {tanggal}")
@@ -221,9 +254,6 @@ def extract_ocr_data(file_path):
         logger.debug(f"Extracted penerima: {penerima}")
         logger.debug(f"Extracted isi_surat: {isi_surat}")
         
-        # Calculate hash for file identification
-        file_hash = calculate_file_hash(file_path)
-        
         return {
             'nomor_surat': full_letter_number,
             'kodesurat2': kodesurat2,
@@ -232,7 +262,15 @@ def extract_ocr_data(file_path):
             'pengirim': pengirim,
             'penerima': penerima,
             'isi': isi_surat,
-            'file_hash': file_hash
+            'file_hash': file_hash,
+            'ocr_confidence': ocr_result.mean_confidence,
+            # Confidence Tesseract (0-100) per field dari kata-kata OCR yang membentuknya
+            'field_confidence': ocr_result.field_confidences({
+                'nomor_surat': full_letter_number,
+                'tanggal': tanggal,
+                'pengirim': pengirim,
+                'penerima': penerima,
+            })
         }
 
     except Exception as e:
@@ -241,47 +279,19 @@ def extract_ocr_data(file_path):
         logger.error(traceback.format_exc())
         return None
 
-def process_batch_ocr(folder_path, max_files=None):
+def process_batch_ocr(folder_path, max_files=None, max_workers=None):
     """
-    Process multiple files in a directory for OCR extraction
+    Process multiple files in a directory for OCR extraction.
+    File diproses paralel di process pool (lihat config.ocr_batch); kegagalan
+    satu file hanya dicatat di log dan tidak menghentikan batch.
     """
     try:
         logger.info(f"Processing batch OCR from folder: {folder_path}")
         if not os.path.exists(folder_path):
             logger.error(f"Folder path does not exist: {folder_path}")
             return [], "Folder not found"
-            
-        # Get all image files in the folder
-        image_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path)
-                     if os.path.isfile(os.path.join(folder_path, f)) and 
-                     f.lower().endswith(('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp'))]
-        
-        if max_files:
-            image_files = image_files[:max_files]
-            
-        logger.info(f"Found {len(image_files)} image files to process")
-        
-        results = []
-        extracted_text = ""
-        
-        for file_path in image_files:
-            filename = os.path.basename(file_path)
-            logger.info(f"Processing file: {filename}")
-            
-            try:
-                extracted_data = extract_ocr_data(file_path)
-                if extracted_data:
-                    extracted_data['filename'] = filename
-                    results.append(extracted_data)
-                    
-                    # Add extracted text
-                    extracted_text += f"--- Dokumen: {filename} ---\n{extracted_data.get('isi', 'Tidak ada teks')}\n\n"
-                else:
-                    logger.warning(f"No data extracted from file: {filename}")
-            except Exception as e:
-                logger.error(f"Error processing file {filename}: {str(e)}")
-                
-        return results, extracted_text
+
+        return run_folder_batch(extract_ocr_data, folder_path, max_files=max_files, max_workers=max_workers)
         
     except Exception as e:
         logger.error(f"Error in batch processing: {str(e)}")
@@ -298,6 +308,8 @@ def save_batch_results_to_db(results):
                 # Generate a kode_surat from the nomor_surat
                 kode_surat = "SM-" + ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
                 
+                # File yang sudah masuk blob store direferensikan dari baris surat
+                blob_ref = get_blob_store().ref(item.get('file_hash'))
                 # Buat objek SuratKeluar baru
                 surat_keluar = SuratKeluar(
                     nomor_suratKeluar=item.get('nomor_surat', 'Not found'),
@@ -311,12 +323,17 @@ def save_batch_results_to_db(results):
                     initial_penerima_suratKeluar=item.get('penerima', 'Not found'),
                     initial_isi_suratKeluar=item.get('isi', 'Not found'),
                     initial_nomor_suratKeluar=item.get('nomor_surat', 'Not found'),
-                    status_suratKeluar='pending'
+                    status_suratKeluar='pending',
+                    file_hash=item.get('file_hash'),
+                    phash=item.get('phash'),
+                    gambar_blob_suratKeluar=blob_ref,
+                    file_blob_suratKeluar=blob_ref
                 )
                 
-                # Simpan file path
-                if 'filename' in item:
-                    surat_keluar.file_path = item['filename']
+                # Simpan file path (nama file di folder upload)
+                stored_filename = item.get('stored_filename') or item.get('filename')
+                if stored_filename:
+                    surat_keluar.file_path = stored_filename
                 
                 # Simpan ke database
                 db.session.add(surat_keluar)
@@ -334,6 +351,55 @@ def save_batch_results_to_db(results):
         logger.error(f"Error in save_batch_results_to_db: {str(e)}")
         return 0
 
+def surat_keluar_to_extracted_data(surat, filename, stored_filename=None):
+    """
+    Data surat yang sudah tersimpan dalam format hasil ekstraksi OCR (untuk upload ulang).
+    ``filename`` adalah nama asli upload, ``stored_filename`` nama file di folder upload.
+    """
+    return {
+        'id': surat.id_suratKeluar,
+        'nomor_surat': surat.nomor_suratKeluar,
+        'kodesurat2': surat.kode_suratKeluar,
+        'jenis_surat': surat.jenis_suratKeluar,
+        'tanggal': surat.tanggal_suratKeluar.strftime('%Y-%m-%d') if surat.tanggal_suratKeluar else '',
+        'pengirim': surat.pengirim_suratKeluar,
+        'penerima': surat.penerima_suratKeluar,
+        'isi': surat.isi_suratKeluar,
+        'acara': surat.acara_suratKeluar or '',
+        'tempat': surat.tempat_suratKeluar or '',
+        'file_hash': surat.file_hash,
+        'phash': surat.phash,
+        'filename': filename,
+        'stored_filename': stored_filename or filename,
+        'duplicate_of': surat.id_suratKeluar,
+    }
+
+def run_surat_keluar_ocr_job(file_path, filename, file_hash=None):
+    """Job background: OCR satu file surat keluar"""
+    extracted_data = extract_ocr_data(file_path, file_hash=file_hash)
+    if not extracted_data:
+        return None
+    extracted_data['phash'] = compute_phash(file_path)
+    # Mirip surat tersimpan (kemungkinan scan ulang): hanya disarankan saat hasil ditampilkan
+    similar = SuratKeluar.find_similar_scan(extracted_data['phash'])
+    if similar is not None:
+        existing, distance = similar
+        extracted_data['similar_to'] = existing.id_suratKeluar
+        extracted_data['similarity_distance'] = distance
+    # ``filename`` nama asli upload (label); file di disk bernama unik (ingest_upload unique=True)
+    extracted_data['filename'] = filename
+    extracted_data['stored_filename'] = os.path.basename(file_path)
+    extracted_data['file_hash'] = get_blob_store().put_file(file_path, digest=extracted_data.get('file_hash'))
+    return extracted_data
+
+def render_ocr_surat_keluar(extracted_data_list=None, image_paths=None, extracted_text='', pending_jobs=None):
+    return render_template('ocr/ocr_surat_keluar.html',
+                           extracted_data_list=extracted_data_list or [],
+                           image_paths=image_paths or [],
+                           extracted_text=extracted_text,
+                           pending_jobs=pending_jobs or [],
+                           currentIndex=0)
+
 @ocr_surat_keluar_bp.route('/ocr_surat_keluar', methods=['GET', 'POST'])
 @login_required
 @role_required('admin', 'pimpinan')
@@ -355,11 +421,6 @@ def ocr_surat_keluar():
         files = request.files.getlist(key)
         logger.info(f"  Key '{key}' files: {[file.filename for file in files]}")
     
-    extracted_data_list = []
-    image_paths = []
-    extracted_text = ""
-    processed_files = 0
-    
     if request.method == 'POST':
         # Comprehensive file input debugging
         files = (
@@ -375,75 +436,123 @@ def ocr_surat_keluar():
             logger.info(f"File {i} Details:")
             logger.info(f"  Filename: {file.filename}")
             logger.info(f"  Content Type: {file.content_type}")
-            logger.info(f"  Size: {len(file.read())} bytes")
-            file.seek(0)
 
         if not files or all(file.filename == '' for file in files):
             logger.warning("No files selected for upload")
             flash('Silakan pilih dokumen terlebih dahulu', 'warning')
-            return render_template('ocr/ocr_surat_keluar.html',
-                                   extracted_data_list=[],
-                                   image_paths=[],
-                                   extracted_text='',
-                                   currentIndex=0)
+            return render_ocr_surat_keluar()
 
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+        job_queue = get_job_queue()
+        job_ids = []
+        duplicates = []
+        seen_hashes = set()
         for file in files:
             if file.filename == '':
                 continue
             try:
                 filename = secure_filename(file.filename or '')
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
+                # Disimpan, di-hash, dan dicek magic bytes-nya dalam satu kali baca
+                upload = ingest_upload(file, UPLOAD_FOLDER, filename, unique=True)
+                file_path, file_hash = upload.path, upload.file_hash
                 logger.debug(f"File saved to: {file_path}")
-                file_hash = calculate_file_hash(file_path)
-                extracted_data = extract_ocr_data(file_path)
-                
-                if extracted_data:
-                    extracted_data['filename'] = filename
-                    extracted_data_list.append(extracted_data)
-                    image_paths.append(filename)
-                    processed_files += 1
-                    
-                    # Add extracted text
-                    extracted_text += f"--- Dokumen: {filename} ---\n{extracted_data.get('isi', 'Tidak ada teks')}\n\n"
-                else:
-                    logger.warning(f"No data extracted from file: {filename}")
+
+                # File yang sudah pernah disimpan tidak di-OCR ulang
+                if file_hash in seen_hashes:
+                    flash(f"File '{filename}' sama dengan file lain dalam unggahan ini dan dilewati.", 'info')
+                    continue
+                seen_hashes.add(file_hash)
+                existing = SuratKeluar.find_by_file_hash(file_hash)
+                if existing is not None:
+                    logger.info(f"Skipping OCR for {filename}: same file as surat keluar #{existing.id_suratKeluar}")
+                    duplicates.append(surat_keluar_to_extracted_data(existing, filename, upload.filename))
+                    continue
+
+                # OCR dijalankan di background; request langsung kembali dengan job ID
+                job_ids.append(job_queue.submit(
+                    'surat_keluar', run_surat_keluar_ocr_job, file_path, filename,
+                    file_hash=file_hash, owner_id=current_user.id, label=filename
+                ))
         
+            except UploadError as e:
+                flash(str(e), 'error')
             except Exception as e:
-                logger.error(f'Error processing file {file.filename}: {e}')
+                logger.error(f'Error queueing file {file.filename}: {e}')
                 flash(f'Gagal memproses dokumen {filename}: {str(e)}', 'error')
 
-        # Log the final extracted data for debugging
-        logger.info("Final extracted data list:")
-        for i, data in enumerate(extracted_data_list):
-            logger.info(f"Item {i}: {data}")
-        
-        # Render template with extracted data
-        return render_template('ocr/ocr_surat_keluar.html',
-                               extracted_data_list=extracted_data_list,
-                               image_paths=image_paths,
-                               extracted_text=extracted_text,
-                               currentIndex=0)
+        for item in duplicates:
+            flash(f"File '{item['filename']}' sudah tersimpan sebagai surat keluar #{item['duplicate_of']}; OCR dilewati.", 'info')
+        if not job_ids:
+            # Semua file sudah pernah disimpan: tampilkan data yang ada tanpa menunggu job
+            return render_ocr_surat_keluar(
+                extracted_data_list=duplicates,
+                image_paths=[item['stored_filename'] for item in duplicates]
+            )
+        return redirect(url_for('ocr_surat_keluar.ocr_surat_keluar', jobs=','.join(job_ids)))
+
+    # GET dengan ?jobs=...: tampilkan progres atau hasil job OCR
+    job_ids = parse_job_ids(request.args.get('jobs'))
+    if job_ids:
+        extracted_data_list, failures, pending = collect_job_results(job_ids, owner_id=current_user.id)
+        if pending:
+            return render_ocr_surat_keluar(pending_jobs=job_ids)
+        for label, error in failures:
+            logger.warning(f"No data extracted from file: {label} ({error})")
+            flash(f'Gagal memproses dokumen {label}', 'error')
+        for data in extracted_data_list:
+            if data.get('similar_to'):
+                flash(f"File '{data['filename']}' mirip dengan surat keluar #{data['similar_to']} yang sudah tersimpan "
+                      f"(kemungkinan scan ulang). Simpan hanya jika ini surat yang berbeda.", 'warning')
+
+        extracted_text = "".join(
+            f"--- Dokumen: {data['filename']} ---\n{data.get('isi', 'Tidak ada teks')}\n\n"
+            for data in extracted_data_list
+        )
+        return render_ocr_surat_keluar(
+            extracted_data_list=extracted_data_list,
+            image_paths=[data.get('stored_filename') or data['filename'] for data in extracted_data_list],
+            extracted_text=extracted_text
+        )
 
     # GET request handling
-    return render_template('ocr/ocr_surat_keluar.html',
-                           extracted_data_list=[],
-                           image_paths=[],
-                           extracted_text='',
-                           currentIndex=0)
+    return render_ocr_surat_keluar()
+
+@ocr_surat_keluar_bp.route('/ocr_jobs')
+@login_required
+@role_required('admin', 'pimpinan')
+def ocr_surat_keluar_jobs():
+    """Status job OCR untuk polling dari halaman upload (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get('ids'))
+    return jsonify(job_status_payload(job_ids, owner_id=current_user.id))
+
+@ocr_surat_keluar_bp.route('/ocr_jobs/stream')
+@login_required
+@role_required('admin', 'pimpinan')
+def ocr_surat_keluar_job_stream():
+    """Server-Sent Events progres OCR per file (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get('ids'))
+    return job_event_response(job_ids, owner_id=current_user.id)
 
 @ocr_surat_keluar_bp.route('/surat_keluar_image/<int:id>')
 @login_required
 def surat_keluar_image(id):
     surat = SuratKeluar.query.get_or_404(id)
-    return send_file(io.BytesIO(surat.gambar_suratKeluar), mimetype='image/png')
+    response = send_blob(surat.gambar_blob_suratKeluar, surat.gambar_suratKeluar)
+    if response is None:
+        # Surat tanpa gambar terpisah: tampilkan file aslinya
+        response = send_blob(surat.file_blob_suratKeluar, surat.file_suratKeluar)
+    if response is None:
+        abort(404)
+    return response
 
 @ocr_surat_keluar_bp.route('/static/ocr/surat_keluar/<filename>')
 @login_required
 def uploaded_file_surat_keluar(filename):
-    return send_from_directory('static/ocr/surat_keluar', filename)
+    file_path = safe_join(os.path.join(current_app.root_path, 'static', 'ocr', 'surat_keluar'), filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+    return send_document(file_path)
 
 @ocr_surat_keluar_bp.route('/save_extracted_data', methods=['POST'])
 @login_required
@@ -547,6 +656,8 @@ def save_extracted_data():
                         logger.warning(f"Failed to parse tanggal_acara: {tanggal_acara_str}")
                         tanggal_acara = None
 
+                # File yang sudah masuk blob store direferensikan dari baris surat
+                blob_ref = get_blob_store().ref(item.get('file_hash'))
                 # Buat objek SuratKeluar baru dengan field yang benar
                 surat_keluar = SuratKeluar(
                     nomor_suratKeluar=nomor_surat,
@@ -564,7 +675,11 @@ def save_extracted_data():
                     initial_pengirim_suratKeluar=initial_pengirim,
                     initial_penerima_suratKeluar=initial_penerima,
                     initial_isi_suratKeluar=initial_isi,
-                    status_suratKeluar='pending'  # Set initial status to pending
+                    status_suratKeluar='pending',  # Set initial status to pending
+                    file_hash=item.get('file_hash') or None,
+                    phash=item.get('phash') or None,
+                    gambar_blob_suratKeluar=blob_ref,
+                    file_blob_suratKeluar=blob_ref
                 )
 
                 # Simpan ke database terlebih dahulu
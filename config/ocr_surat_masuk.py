@@ -4,32 +4,35 @@ import re
 import logging
 import traceback
 from flask import (
-    render_template, request, Blueprint, url_for, flash, redirect, jsonify, send_file, session, abort, current_app
+    render_template, request, Blueprint, url_for, flash, redirect, jsonify, session, abort, current_app
 )
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-import pytesseract
-from PIL import Image
 import hashlib
 from datetime import datetime
+from config import ocr_timing
 from config.extensions import db, load_metadata, save_metadata
 from config.ocr_utils import (
-    clean_text, extract_dates, extract_penerima_surat_masuk, extract_pengirim,
-    calculate_file_hash, extract_isi_suratkeluar, extract_acara, extract_tempat,
-    extract_tanggal_acara, extract_jam, calculate_ocr_accuracy, extract_document_code,
-    extract_roman_numeral, normalize_ocr_text, extract_text_with_multiple_configs
+    clean_text, extract_dates, calculate_file_hash, calculate_ocr_accuracy, extract_document_code,
+    extract_roman_numeral, normalize_ocr_text, extract_ocr_result
 )
-import io
+from config.ocr_fields import extract_fields
 from functools import wraps
 from config.models import SuratMasuk
 from sqlalchemy.exc import SQLAlchemyError
 from config.ocr_text_processor import ocr_processor
 from config.ocr_surat_masuk_enhancer import surat_masuk_enhancer
+from config.ocr_regions import extract_ocr_result_by_regions
+from config.ocr_batch import run_folder_batch
+from config.blob_store import get_blob_store, send_blob
+from config.ocr_phash import compute_phash
+from config.uploads import UploadError, ingest_upload
+from config.ocr_jobs import (
+    collect_job_results, get_job_queue, job_event_response, job_status_payload, parse_job_ids
+)
 import random
 import string
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 ocr_surat_masuk_bp = Blueprint('ocr_surat_masuk', __name__)
@@ -218,18 +221,40 @@ def parse_date_to_ddmmyyyy(date_str):
         return f"{int(match.group(1)):02d}/{int(match.group(2)):02d}/{match.group(3)}"
     return None
 
-def extract_ocr_data_surat_masuk(file_path):
+def extract_ocr_data_surat_masuk(file_path, metadata_only=False, file_hash=None):
+    """
+    Ekstrak data surat masuk dari gambar.
+    Jika ``metadata_only`` True, hanya blok header dan alamat tujuan yang di-OCR
+    (isi surat dilewati); kembali ke OCR halaman penuh jika region tidak ditemukan.
+    ``file_hash`` bisa diisi jika hash file sudah dihitung pemanggil.
+    Jika OCR_TIMING_ENABLED aktif, waktu per tahap dilampirkan sebagai 'timings'.
+    """
+    with ocr_timing.trace('surat_masuk') as timings:
+        result = _extract_ocr_data_surat_masuk(file_path, metadata_only, file_hash)
+    if result is not None and timings is not None:
+        result['timings'] = timings
+    return result
+
+def _extract_ocr_data_surat_masuk(file_path, metadata_only, file_hash=None):
     try:
         logger.info(f"Extracting OCR data from: {file_path}")
         
+        # Hash dihitung di awal agar bisa dipakai sebagai key cache OCR
+        file_hash = file_hash or calculate_file_hash(file_path)
+
+        ocr_result = None
+        if metadata_only:
+            ocr_result = extract_ocr_result_by_regions(file_path, file_hash=file_hash)
+
         # Extract text from image using the multiple configs approach
-        ocr_output = extract_text_with_multiple_configs(file_path)
+        if not ocr_result:
+            ocr_result = extract_ocr_result(file_path, file_hash=file_hash)
         
-        if not ocr_output:
+        if not ocr_result:
             logger.warning(f"No text extracted from {file_path}")
             return None
             
-        raw_text = ocr_output
+        raw_text = ocr_result.text
         logger.info(f"Full raw text for kode surat extraction:\n{raw_text}")
         
         nomor_suratMasuk = 'Not found'
@@ -239,34 +264,36 @@ def extract_ocr_data_surat_masuk(file_path):
         ]
         nomor_regex = r'(?:' + '|'.join(nomor_variants) + r')'
         lines = raw_text.splitlines()
-        for line in lines:
-            match = re.search(nomor_regex + r'.*[:：](.*)', line, re.IGNORECASE)
-            if match:
-                raw_nomor = match.group(1).strip()
-                # Clean up the extracted letter number
-                cleaned_nomor = clean_letter_number(raw_nomor)
-                if cleaned_nomor and cleaned_nomor != 'Not found':
-                    nomor_suratMasuk = cleaned_nomor
-                    logger.info(f"Extracted and cleaned nomor_surat: {nomor_suratMasuk}")
-                    break
+        with ocr_timing.span('nomor_surat'):
+            for line in lines:
+                match = re.search(nomor_regex + r'.*[:：](.*)', line, re.IGNORECASE)
+                if match:
+                    raw_nomor = match.group(1).strip()
+                    # Clean up the extracted letter number
+                    cleaned_nomor = clean_letter_number(raw_nomor)
+                    if cleaned_nomor and cleaned_nomor != 'Not found':
+                        nomor_suratMasuk = cleaned_nomor
+                        logger.info(f"Extracted and cleaned nomor_surat: {nomor_suratMasuk}")
+                        break
         # Jika tidak ditemukan, tetap return 'Not found'
         
         # Field lain juga gunakan raw_text
-        tanggal = extract_dates(raw_text)
-        # --- FIX: Always output a single string in 'YYYY-MM-DD' format ---
-        tanggal_str = ''
-        if tanggal:
-            if isinstance(tanggal, list):
-                for t in tanggal:
-                    parsed = robust_parse_date(t)
-                    if parsed:
-                        tanggal_str = parsed
-                        break
-                if not tanggal_str:
-                    tanggal_str = tanggal[0]  # fallback to first raw
-            else:
-                parsed = robust_parse_date(tanggal)
-                tanggal_str = parsed if parsed else tanggal
+        with ocr_timing.span('tanggal'):
+            tanggal = extract_dates(raw_text)
+            # --- FIX: Always output a single string in 'YYYY-MM-DD' format ---
+            tanggal_str = ''
+            if tanggal:
+                if isinstance(tanggal, list):
+                    for t in tanggal:
+                        parsed = robust_parse_date(t)
+                        if parsed:
+                            tanggal_str = parsed
+                            break
+                    if not tanggal_str:
+                        tanggal_str = tanggal[0]  # fallback to first raw
+                else:
+                    parsed = robust_parse_date(tanggal)
+                    tanggal_str = parsed if parsed else tanggal
         
         # Pastikan format tanggal YYYY-MM-DD
         if tanggal_str and isinstance(tanggal_str, str) and re.match(r"\d{4}-\d{2}-\d{2}", tanggal_str):
@@ -275,16 +302,18 @@ def extract_ocr_data_surat_masuk(file_path):
             tanggal_final = datetime.now().strftime("%Y-%m-%d")  # Default jika tidak valid
             logger.warning(f"Using current date as fallback: {tanggal_final}")
         
-        pengirim = extract_pengirim(raw_text)
-        penerima = extract_penerima_surat_masuk(raw_text)
-        isi_surat_raw = extract_isi_suratkeluar(raw_text)  # RAW, tanpa clean_text
+        fields = extract_fields(raw_text, (
+            'pengirim', 'penerima', 'isi_suratkeluar', 'acara', 'tempat', 'tanggal_acara', 'jam'
+        ))
+        pengirim = fields['pengirim']
+        penerima = fields['penerima']
+        isi_surat_raw = fields['isi_suratkeluar']  # RAW, tanpa clean_text
         # Improve text spacing for isi surat
         isi_surat = improve_text_spacing(isi_surat_raw) if isi_surat_raw else isi_surat_raw
-        acara = extract_acara(raw_text)
-        tempat = extract_tempat(raw_text)
-        tanggal_acara = extract_tanggal_acara(raw_text)
-        tanggal_acara = parse_date_to_ddmmyyyy(tanggal_acara) or tanggal_acara
-        jam = extract_jam(raw_text)
+        acara = fields['acara']
+        tempat = fields['tempat']
+        tanggal_acara = parse_date_to_ddmmyyyy(fields['tanggal_acara']) or fields['tanggal_acara']
+        jam = fields['jam']
         
         # === PERBAIKAN OCR TEXT PROCESSING ===
         # Buat dictionary data untuk diproses
@@ -298,7 +327,8 @@ def extract_ocr_data_surat_masuk(file_path):
         
         # Proses dengan OCR text processor untuk memperbaiki teks terpotong
         logger.info("Processing OCR text with advanced text processor...")
-        processed_data = ocr_processor.process_surat_masuk_fields(extracted_data)
+        with ocr_timing.span('text_processor'):
+            processed_data = ocr_processor.process_surat_masuk_fields(extracted_data)
         
         # Update variabel dengan hasil yang sudah diproses
         pengirim = processed_data.get('pengirim_suratMasuk', pengirim)
@@ -311,18 +341,20 @@ def extract_ocr_data_surat_masuk(file_path):
         logger.info("Applying surat masuk specific enhancements...")
         
         # Enhance setiap field dengan konteks yang sesuai
-        pengirim = surat_masuk_enhancer.enhance_surat_masuk_text(pengirim, 'pengirim')
-        penerima = surat_masuk_enhancer.enhance_surat_masuk_text(penerima, 'penerima')
-        isi_surat = surat_masuk_enhancer.enhance_surat_masuk_text(isi_surat, 'isi_surat')
-        acara = surat_masuk_enhancer.enhance_surat_masuk_text(acara, 'acara')
-        tempat = surat_masuk_enhancer.enhance_surat_masuk_text(tempat, 'tempat')
+        with ocr_timing.span('enhancer'):
+            pengirim = surat_masuk_enhancer.enhance_surat_masuk_text(pengirim, 'pengirim')
+            penerima = surat_masuk_enhancer.enhance_surat_masuk_text(penerima, 'penerima')
+            isi_surat = surat_masuk_enhancer.enhance_surat_masuk_text(isi_surat, 'isi_surat')
+            acara = surat_masuk_enhancer.enhance_surat_masuk_text(acara, 'acara')
+            tempat = surat_masuk_enhancer.enhance_surat_masuk_text(tempat, 'tempat')
         
-        # Deteksi jenis surat untuk logging
-        surat_type = surat_masuk_enhancer.detect_surat_type(isi_surat)
+            # Deteksi jenis surat untuk logging
+            surat_type = surat_masuk_enhancer.detect_surat_type(isi_surat)
         logger.info(f"Detected surat type: {surat_type}")
         
         # Hitung skor kualitas teks
-        text_quality_score = ocr_processor.get_text_quality_score(isi_surat)
+        with ocr_timing.span('quality_score'):
+            text_quality_score = ocr_processor.get_text_quality_score(isi_surat)
         logger.info(f"Text quality score: {text_quality_score:.2f}")
         
         # Log perbaikan yang dilakukan
@@ -332,9 +364,6 @@ def extract_ocr_data_surat_masuk(file_path):
             logger.info(f"  Enhanced: {isi_surat[:100]}...")
         # === END ENHANCEMENT KHUSUS SURAT MASUK ===
         
-        # Calculate hash for file identification
-        file_hash = calculate_file_hash(file_path)
-        
         # Log hasil ekstraksi untuk debugging
         logger.info(f"Extraction results for {file_path}:")
         logger.info(f"  nomor_surat: {nomor_suratMasuk}")
@@ -342,6 +371,17 @@ def extract_ocr_data_surat_masuk(file_path):
         logger.info(f"  pengirim: {pengirim}")
         logger.info(f"  penerima: {penerima}")
         logger.info(f"  isi length: {len(isi_surat) if isi_surat else 0}")
+
+        # Confidence Tesseract (0-100) per field dari kata-kata OCR yang membentuknya
+        with ocr_timing.span('field_confidence'):
+            field_confidence = ocr_result.field_confidences({
+                'nomor_surat': nomor_suratMasuk,
+                'pengirim': pengirim,
+                'penerima': penerima,
+                'acara': acara,
+                'tempat': tempat,
+                'jam': jam,
+            })
         
         return {
             'nomor_surat': nomor_suratMasuk,
@@ -354,7 +394,9 @@ def extract_ocr_data_surat_masuk(file_path):
             'tanggal_acara': tanggal_acara,
             'jam': jam,
             'file_hash': file_hash,
-            'raw_ocr': raw_text  # Tambahkan hasil raw OCR
+            'raw_ocr': raw_text,  # Tambahkan hasil raw OCR
+            'ocr_confidence': ocr_result.mean_confidence,
+            'field_confidence': field_confidence
         }
         
     except Exception as e:
@@ -363,47 +405,19 @@ def extract_ocr_data_surat_masuk(file_path):
         logger.error(traceback.format_exc())
         return None
 
-def process_batch_ocr_surat_masuk(folder_path, max_files=None):
+def process_batch_ocr_surat_masuk(folder_path, max_files=None, max_workers=None):
     """
-    Process multiple files in a directory for OCR extraction
+    Process multiple files in a directory for OCR extraction.
+    File diproses paralel di process pool (lihat config.ocr_batch); kegagalan
+    satu file hanya dicatat di log dan tidak menghentikan batch.
     """
     try:
         logger.info(f"Processing batch OCR from folder: {folder_path}")
         if not os.path.exists(folder_path):
             logger.error(f"Folder path does not exist: {folder_path}")
             return [], "Folder not found"
-            
-        # Get all image files in the folder
-        image_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path)
-                     if os.path.isfile(os.path.join(folder_path, f)) and 
-                     f.lower().endswith(('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp'))]
-        
-        if max_files:
-            image_files = image_files[:max_files]
-            
-        logger.info(f"Found {len(image_files)} image files to process")
-        
-        results = []
-        extracted_text = ""
-        
-        for file_path in image_files:
-            filename = os.path.basename(file_path)
-            logger.info(f"Processing file: {filename}")
-            
-            try:
-                extracted_data = extract_ocr_data_surat_masuk(file_path)
-                if extracted_data:
-                    extracted_data['filename'] = filename
-                    results.append(extracted_data)
-                    
-                    # Add extracted text
-                    extracted_text += f"--- Dokumen: {filename} ---\n{extracted_data.get('isi', 'Tidak ada teks')}\n\n"
-                else:
-                    logger.warning(f"No data extracted from file: {filename}")
-            except Exception as e:
-                logger.error(f"Error processing file {filename}: {str(e)}")
-                
-        return results, extracted_text
+
+        return run_folder_batch(extract_ocr_data_surat_masuk, folder_path, max_files=max_files, max_workers=max_workers)
         
     except Exception as e:
         logger.error(f"Error in batch processing: {str(e)}")
@@ -455,6 +469,8 @@ def save_batch_results_to_db_surat_masuk(results):
                     except Exception:
                         tanggal_acara_suratMasuk = None
                 
+                # File yang sudah masuk blob store direferensikan dari baris surat
+                blob_ref = get_blob_store().ref(item.get('file_hash'))
                 # Buat dictionary untuk parameter SuratMasuk
                 kode_surat = item.get('kode_suratMasuk') or 'Not found'
                 jenis_surat = item.get('jenis_suratMasuk') or 'Not found'
@@ -474,7 +490,11 @@ def save_batch_results_to_db_surat_masuk(results):
                     'initial_nomor_suratMasuk': item.get('nomor_surat', 'Not found'),
                     'initial_pengirim_suratMasuk': item.get('pengirim', 'Not found'),
                     'initial_penerima_suratMasuk': item.get('penerima', 'Not found'),
-                    'initial_isi_suratMasuk': item.get('isi', 'Not found')
+                    'initial_isi_suratMasuk': item.get('isi', 'Not found'),
+                    'file_hash': item.get('file_hash'),
+                    'phash': item.get('phash'),
+                    'gambar_blob_suratMasuk': blob_ref,
+                    'file_blob_suratMasuk': blob_ref
                 }
                 # Fallback jika masih None
                 if not surat_masuk_data['kode_suratMasuk']:
@@ -502,29 +522,90 @@ def save_batch_results_to_db_surat_masuk(results):
         logger.error(traceback.format_exc())
         return 0
 
+def surat_masuk_to_extracted_data(surat, filename, stored_filename=None):
+    """
+    Data surat yang sudah tersimpan dalam format hasil ekstraksi OCR (untuk upload ulang).
+    ``filename`` adalah nama asli upload, ``stored_filename`` nama file di folder upload.
+    """
+    stored_filename = stored_filename or filename
+    return {
+        'id': surat.id_suratMasuk,
+        'nomor_surat': surat.nomor_suratMasuk,
+        'tanggal': surat.tanggal_suratMasuk.strftime('%Y-%m-%d') if surat.tanggal_suratMasuk else '',
+        'pengirim': surat.pengirim_suratMasuk,
+        'penerima': surat.penerima_suratMasuk,
+        'isi': surat.isi_suratMasuk,
+        'acara': surat.acara_suratMasuk or '',
+        'tempat': surat.tempat_suratMasuk or '',
+        'tanggal_acara': (
+            surat.tanggal_acara_suratMasuk.strftime('%d/%m/%Y') if surat.tanggal_acara_suratMasuk else ''
+        ),
+        'jam': surat.jam_suratMasuk or '',
+        'file_hash': surat.file_hash,
+        'phash': surat.phash,
+        'filename': filename,
+        'stored_filename': stored_filename,
+        'image_path': f'/static/ocr/surat_masuk/{stored_filename}',
+        'duplicate_of': surat.id_suratMasuk,
+        'saved': False,
+    }
+
+def run_surat_masuk_ocr_job(file_path, filename, metadata_only=False, file_hash=None):
+    """Job background: OCR satu file surat masuk lalu simpan hasilnya ke database"""
+    extracted_data = extract_ocr_data_surat_masuk(file_path, metadata_only=metadata_only, file_hash=file_hash)
+    if not extracted_data:
+        return None
+    extracted_data['phash'] = compute_phash(file_path)
+    # ``filename`` nama asli upload (label); file di disk bernama unik (ingest_upload unique=True)
+    extracted_data['filename'] = filename
+    extracted_data['stored_filename'] = os.path.basename(file_path)
+    extracted_data['image_path'] = f"/static/ocr/surat_masuk/{extracted_data['stored_filename']}"
+    extracted_data['file_hash'] = get_blob_store().put_file(file_path, digest=extracted_data.get('file_hash'))
+    # File yang sama bisa tersimpan oleh job lain selama OCR berjalan
+    existing = SuratMasuk.find_by_file_hash(extracted_data.get('file_hash'))
+    if existing is not None:
+        extracted_data['duplicate_of'] = existing.id_suratMasuk
+        extracted_data['saved'] = False
+        return extracted_data
+    # Mirip surat tersimpan (kemungkinan scan ulang): hanya disarankan, pengguna yang memutuskan menyimpan
+    similar = SuratMasuk.find_similar_scan(extracted_data['phash'])
+    if similar is not None:
+        existing, distance = similar
+        extracted_data['similar_to'] = existing.id_suratMasuk
+        extracted_data['similarity_distance'] = distance
+        extracted_data['saved'] = False
+        return extracted_data
+    extracted_data['saved'] = save_batch_results_to_db_surat_masuk([extracted_data]) > 0
+    return extracted_data
+
+def render_ocr_surat_masuk(extracted_data_list=None, image_paths=None, pending_jobs=None):
+    return render_template('ocr/ocr_surat_masuk.html',
+                           extracted_data_list=extracted_data_list or [],
+                           image_paths=image_paths or [],
+                           pending_jobs=pending_jobs or [],
+                           currentIndex=0)
+
 @ocr_surat_masuk_bp.route('/ocr_surat_masuk', methods=['GET', 'POST'])
 @login_required
 @role_required('admin', 'pimpinan')
 def ocr_surat_masuk():
     try:
-        extracted_data_list = []
-        image_paths = []
-        processed_files = 0
-        
         if request.method == 'POST':
             # Pastikan direktori upload ada
             UPLOAD_FOLDER = ensure_upload_folder()
             
             # Tangani kasus tidak ada file yang dipilih
             files = request.files.getlist('image')
+            metadata_only = request.form.get('metadata_only') == '1'
             
             if not files or all(file.filename == '' for file in files):
                 flash('Tidak ada file yang dipilih untuk diunggah.', 'error')
-                return render_template('ocr/ocr_surat_masuk.html',
-                                       extracted_data_list=[],
-                                       image_paths=[],
-                                       currentIndex=0)
+                return render_ocr_surat_masuk()
 
+            job_queue = get_job_queue()
+            job_ids = []
+            duplicates = []
+            seen_hashes = set()
             for file in files:
                 if file.filename == '':
                     continue
@@ -537,59 +618,102 @@ def ocr_surat_masuk():
                         flash(f"File '{filename}' tidak diizinkan. Hanya file dengan ekstensi .png, .jpg, .jpeg, .webp, .tiff, .bmp yang diizinkan.", 'error')
                         continue
                     
-                    file_path = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(file_path)
-                    
-                    # Proses OCR
-                    extracted_data = extract_ocr_data_surat_masuk(file_path)
+                    # Disimpan, di-hash, dan dicek magic bytes-nya dalam satu kali baca
+                    upload = ingest_upload(file, UPLOAD_FOLDER, filename, unique=True)
+                    file_path, file_hash = upload.path, upload.file_hash
+
+                    # File yang sudah pernah disimpan tidak di-OCR ulang
+                    if file_hash in seen_hashes:
+                        flash(f"File '{filename}' sama dengan file lain dalam unggahan ini dan dilewati.", 'info')
+                        continue
+                    seen_hashes.add(file_hash)
+                    existing = SuratMasuk.find_by_file_hash(file_hash)
+                    if existing is not None:
+                        logger.info(f"Skipping OCR for {filename}: same file as surat masuk #{existing.id_suratMasuk}")
+                        duplicates.append(surat_masuk_to_extracted_data(existing, filename, upload.filename))
+                        continue
                     
-                    if extracted_data:
-                        extracted_data['filename'] = filename
-                        extracted_data_list.append(extracted_data)
-                        image_paths.append(f'/static/ocr/surat_masuk/{filename}')
-                        processed_files += 1
-                    else:
-                        flash(f"Tidak ada data yang diekstrak dari file: {filename}", 'warning')
+                    # OCR dijalankan di background; request langsung kembali dengan job ID
+                    job_ids.append(job_queue.submit(
+                        'surat_masuk', run_surat_masuk_ocr_job, file_path, filename,
+                        metadata_only=metadata_only, file_hash=file_hash,
+                        owner_id=current_user.id, label=filename
+                    ))
                         
+                except UploadError as e:
+                    flash(str(e), 'error')
                 except Exception as e:
-                    logger.error(f"Error processing file {filename}: {str(e)}")
+                    logger.error(f"Error queueing file {filename}: {str(e)}")
                     flash(f"Terjadi kesalahan saat memproses file {filename}", 'error')
             
-            # Simpan batch results ke database
-            if extracted_data_list:
-                saved_count = save_batch_results_to_db_surat_masuk(extracted_data_list)
-                if saved_count > 0:
-                    flash(f"Berhasil memproses {saved_count} dokumen", 'success')
-                # Jangan redirect, render_template agar tombol extracted data muncul
-                return render_template('ocr/ocr_surat_masuk.html', 
-                                      extracted_data_list=extracted_data_list, 
-                                      image_paths=image_paths,
-                                      currentIndex=0)
-            
-            return render_template('ocr/ocr_surat_masuk.html', 
-                                   extracted_data_list=extracted_data_list, 
-                                   image_paths=image_paths,
-                                   currentIndex=0)
+            for item in duplicates:
+                flash(f"File '{item['filename']}' sudah tersimpan sebagai surat masuk #{item['duplicate_of']}; OCR dilewati.", 'info')
+            if not job_ids:
+                # Semua file sudah pernah disimpan: tampilkan data yang ada tanpa menunggu job
+                return render_ocr_surat_masuk(
+                    extracted_data_list=duplicates,
+                    image_paths=[item['image_path'] for item in duplicates]
+                )
+            return redirect(url_for('ocr_surat_masuk.ocr_surat_masuk', jobs=','.join(job_ids)))
         
+        # GET dengan ?jobs=...: tampilkan progres atau hasil job OCR
+        job_ids = parse_job_ids(request.args.get('jobs'))
+        if job_ids:
+            results, failures, pending = collect_job_results(job_ids, owner_id=current_user.id)
+            if pending:
+                return render_ocr_surat_masuk(pending_jobs=job_ids)
+            for label, error in failures:
+                flash(f"Tidak ada data yang diekstrak dari file: {label}", 'warning')
+            for item in results:
+                if item.get('duplicate_of'):
+                    flash(f"File '{item['filename']}' sudah tersimpan sebagai surat masuk #{item['duplicate_of']}.", 'info')
+                elif item.get('similar_to'):
+                    flash(f"File '{item['filename']}' mirip dengan surat masuk #{item['similar_to']} yang sudah tersimpan "
+                          f"(kemungkinan scan ulang), jadi belum disimpan. Klik 'Simpan Data' jika ini surat yang berbeda.",
+                          'warning')
+            saved_count = sum(1 for item in results if item.get('saved'))
+            if saved_count > 0:
+                flash(f"Berhasil memproses {saved_count} dokumen", 'success')
+            return render_ocr_surat_masuk(
+                extracted_data_list=results,
+                image_paths=[item['image_path'] for item in results]
+            )
+
         # Untuk GET request, tampilkan halaman kosong
-        return render_template('ocr/ocr_surat_masuk.html', 
-                               extracted_data_list=[], 
-                               image_paths=[],
-                               currentIndex=0)
+        return render_ocr_surat_masuk()
                                
     except Exception as e:
         logger.error(f"Error in ocr_surat_masuk: {str(e)}")
         flash("Terjadi kesalahan sistem", 'error')
-        return render_template('ocr/ocr_surat_masuk.html', 
-                               extracted_data_list=[], 
-                               image_paths=[],
-                               currentIndex=0)
+        return render_ocr_surat_masuk()
+
+@ocr_surat_masuk_bp.route('/ocr_jobs')
+@login_required
+@role_required('admin', 'pimpinan')
+def ocr_surat_masuk_jobs():
+    """Status job OCR untuk polling dari halaman upload (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get('ids'))
+    return jsonify(job_status_payload(job_ids, owner_id=current_user.id))
+
+@ocr_surat_masuk_bp.route('/ocr_jobs/stream')
+@login_required
+@role_required('admin', 'pimpinan')
+def ocr_surat_masuk_job_stream():
+    """Server-Sent Events progres OCR per file (?ids=a,b,c)"""
+    job_ids = parse_job_ids(request.args.get('ids'))
+    return job_event_response(job_ids, owner_id=current_user.id)
 
 @ocr_surat_masuk_bp.route('/surat_masuk_image/<int:id>')
 @login_required
 def surat_masuk_image(id):
     surat = SuratMasuk.query.get_or_404(id)
-    return send_file(io.BytesIO(surat.gambar_suratMasuk), mimetype='image/png')
+    response = send_blob(surat.gambar_blob_suratMasuk, surat.gambar_suratMasuk)
+    if response is None:
+        # Surat tanpa gambar terpisah: tampilkan file aslinya
+        response = send_blob(surat.file_blob_suratMasuk, surat.file_suratMasuk)
+    if response is None:
+        abort(404)
+    return response
 
 @ocr_surat_masuk_bp.route('/test_endpoint', methods=['GET', 'POST'])
 @login_required
@@ -657,6 +781,8 @@ def save_extracted_data():
                 edited_isi = item.get('isi_suratMasuk', '')
                 ocr_accuracy = calculate_ocr_accuracy(initial_isi, edited_isi)
 
+                # File yang sudah masuk blob store direferensikan dari baris surat
+                blob_ref = get_blob_store().ref(item.get('file_hash'))
                 surat_masuk = SuratMasuk(
                     tanggal_suratMasuk=tanggal_obj,
                     pengirim_suratMasuk=item.get('pengirim_suratMasuk', 'Not found'),
@@ -674,7 +800,11 @@ def save_extracted_data():
                     initial_pengirim_suratMasuk=item.get('pengirim_suratMasuk', 'Not found'),
                     initial_penerima_suratMasuk=item.get('penerima_suratMasuk', 'Not found'),
                     initial_isi_suratMasuk=item.get('isi_suratMasuk', 'Not found'),
-                    ocr_accuracy_suratMasuk=ocr_accuracy
+                    ocr_accuracy_suratMasuk=ocr_accuracy,
+                    file_hash=item.get('file_hash') or None,
+                    phash=item.get('phash') or None,
+                    gambar_blob_suratMasuk=blob_ref,
+                    file_blob_suratMasuk=blob_ref
                 )
 
                 # Simpan ke database
@@ -4,112 +4,135 @@ OCR Text Post-Processor untuk Surat Masuk
 Module untuk memperbaiki hasil OCR yang terpotong-potong dan tidak akurat
 """
 
+import json
+import os
 import re
+from functools import cached_property
 from typing import Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+OCR_CORRECTIONS_PATH = os.environ.get(
+    'OCR_CORRECTIONS_PATH', os.path.join(os.path.dirname(__file__), 'data', 'ocr_corrections.json')
+)
+
+# Pola penggabungan kata terpotong, contoh: "per moh onan" -> "permohonan"
+SPLIT_WORD_PATTERNS = (
+    re.compile(r'\b(\w{2,3})\s+(\w{2,3})\s+(\w{2,3})\b'),
+    re.compile(r'\b(\w{3,4})\s+(\w{3,4})\b'),
+)
+
+# Kata-kata valid yang sering terpotong
+VALID_MERGED_WORDS = frozenset([
+    'permohonan', 'pengadilan', 'mahkamah', 'republik', 'indonesia',
+    'berkenaan', 'dengan', 'terhormat', 'perhatian', 'disampaikan',
+    'menghadiri', 'demikian', 'wassalam', 'alaikum', 'virtual',
+    'sekretaris', 'panitera', 'bismillah', 'assalamualaikum'
+])
+
+
+def load_corrections(path=None):
+    """Tabel perbaikan OCR (frasa salah -> frasa benar) dari file JSON"""
+    path = path or OCR_CORRECTIONS_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"OCR correction table {path} could not be loaded: {str(e)}")
+        return {}
+
+
+def _trie_regex(phrases):
+    """
+    Regex berbentuk trie dari daftar frasa: awalan yang sama hanya dicocokkan
+    sekali, sehingga biaya per posisi teks tidak tumbuh dengan jumlah frasa.
+    Cabang yang lebih panjang dicoba dulu (match terpanjang menang).
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(
+            (char, child) for char, child in node.items() if char is not None
+        )]
+        if not branches:
+            return ''
+        group = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if None in node:
+            return '(?:' + group + ')?'
+        return group
+
+    return build(trie)
+
+
+class PhraseReplacer:
+    """
+    Terapkan tabel perbaikan (frasa -> pengganti) dengan hasil yang sama persis
+    seperti ``re.sub`` case-insensitive per entri sesuai urutan tabel, termasuk
+    teks yang baru terbentuk oleh penggantian sebelumnya (mis. "ter hormatkami"
+    -> "terhormatkami" -> "terhormat kami").
+
+    Satu regex trie dari semua frasa mencari frasa mana saja yang ada di teks;
+    hanya entri itu yang dijalankan, dan daftarnya dihitung ulang setiap kali
+    teks berubah. Biaya per teks bergantung pada jumlah perbaikan yang terjadi,
+    bukan ukuran tabel.
+    """
+
+    def __init__(self, replacements: Dict[str, str]):
+        self.entries = [
+            (re.compile(re.escape(phrase), re.IGNORECASE), replacement, phrase.lower())
+            for phrase, replacement in replacements.items() if phrase
+        ]
+        keys = {key for _, _, key in self.entries}
+        self.detector = None
+        if keys:
+            # Lookahead: frasa terpanjang di setiap posisi, termasuk yang tumpang tindih
+            self.detector = re.compile('(?=(' + _trie_regex(keys) + '))', re.IGNORECASE)
+        # Frasa yang merupakan awalan frasa lain ikut ada di posisi yang sama
+        self._prefixes = {
+            key: frozenset(key[:end] for end in range(1, len(key) + 1) if key[:end] in keys)
+            for key in keys
+        }
+
+    def _key(self, matched: str) -> str:
+        key = matched.lower()
+        if key not in self._prefixes:
+            # Case folding regex berbeda dari str.lower() (mis. huruf Turki)
+            key = next(
+                phrase for phrase in self._prefixes
+                if re.fullmatch(re.escape(phrase), matched, re.IGNORECASE)
+            )
+        return key
+
+    def _present(self, text: str) -> set:
+        present = set()
+        for match in self.detector.finditer(text):
+            present |= self._prefixes[self._key(match.group(1))]
+        return present
+
+    def sub(self, text: str) -> str:
+        if self.detector is None or not text:
+            return text
+        present = self._present(text)
+        for pattern, replacement, key in self.entries:
+            if not present:
+                break
+            if key not in present:
+                continue
+            replaced = pattern.sub(replacement, text)
+            if replaced != text:
+                text = replaced
+                present = self._present(text)
+        return text
+
+
 class OCRTextProcessor:
     def __init__(self):
-        # Dictionary untuk perbaikan kata-kata umum dalam surat resmi
-        self.word_corrections = {
-            # Kata-kata yang sering terpotong dalam OCR
-            'permoh onan': 'permohonan',
-            'permoh nan': 'permohonan',
-            'per mohonan': 'permohonan',
-            'per moh onan': 'permohonan',
-            'sidang secara vir tual': 'sidang secara virtual',
-            'vir tual': 'virtual',
-            'vir tu al': 'virtual',
-            'vir-tual': 'virtual',
-            'peng adilan': 'pengadilan',
-            'pen gadilan': 'pengadilan',
-            'penga dilan': 'pengadilan',
-            'mah kamah': 'mahkamah',
-            'mah ka mah': 'mahkamah',
-            'ma hkamah': 'mahkamah',
-            'agung republik': 'agung republik',
-            'repub lik': 'republik',
-            'repu blik': 'republik',
-            'indo nesia': 'indonesia',
-            'indone sia': 'indonesia',
-            'ber kenaan': 'berkenaan',
-            'ber ke naan': 'berkenaan',
-            'berke naan': 'berkenaan',
-            'den gan': 'dengan',
-            'de ngan': 'dengan',
-            'ter hormat': 'terhormat',
-            'ter hor mat': 'terhormat',
-            'terhor mat': 'terhormat',
-            'atas per hatian': 'atas perhatian',
-            'per hatian': 'perhatian',
-            'perha tian': 'perhatian',
-            'per ha tian': 'perhatian',
-            'disa mpaikan': 'disampaikan',
-            'disam paikan': 'disampaikan',
-            'di sampaikan': 'disampaikan',
-            'meng hadiri': 'menghadiri',
-            'meng ha diri': 'menghadiri',
-            'mengha diri': 'menghadiri',
-            'aca ra': 'acara',
-            'ac ara': 'acara',
-            'tem pat': 'tempat',
-            'tem-pat': 'tempat',
-            'wak tu': 'waktu',
-            'wak-tu': 'waktu',
-            'tang gal': 'tanggal',
-            'tang-gal': 'tanggal',
-            'tan ggal': 'tanggal',
-            'jam': 'jam',
-            'puk ul': 'pukul',
-            'pu kul': 'pukul',
-            'wib': 'WIB',
-            'wita': 'WITA',
-            'wit': 'WIT',
-            'demi kian': 'demikian',
-            'demi ki an': 'demikian',
-            'demiki an': 'demikian',
-            'sam paikan': 'sampaikan',
-            'samp aikan': 'sampaikan',
-            'terima kasih': 'terima kasih',
-            'teri ma kasih': 'terima kasih',
-            'terimaka sih': 'terima kasih',
-            'hormat kami': 'hormat kami',
-            'hor mat kami': 'hormat kami',
-            'hormatkami': 'hormat kami',
-            'wasser lam': 'wassalam',
-            'wasser-lam': 'wassalam',
-            'was salam': 'wassalam',
-            'alaiku m': 'alaikum',
-            'alai kum': 'alaikum',
-            'sala mu': 'salamu',
-            'sala-mu': 'salamu',
-        }
-        
-        # Pattern untuk kata-kata yang sering salah dalam konteks hukum
-        self.legal_terms = {
-            'peng adilan agama': 'Pengadilan Agama',
-            'pen gadilan agama': 'Pengadilan Agama',
-            'penga dilan agama': 'Pengadilan Agama',
-            'mah kamah agung': 'Mahkamah Agung',
-            'mah ka mah agung': 'Mahkamah Agung',
-            'ma hkamah agung': 'Mahkamah Agung',
-            'ketua pengadilan': 'Ketua Pengadilan',
-            'ke tua pengadilan': 'Ketua Pengadilan',
-            'pani tera': 'Panitera',
-            'pani-tera': 'Panitera',
-            'pan itera': 'Panitera',
-            'sekre taris': 'Sekretaris',
-            'sekreta ris': 'Sekretaris',
-            'sek retaris': 'Sekretaris',
-            'hakim': 'Hakim',
-            'ha kim': 'Hakim',
-            'juru sita': 'Juru Sita',
-            'juru-sita': 'Juru Sita',
-            'jurusita': 'Juru Sita',
-        }
-        
         # Pattern untuk nomor surat yang sering salah
         self.number_patterns = [
             (r'(\d+)\s*/\s*([A-Z]+)\s*/\s*(\d+)', r'\1/\2/\3'),  # Format nomor surat
@@ -125,6 +148,29 @@ class OCRTextProcessor:
             'bismillah', 'assalamualaikum', 'wassalamualaikum', 'wib', 'wita', 'wit'
         ]
 
+    # Tabel perbaikan kata terpotong dan istilah hukum dari file data, masing-masing
+    # dibungkus PhraseReplacer; dimuat saat pertama dipakai, bukan saat import
+
+    @cached_property
+    def _corrections(self):
+        return load_corrections()
+
+    @cached_property
+    def word_corrections(self):
+        return self._corrections.get('word_corrections', {})
+
+    @cached_property
+    def legal_terms(self):
+        return self._corrections.get('legal_terms', {})
+
+    @cached_property
+    def word_replacer(self):
+        return PhraseReplacer(self.word_corrections)
+
+    @cached_property
+    def legal_replacer(self):
+        return PhraseReplacer(self.legal_terms)
+
     def clean_ocr_text(self, text: str) -> str:
         """
         Membersihkan dan memperbaiki teks hasil OCR
@@ -170,21 +216,13 @@ class OCRTextProcessor:
         # Convert to lowercase untuk matching
         text_lower = text.lower()
         
-        # Apply word corrections
-        for broken_word, correct_word in self.word_corrections.items():
-            # Case insensitive replacement
-            pattern = re.escape(broken_word)
-            text_lower = re.sub(pattern, correct_word, text_lower, flags=re.IGNORECASE)
+        # Apply word corrections (hanya entri yang ada di teks)
+        text_lower = self.word_replacer.sub(text_lower)
         
         # Perbaiki pola umum spasi berlebihan dalam kata
         # Contoh: "per moh onan" -> "permohonan"
-        common_patterns = [
-            (r'\b(\w{2,3})\s+(\w{2,3})\s+(\w{2,3})\b', self._merge_if_valid),
-            (r'\b(\w{3,4})\s+(\w{3,4})\b', self._merge_if_valid),
-        ]
-        
-        for pattern, handler in common_patterns:
-            text_lower = re.sub(pattern, handler, text_lower)
+        for pattern in SPLIT_WORD_PATTERNS:
+            text_lower = pattern.sub(self._merge_if_valid, text_lower)
         
         return text_lower
 
@@ -193,15 +231,7 @@ class OCRTextProcessor:
         parts = match.groups()
         merged = ''.join(parts)
         
-        # Daftar kata-kata valid yang sering terpotong
-        valid_merged_words = [
-            'permohonan', 'pengadilan', 'mahkamah', 'republik', 'indonesia',
-            'berkenaan', 'dengan', 'terhormat', 'perhatian', 'disampaikan',
-            'menghadiri', 'demikian', 'wassalam', 'alaikum', 'virtual',
-            'sekretaris', 'panitera', 'bismillah', 'assalamualaikum'
-        ]
-        
-        if merged.lower() in valid_merged_words:
+        if merged.lower() in VALID_MERGED_WORDS:
             return merged
         
         # Jika tidak valid, kembalikan dengan spasi yang diperbaiki
@@ -209,11 +239,7 @@ class OCRTextProcessor:
 
     def _fix_legal_terms(self, text: str) -> str:
         """Perbaiki istilah-istilah hukum"""
-        for broken_term, correct_term in self.legal_terms.items():
-            pattern = re.escape(broken_term)
-            text = re.sub(pattern, correct_term, text, flags=re.IGNORECASE)
-        
-        return text
+        return self.legal_replacer.sub(text)
 
     def _fix_number_formats(self, text: str) -> str:
         """Perbaiki format nomor surat dan tanggal"""
@@ -0,0 +1,197 @@
+"""
+OCR Timing
+==========
+Instrumentasi waktu per tahap pipeline OCR (load gambar, preprocessing,
+setiap konfigurasi Tesseract, pembersihan teks, ekstraksi field, dll.).
+
+Satu dokumen diukur dalam ``trace(pipeline)``; setiap tahap dibungkus
+``span(stage)`` (context manager) atau ``@timed(stage)`` (decorator).
+Hasilnya dict ``tahap -> ms`` yang dilampirkan ke hasil ekstraksi dan
+diakumulasi ke histogram per tahap (per proses) untuk endpoint admin.
+
+Jika ``OCR_TIMING_ENABLED`` mati, ``trace`` tidak memasang apa pun dan
+``span`` hanya mengembalikan context manager kosong bersama.
+"""
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from functools import wraps
+
+OCR_TIMING_ENABLED = os.environ.get('OCR_TIMING_ENABLED', '0').lower() not in ('0', 'false', 'no')
+
+# Batas atas bucket histogram (ms); bucket terakhir menampung sisanya
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_local = threading.local()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Trace:
+    """Waktu per tahap (ms) untuk satu dokumen; tahap yang berulang dijumlahkan"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, elapsed_ms):
+        # Tahap dari thread pool (mis. config Tesseract paralel) menulis ke trace yang sama
+        with self._lock:
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + elapsed_ms, 2)
+
+
+class _Span:
+    __slots__ = ('trace', 'stage', 'start')
+
+    def __init__(self, trace, stage):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add(self.stage, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def span(stage):
+    """Ukur satu tahap pada trace aktif di thread ini (no-op tanpa trace)"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, stage)
+
+
+def timed(stage):
+    """Decorator: seluruh pemanggilan fungsi diukur sebagai ``stage``"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, 'trace', None)
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def active():
+    """True jika ada trace aktif di thread ini"""
+    return getattr(_local, 'trace', None) is not None
+
+
+def add_substages(stage, timings):
+    """Tambahkan waktu yang sudah diukur sendiri (mis. langkah preprocessing) sebagai ``stage.nama``"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None or not timings:
+        return
+    for name, elapsed_ms in timings.items():
+        trace.add(f"{stage}.{name}", elapsed_ms)
+
+
+def bind(func):
+    """
+    Bungkus ``func`` agar span di dalamnya tercatat ke trace pemanggil, untuk
+    fungsi yang dijalankan di thread lain (ThreadPoolExecutor).
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return func
+
+    @wraps(func)
+    def bound(*args, **kwargs):
+        previous = getattr(_local, 'trace', None)
+        _local.trace = trace
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.trace = previous
+    return bound
+
+
+@contextlib.contextmanager
+def trace(pipeline):
+    """
+    Ukur satu dokumen pada ``pipeline``. Menghasilkan dict timings (terisi
+    sampai blok selesai, termasuk 'total'), atau None jika timing mati.
+    """
+    if not OCR_TIMING_ENABLED:
+        yield None
+        return
+    previous = getattr(_local, 'trace', None)
+    current = Trace(pipeline)
+    _local.trace = current
+    start = time.perf_counter()
+    try:
+        yield current.timings
+    finally:
+        _local.trace = previous
+        current.add('total', (time.perf_counter() - start) * 1000)
+        stage_histograms.record(pipeline, current.timings)
+
+
+class StageHistograms:
+    """Histogram waktu per (pipeline, tahap) dengan bucket tetap; aman untuk banyak thread"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, pipeline, timings):
+        with self._lock:
+            for stage, elapsed_ms in timings.items():
+                entry = self._stages.get((pipeline, stage))
+                if entry is None:
+                    entry = self._stages[(pipeline, stage)] = {
+                        'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0, 'counts': [0] * (len(self.buckets) + 1),
+                    }
+                entry['count'] += 1
+                entry['sum_ms'] += elapsed_ms
+                entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+                entry['counts'][bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+
+    def _quantile(self, counts, total, q):
+        """Perkiraan kuantil: batas atas bucket tempat kuantil jatuh"""
+        target = q * total
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= target:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def snapshot(self):
+        """dict pipeline -> tahap -> statistik (count, mean, p50/p95 perkiraan, max, bucket)"""
+        with self._lock:
+            entries = {key: dict(value, counts=list(value['counts'])) for key, value in self._stages.items()}
+        result = {}
+        for (pipeline, stage), entry in sorted(entries.items()):
+            count = entry['count']
+            result.setdefault(pipeline, {})[stage] = {
+                'count': count,
+                'mean_ms': round(entry['sum_ms'] / count, 2),
+                'p50_ms': self._quantile(entry['counts'], count, 0.5),
+                'p95_ms': self._quantile(entry['counts'], count, 0.95),
+                'max_ms': round(entry['max_ms'], 2),
+                'buckets': {
+                    (f"le_{bound}" if index < len(self.buckets) else 'inf'): bucket_count
+                    for index, (bound, bucket_count) in enumerate(
+                        zip(self.buckets + (None,), entry['counts'])
+                    )
+                },
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+stage_histograms = StageHistograms()
@@ -2,14 +2,24 @@ import os
 import re
 import json
 import hashlib
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from difflib import SequenceMatcher
+from functools import lru_cache
 import logging
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
 from datetime import datetime
+from config import ocr_engine, ocr_timing
+from config.ocr_cache import get_ocr_cache, make_cache_key
+from config.ocr_jobs import JOB_OCR, JOB_PREPROCESSING, report_job_stage
+from config.ocr_lexicon import get_lexicon, segment_word
+from config.ocr_preprocess import (
+    OCR_PREPROCESS_STEPS, crop_margins, estimate_dpi, load_image_for_ocr, normalize_dpi, opencv_support,
+    preprocess_array
+)
+from config.ocr_text_processor import ocr_processor
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def normalize_ocr_text(text):
@@ -24,6 +34,7 @@ def normalize_ocr_text(text):
     # Collapse multiple spaces only
     return re.sub(r' {2,}', ' ', text)
 
+@ocr_timing.timed('clean_text')
 def clean_text(text):
     """
     Clean up OCR output text for better pattern matching
@@ -39,21 +50,37 @@ def clean_text(text):
         cleaned_lines.append(cleaned_line)
     return '\n'.join(cleaned_lines)
 
+HASH_CHUNK_SIZE = 65536
+
+def new_content_hasher():
+    """Hash isi file (BLAKE2b-256): key cache OCR dan kolom file_hash surat"""
+    return hashlib.blake2b(digest_size=32)
+
+@ocr_timing.timed('hash')
 def calculate_file_hash(file_path):
-    hasher = hashlib.md5()
+    hasher = new_content_hasher()
     with open(file_path, 'rb') as f:
-        for buf in iter(lambda: f.read(65536), b""):
+        for buf in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
             hasher.update(buf)
     return hasher.hexdigest()
 
+def calculate_bytes_hash(data):
+    """Hash yang sama dengan calculate_file_hash, untuk isi file yang tersimpan sebagai blob"""
+    hasher = new_content_hasher()
+    view = memoryview(data)
+    for start in range(0, len(view), HASH_CHUNK_SIZE):
+        hasher.update(view[start:start + HASH_CHUNK_SIZE])
+    return hasher.hexdigest()
+
 def load_dictionary():
     json_path = os.path.join('static', 'assets', 'js', 'utils', 'dictionary.json')
     with open(json_path, 'r') as f:
         return json.load(f)
 
-dictionary = load_dictionary()
-indonesian_months = dictionary.get('indonesian_months', [])
-pengirim_keywords = dictionary.get('pengirim_keywords', [])
+@lru_cache(maxsize=None)
+def get_dictionary():
+    """dictionary.json, dibaca sekali saat pertama dibutuhkan (bukan saat import)"""
+    return load_dictionary()
 
 def parse_date_to_ddmmyyyy(date_str):
     """
@@ -171,14 +198,15 @@ def convert_indonesian_date_to_datetime(date_str):
         print(f"Error converting date: {e}")
         return None
 
+def _extract_field(text, field):
+    """Satu field lewat engine ekstraksi di ocr_fields"""
+    # Import di sini: ocr_fields memakai helper normalisasi dari modul ini
+    from config.ocr_fields import extract_fields
+    return extract_fields(text, (field,))[field]
+
 def extract_tanggal(text):
-    dates = extract_dates(text)
-    if dates and dates[0] != 'Not found':
-        # Try to convert the first date found
-        date_obj = convert_indonesian_date_to_datetime(dates[0])
-        if date_obj:
-            return date_obj.strftime('%Y-%m-%d')
-    return 'Not found'
+    """Tanggal surat (YYYY-MM-DD) dari tanggal pertama di teks"""
+    return _extract_field(text, 'tanggal')
 
 def normalize_case(text):
     """
@@ -245,30 +273,8 @@ def normalize_recipient_text(text):
     return normalize_case(text)
 
 def extract_penerima_surat_keluar(text):
-    """
-    Extract recipient (penerima) from OCR text for incoming letters
-    Only take up to the first newline or known stopwords after 'Yth.' or 'Kepada Yth.'
-    """
-    # Look for text after "Yth." up to newline, "di tempat", "Assalamualaikum", or "Dengan hormat"
-    yth_patterns = [
-        r'Yth\.?\s*(.*?)(?:\n|di\s+tempat|Assalamualaikum|Dengan hormat)',
-        r'Kepada\s+Yth\.?\s*(.*?)(?:\n|di\s+tempat|Assalamualaikum|Dengan hormat)',
-    ]
-    
-    for pattern in yth_patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if match:
-            # Extract the full recipient text
-            recipient_text = match.group(1).strip()
-            # Only take up to the first newline if present
-            recipient_text = recipient_text.split('\n')[0].strip()
-            # Clean up any extra spaces and remove "di tempat" if it appears at the end
-            recipient_text = re.sub(r'\s+', ' ', recipient_text)
-            recipient_text = re.sub(r'di\s*tempat\s*$', '', recipient_text, flags=re.IGNORECASE).strip()
-            # Normalize the recipient text
-            recipient = normalize_recipient_text(recipient_text)
-            return recipient
-    return "Not found"
+    """Penerima surat setelah 'Yth.' atau 'Kepada Yth.'"""
+    return _extract_field(text, 'penerima')
 
 def extract_penerima_surat_masuk(text):
     """
@@ -278,160 +284,28 @@ def extract_penerima_surat_masuk(text):
     return extract_penerima_surat_keluar(text)
 
 def extract_pengirim(text):
+    """Pengirim dari kata kunci dictionary (dicari dari bawah), lalu pola Dari/Pengirim/Nama"""
+    return _extract_field(text, 'pengirim')
+
+def word_breaker(text, lexicon=None, min_word_len=4):
     """
-    Extract pengirim from text using dictionary keywords, searching from bottom to top
+    Pecah kata OCR yang menempel (mis. "menerimapraktekkerja") menjadi kata
+    leksikon dengan segmentasi Viterbi. Hanya kata panjang yang tidak dikenal
+    yang dipecah, dan hanya jika semua bagiannya kata yang dikenal.
     """
-    # Load dictionary
-    dictionary = load_dictionary()
-    pengirim_keywords = dictionary.get('pengirim_keywords', [])
-    
-    logger.debug(f"Extracting pengirim from text with {len(pengirim_keywords)} keywords")
-    logger.debug(f"Keywords: {pengirim_keywords}")
-    
-    # Split text into lines and reverse to search from bottom to top
-    lines = text.split('\n')
-    lines.reverse()  # Search from bottom to top
-    
-    logger.debug(f"Searching through {len(lines)} lines from bottom to top")
-    
-    # First, try to find exact matches with keywords
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-            
-        logger.debug(f"Checking line {len(lines) - i}: '{line}'")
-        
-        # Check if line contains any pengirim keyword
-        for keyword in pengirim_keywords:
-            if keyword.lower() in line.lower():
-                # Clean up the line and normalize case
-                cleaned_line = re.sub(r'[^\w\s]', ' ', line)  # Remove special characters
-                cleaned_line = re.sub(r'\s+', ' ', cleaned_line).strip()  # Normalize spaces
-                
-                normalized_line = normalize_case(cleaned_line)
-                logger.debug(f"Found pengirim keyword '{keyword}' in line: '{normalized_line}'")
-                return normalized_line
-    
-    # If no exact keyword match found, try pattern matching
-    logger.debug("No keyword match found, trying pattern matching")
-    patterns = [
-        r'Dari\s*:\s*([^\n]+)',
-        r'Pengirim\s*:\s*([^\n]+)',
-        r'Yang\s*[Bb]ersangkutan\s*:\s*([^\n]+)',
-        r'(?:Nama|Penulis)\s*[:\-]?\s*([A-Z\s]+)',
-        r'Perihal\s*[:\-]?\s*([^\n]+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-        if match:
-            # Bersihkan dan saring teks pengirim
-            pengirim = match.group(1).strip()
-            
-            # Filter untuk menghindari kata kunci yang tidak relevan
-            if not any(irrelevant in pengirim.lower() for irrelevant in ['assalamu', 'dengan', 'hormat']):
-                normalized_pengirim = normalize_case(pengirim)
-                logger.debug(f"Found pengirim via pattern '{pattern}': '{normalized_pengirim}'")
-                return normalized_pengirim
-    
-    logger.debug("No pengirim found, returning 'Not found'")
-    return 'Not found'
-
-# Simple Indonesian wordlist for demonstration (expand as needed)
-INDO_WORDLIST = set([
-    'penyampaian', 'amar', 'putusan', 'banding',
-    'pengadilan', 'agama', 'banjarbaru', 'palangkaraya',
-    'nomor', 'surat', 'kepada', 'yth', 'ketua', 'isi', 'keterangan', 'pengembalian', 'relas', 'dengan', 'hormat',
-    'untuk', 'dapat', 'dipergunakan', 'sebagaimana', 'terima', 'kasih', 'panitera', 'tembusan', 'laporan', 'jalan',
-    'telp', 'sg', 'pengantar', 'tanggal', 'lembar', 'disampaikan', 'johanes', 'kupabin', 'mestinya', 'banjarbaru',
-    'oktober', 'putusan', 'g', 'plk', 'an', 'j', 'p', 'kupa', 'm', 'l', 'a', 'i', 'dan', 'di', 'sebagai', 'no', 'ke',
-    'bisa', 'tidak', 'ada', 'dalam', 'kepada', 'untuk', 'dengan', 'oleh', 'pada', 'sebagai', 'dari', 'ke', 'dan', 'di',
-    'terima', 'kasih', 'laporan', 'pengantar', 'nomor', 'surat', 'tanggal', 'pengadilan', 'agama', 'banjarbaru',
-    'palangkaraya', 'putusan', 'banding', 'amar', 'isi', 'keterangan', 'pengembalian', 'relas', 'disampaikan',
-    'hormat', 'tembusan', 'jalan', 'telp', 'sg', 'no', 'g', 'plk', 'an', 'j', 'p', 'kupa', 'mestinya', 'banjarbaru',
-    'oktober', 'panitera', 'm', 'l', 'a', 'i', 'dan', 'di', 'sebagai', 'no', 'ke', 'pada', 'oleh', 'dari', 'atas',
-    'adalah', 'yang', 'ini', 'itu', 'atau', 'juga', 'karena', 'sudah', 'belum', 'akan', 'bisa', 'tidak', 'ada', 'dalam'
-])
-
-# Tambahkan kata kunci ke INDO_WORDLIST
-INDO_WORDLIST.update(['mohon', 'kesediaan', 'menerima', 'praktek', 'kerja'])
-
-def word_breaker(text, wordlist=INDO_WORDLIST, min_word_len=4):
-    """
-    Breaks a long word into valid Indonesian words using a greedy approach.
-    Only applies if the word is not in wordlist and is long.
-    Only splits if ALL resulting parts are valid words, otherwise returns the original word.
-    """
-    def _break_word(s):
-        s = s.lower()
-        if s in wordlist or len(s) <= min_word_len:
-            return [s]
-        for i in range(len(s), min_word_len, -1):
-            prefix = s[:i]
-            suffix = s[i:]
-            if prefix in wordlist and suffix in wordlist:
-                return [prefix, suffix]
-            if prefix in wordlist:
-                rest = _break_word(suffix)
-                if all(r in wordlist for r in rest):
-                    return [prefix] + rest
-        # If no valid split found, return the original word
-        return [s]
-    
-    words = text.split()
+    lexicon = lexicon or get_lexicon()
+
     result = []
-    for w in words:
-        wl = w.lower()
-        if wl not in wordlist and len(w) > min_word_len+2:
-            # Coba pecah menjadi 2 bagian saja
-            for i in range(min_word_len+1, len(w)-min_word_len):
-                part1 = w[:i]
-                part2 = w[i:]
-                if part1.lower() in wordlist and part2.lower() in wordlist:
-                    result.extend([part1, part2])
-                    break
-            else:
-                result.append(w)
+    for w in text.split():
+        if len(w) > min_word_len + 2 and w.isalpha() and w not in lexicon:
+            result.extend(segment_word(w, lexicon))
         else:
             result.append(w)
     return ' '.join(result)
 
 def extract_isi_suratmasuk(text):
-    """
-    More comprehensive isi surat extraction with multiple patterns
-    Now applies word_breaker to split glued words.
-    """
-    # Prioritized patterns for extracting content
-    patterns = [
-        r"(?:Perihal|Hal|HaI|Ha1|PERIHAL|HAL)\s*[:\-]?\s*(.*?)\n",
-        r"(?:Isi\s*[Ss]urat|Maksud)\s*[:\-]?\s*(.*?)\n",
-        r"Tentang\s*[:\-]?\s*(.*?)\n",
-        r"(?:Di-|Tempat)\s*\n(.*?)\n"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match:
-            isi = match.group(1).strip()
-            # Bersihkan dan filter isi surat
-            if '\n' in isi:
-                isi = isi.split('\n')[0].strip()
-            # Filter untuk menghindari salam atau header
-            if not any(irrelevant in isi.lower() for irrelevant in ['assalamu', 'yth', 'dengan', 'hormat']):
-                normalized_isi = normalize_case(isi)
-                # Apply word breaker
-                normalized_isi = word_breaker(normalized_isi)
-                return normalized_isi
-    # Fallback: Find first meaningful line
-    lines = text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if (len(line.split()) > 3 and 
-            not any(word in line.lower() for word in ["assalamu", "wr.wb", "yth"])):
-            normalized_line = normalize_case(line)
-            normalized_line = word_breaker(normalized_line)
-            return normalized_line
-    return "Not found"
+    """Isi surat dari Perihal/Hal/Maksud/Tentang, atau baris bermakna pertama"""
+    return _extract_field(text, 'isi_suratmasuk')
 
 def split_merged_words(text):
     """
@@ -448,37 +322,8 @@ def split_merged_words(text):
     return text
 
 def extract_isi_suratkeluar(text):
-    # Pola untuk mencari perihal atau isi surat, hanya ambil satu baris setelah kata kunci
-    patterns = [
-        r"perihal\s*[:\-]?\s*(.*?)(?:\n|$)",
-        r"hal\s*[:\-]?\s*(.*?)(?:\n|$)",
-        r"tentang\s*[:\-]?\s*(.*?)(?:\n|$)",
-        r"maksud\s*[:\-]?\s*(.*?)(?:\n|$)"
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            isi = match.group(1).strip()
-            if isi and len(isi) > 3:
-                normalized_isi = normalize_case(isi)
-                # Selalu apply word_breaker agar kata menempel dipisah
-                normalized_isi = word_breaker(normalized_isi)
-                normalized_isi = split_merged_words(normalized_isi)
-                return normalized_isi
-
-    # Jika pola spesifik tidak ditemukan, cari paragraf pertama yang cukup panjang
-    lines = text.splitlines()
-    for line in lines:
-        line = line.strip()
-        # Cari baris yang memiliki lebih dari 10 kata dan bukan salam/header
-        if (len(line.split()) > 10 and 
-            not any(word in line.lower() for word in ['assalamu', 'yth', 'kepada', 'dengan', 'hormat'])):
-            normalized_line = normalize_case(line)
-            normalized_line = word_breaker(normalized_line)
-            normalized_line = split_merged_words(normalized_line)
-            return normalized_line
-
-    return "Not found"
+    """Isi surat dari perihal/hal/tentang/maksud, atau paragraf panjang pertama"""
+    return _extract_field(text, 'isi_suratkeluar')
 
 def calculate_ocr_completeness(data):
     total_fields = 4
@@ -614,210 +459,32 @@ def calculate_overall_ocr_accuracy(surat, prefix):
     return round(total_accuracy / valid_fields, 2)
 
 def extract_nomor_surat(text):
-    """
-    Ekstrak nomor surat dengan regex yang lebih fleksibel.
-    Menangkap format seperti:
-    - Nomor: 123/ABC/2024
-    - Nomor 123/ABC/2024
-    - Nomor. 123/ABC/2024
-    - Nomor 1.040/PR/A4/L191118/5/2024
-    """
-    patterns = [
-        r'(?:Nomor|No|Nomer|NOMOR|NO|N0|Nomar|Nomur|Nomot|Nomoe)\s*[:：\.-]?\s*([\w\./-]+)',
-        r'(?:Nomor|No|Nomer|NOMOR|NO|N0|Nomar|Nomur|Nomot|Nomoe)[^\w\d]{0,3}([\w\./-]+)',
-        r'(\d{1,4}/[\w\./-]+/\d{4})',  # fallback: nomor surat umum
-    ]
-    lines = text.splitlines()
-    for line in lines:
-        for pattern in patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-    return 'Not found'
+    """Nomor surat dari baris pertama yang memuat Nomor/No (atau pola xx/.../yyyy)"""
+    return _extract_field(text, 'nomor_surat')
 
 def extract_document_code(text):
-    """
-    Extract document code patterns like HM2.1.4, HK.2.6, etc. from text
-    """
-    # Normalize the text for better pattern matching
-    text = normalize_ocr_text(text)
-    
-    # Look for various document code patterns with flexible spacing
-    code_patterns = [
-        # HM patterns
-        r'(?:\/|\.)([HM]{2}\d+\.\d+\.?\d*)(?:\/|\.)',        # Match HM2.1.4 between separators
-        r'([HM]{2}[\s.-]*\d+[\s.-]*\d+[\s.-]*\d*)',          # Handle spaces or separators in HM code
-        r'(?:\/|\.|\s)([HM]{2}\s*\d+[\s.]*\d+[\s.]*\d*)',    # Even more flexible with spaces
-        
-        # HK patterns (new)
-        r'(?:\/|\.)([HK]{2}\d*\.\d+\.?\d*)(?:\/|\.)',        # Match HK.2.6 between separators
-        r'([HK]{2}[\s.-]*\d*[\s.-]*\d+[\s.-]*\d*)',          # Handle spaces or separators in HK code
-        r'(?:\/|\.|\s)([HK]{2}\s*\d*[\s.]*\d+[\s.]*\d*)',    # Even more flexible with spaces for HK
-        
-        # Generic patterns for any 2-letter code
-        r'(?:\/|\.)([A-Z]{2}\d*\.\d+\.?\d*)(?:\/|\.)',       # Any 2-letter code with numbers
-        r'([A-Z]{2}[\s.-]*\d*[\s.-]*\d+[\s.-]*\d*)',         # Any 2-letter code with flexible separators
-        r'(?:\/|\.|\s)([A-Z]{2}\s*\d*[\s.]*\d+[\s.]*\d*)',   # Any 2-letter code with spaces
-        
-        # Specific patterns for this particular case
-        r'W15-A12\/([A-Z]{2}[0-9.]+\.[0-9]+)',               # Extract after W15-A12/
-        r'[\/\.](?:[A-Z]{2})[.\s-]*(\d*)[.\s-]*(\d+)[.\s-]*(\d*)[\/\.]',  # Extract code parts
-    ]
-    
-    for i, pattern in enumerate(code_patterns):
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            # Clean up the extracted code
-            code = match.group(1).strip()
-            # Normalize the format (remove spaces, standardize separators)
-            code = re.sub(r'\s+', '', code)
-            
-            # If it's a valid document code format, return it
-            if re.match(r'^[A-Z]{2}\d*\.\d+', code, re.IGNORECASE):
-                return code
-    
-    # Look for specific patterns in the text
-    specific_patterns = [
-        r'HK\.\s*(\d+)\.\s*(\d+)',  # HK.2.6 pattern
-        r'HM\s*(\d+)\.\s*(\d+)\.\s*(\d+)',  # HM2.1.4 pattern
-        r'([A-Z]{2})\s*(\d+)\.\s*(\d+)',  # Any 2-letter code with numbers
-    ]
-    
-    for pattern in specific_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-            if len(match.groups()) == 2:  # HK.2.6 format
-                return f"{match.group(1)}.{match.group(2)}"
-            elif len(match.groups()) == 3:  # HM2.1.4 format
-                return f"{match.group(1)}{match.group(2)}.{match.group(3)}"
-    
-    # Last resort: look for any pattern that could be a document code
-    match = re.search(r'[A-Z]{2}\s*\d+', text, re.IGNORECASE)
-    if match:
-        code_text = match.group(0).upper().replace(' ', '')
-        # Try to reconstruct a valid code
-        if len(code_text) >= 4:  # At least 2 letters followed by 2 digits
-            if '.' not in code_text:
-                # Insert dot if missing: HK26 -> HK.2.6
-                parts = re.findall(r'([A-Z]{2})(\d)(\d+)', code_text)
-                if parts:
-                    code_text = f"{parts[0][0]}.{parts[0][1]}.{parts[0][2]}"
-            return code_text
-    
-    # Super-specific patterns for this particular case
-    specific_patterns = [
-        r'[\/\.](?:[A-Z]{2})[.\s-]*(\d*)[.\s-]*(\d+)[.\s-]*(\d*)[\/\.]',  # Extract code parts
-        r'W15-A12\/([A-Z]{2}[0-9.]+\.[0-9]+)',  # Extract after W15-A12/
-    ]
-    for pattern in specific_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match and len(match.groups()) > 0:
-            if len(match.groups()) == 1:
-                return match.groups()[0]
-            elif len(match.groups()) >= 2:  # If we have multiple groups with digits
-                return f"{match.group(1)}.{match.group(2)}.{match.group(3) if match.group(3) else ''}"
-    
-    return 'Not found'  # Return 'Not found' instead of default value
+    """Kode dokumen seperti HM2.1.4, HK.2.6"""
+    return _extract_field(text, 'document_code')
 
 def extract_roman_numeral(text):
-    """
-    Extract roman numerals (I-XII) for months from text
-    """
-    roman_patterns = [
-        r'\/\s*((?:IX|IV|V?I{1,3}|X{1,2}I{0,3}))\s*\/',  # Between slashes: /IX/
-        r'[^A-Z]((?:IX|IV|V?I{1,3}|X{1,2}I{0,3}))[^A-Z]',  # Roman numeral surrounded by non-letters
-        r'([IVX]+)[\s\/.-]*(\d{4})',  # Roman numeral followed by year
-        r'(\d+)[\s\/.-]*([IVX]+)',  # Digits followed by Roman numeral (day and month)
-    ]
-    
-    roman_months = {
-        'I': 'I', 'II': 'II', 'III': 'III', 'IV': 'IV', 
-        'V': 'V', 'VI': 'VI', 'VII': 'VII', 'VIII': 'VIII', 
-        'IX': 'IX', 'X': 'X', 'XI': 'XI', 'XII': 'XII'
-    }
-    
-    # Also handle arabic numerals converted to roman
-    arabic_to_roman = {
-        '1': 'I', '2': 'II', '3': 'III', '4': 'IV', 
-        '5': 'V', '6': 'VI', '7': 'VII', '8': 'VIII', 
-        '9': 'IX', '10': 'X', '11': 'XI', '12': 'XII'
-    }
-    
-    for pattern in roman_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            month = match.group(1).upper()
-            # Check if it's a valid roman numeral for months 1-12
-            if month in roman_months:
-                return month
-            # Check if it's a digit that should be converted to roman
-            elif month in arabic_to_roman:
-                return arabic_to_roman[month]
-    
-    # Look for 1X pattern which often gets misrecognized in OCR
-    match = re.search(r'[/\s.:-](\d{0,1}X)[/\s.:-]', text)
-    if match:
-        value = match.group(1)
-        if value == 'X':
-            return 'X'  # October
-        if value == '1X':
-            return 'IX'  # September
-    
-    return 'Not found'
+    """Bulan dalam angka romawi (I-XII)"""
+    return _extract_field(text, 'roman_numeral')
 
 def extract_acara(text):
-    pattern = r"(?:Acara|acara)\s*[:\-]?\s*(.*?)(?=\n|tempat|tanggal|jam|pukul|$)"
-    match = re.search(pattern, text, flags=re.IGNORECASE)
-    if match:
-        acara = match.group(1).strip()
-        normalized_acara = normalize_case(acara)
-        return normalized_acara
-    return "Not found"
+    """Acara undangan"""
+    return _extract_field(text, 'acara')
 
 def extract_tempat(text):
-    # Pola utama: Mencari "Tempat :" diikuti teks hingga akhir baris
-    pattern_main = r"Tempat\s*:\s*(.*?)\n"
-    match = re.search(pattern_main, text, flags=re.IGNORECASE)
-    
-    if match:
-        tempat = match.group(1).strip()
-        
-        # Filter khusus untuk menghindari salam
-        if not any(salam in tempat for salam in ["Assalamu", "Wassalamu", "Warahmatullahi"]):
-            normalized_tempat = normalize_case(tempat)
-            return normalized_tempat
-    
-    pattern_alt1 = r"Tempat\s*:?\s*(.*?)\n"
-    match_alt1 = re.search(pattern_alt1, text, flags=re.IGNORECASE)
-    if match_alt1:
-        tempat = match_alt1.group(1).strip()
-        if not any(salam in tempat for salam in ["Assalamu", "Wassalamu", "Warahmatullahi"]):
-            normalized_tempat = normalize_case(tempat)
-            return normalized_tempat
-    
-    pattern_alt2 = r"(?:Tempat|tempat|lokasi)\s*[:\-]?\s*(.*?)(?=\n|$|Hari|Tanggal|Pukul|Jam)"
-    match_alt2 = re.search(pattern_alt2, text, flags=re.IGNORECASE)
-    if match_alt2:
-        tempat = match_alt2.group(1).strip()
-        if not any(salam in tempat for salam in ["Assalamu", "Wassalamu", "Warahmatullahi"]):
-            normalized_tempat = normalize_case(tempat)
-            return normalized_tempat
-    
-    return "Not found"
+    """Tempat acara"""
+    return _extract_field(text, 'tempat')
 
 def extract_tanggal_acara(text):
-    pattern = r"(?:Tanggal Acara|Tanggal|tanggal acara|tgl)\s*[:\-]?\s*(.*?)(?=\n|jam|pukul|$)"
-    match = re.search(pattern, text, flags=re.IGNORECASE)
-    if match:
-        tanggal = match.group(1).strip()
-        normalized_tanggal = normalize_case(tanggal)
-        return normalized_tanggal
-    return "Not found"
+    """Tanggal acara (teks apa adanya)"""
+    return _extract_field(text, 'tanggal_acara')
 
 def extract_jam(text):
-    pattern = r"(?:Pukul|Jam|Waktu)\s*[:\-]?\s*(\d{1,2}[.:]\d{2})"
-    match = re.search(pattern, text, flags=re.IGNORECASE)
-    return match.group(1).strip() if match else "Not found"
+    """Jam acara (HH.MM / HH:MM)"""
+    return _extract_field(text, 'jam')
 
 # Fungsi baru untuk deteksi formulir cuti
 def is_formulir_cuti(text):
@@ -847,52 +514,232 @@ def extract_formulir_cuti_data(text):
         'jenis_cuti': normalize_case(jenis_cuti.group(1).strip()) if jenis_cuti else 'N/A'
     }
 
+# Konfigurasi Tesseract yang berbeda, dijalankan berurutan sesuai prioritas
+OCR_CONFIGS = [
+    r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789/.,:-',  # Default
+    r'--oem 3 --psm 11',  # Sparse text. Find as much text as possible
+    r'--oem 3 --psm 3',   # Fully automatic page segmentation
+    r'--oem 3 --psm 1',   # Automatic page segmentation with OSD
+]
+
+# Backend preprocessing: 'opencv' (pipeline NumPy) atau 'pil' (jalur lama)
+OCR_PREPROCESS_BACKEND = os.environ.get('OCR_PREPROCESS_BACKEND', 'opencv').lower()
+
+def uses_opencv_pipeline():
+    """True jika preprocessing memakai pipeline NumPy/OpenCV"""
+    return OCR_PREPROCESS_BACKEND == 'opencv' and opencv_support()
+
+def preprocess_version():
+    """
+    Versi preprocessing untuk kunci cache OCR; naikkan angkanya setiap kali
+    preprocessing berubah. Backend dan urutan langkah pipeline ikut masuk agar
+    konfigurasi berbeda tidak berbagi cache.
+    """
+    return '3:{}'.format(','.join(OCR_PREPROCESS_STEPS) if uses_opencv_pipeline() else 'pil')
+
+# Jumlah maksimum proses Tesseract yang berjalan bersamaan
+OCR_MAX_WORKERS = int(os.environ.get('OCR_MAX_WORKERS', min(len(OCR_CONFIGS), os.cpu_count() or 1)))
+
+# Mode cascade: 'adaptive' berhenti setelah hasil cukup baik, 'all' selalu menjalankan semua config
+OCR_CASCADE_MODE = os.environ.get('OCR_CASCADE_MODE', 'adaptive')
+OCR_CASCADE_MIN_SCORE = float(os.environ.get('OCR_CASCADE_MIN_SCORE', 0.6))
+# File JSON Lines opsional untuk mencatat keputusan cascade (untuk tuning)
+OCR_CASCADE_LOG = os.environ.get('OCR_CASCADE_LOG')
+
+# Pola cepat untuk memeriksa apakah field utama surat sudah terbaca
+CASCADE_KEY_FIELDS = {
+    'nomor': re.compile(r'\b(?:Nomor|Nomer|No|N0)\b\s*[.:：]', re.IGNORECASE),
+    'perihal': re.compile(r'\b(?:Perihal|Hal|HaI|Ha1)\b\s*[:\-]', re.IGNORECASE),
+    'tanggal': re.compile(
+        r'\d{1,2}[\s\-/]*(?:Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|'
+        r'September|Oktober|November|Desember)[\s\-/]*\d{4}|\d{1,2}/\d{1,2}/\d{4}',
+        re.IGNORECASE
+    ),
+}
+
+cascade_stats = Counter()
+_cascade_log_lock = threading.Lock()
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+
+def get_ocr_executor():
+    """
+    Executor bersama untuk menjalankan konfigurasi Tesseract secara paralel.
+    Setiap pemanggilan OCR berjalan di proses tesseract sendiri atau di engine
+    in-process yang melepas GIL, sehingga thread pool cukup untuk membatasi
+    jumlah OCR yang berjalan bersamaan.
+    """
+    global _ocr_executor
+    if _ocr_executor is None:
+        with _ocr_executor_lock:
+            if _ocr_executor is None:
+                _ocr_executor = ThreadPoolExecutor(
+                    max_workers=max(1, OCR_MAX_WORKERS),
+                    thread_name_prefix='ocr-config'
+                )
+    return _ocr_executor
+
 # Preprocessing gambar lebih agresif
+def preprocess_image(image, source_dpi=None, timings=None):
+    """
+    Preprocessing untuk meningkatkan kualitas OCR.
+    Dengan OpenCV, gambar diproses lewat pipeline NumPy (hapus border,
+    normalisasi DPI, denoise, deskew, binarisasi Sauvola); ``timings`` (dict)
+    diisi durasi tiap langkah. Tanpa OpenCV dipakai jalur PIL lama.
+    """
+    source_dpi = source_dpi or estimate_dpi(image)
+    if uses_opencv_pipeline():
+        return preprocess_array(image, source_dpi, timings=timings)
+
+    from PIL import ImageEnhance, ImageFilter
+
+    # Convert to grayscale
+    gray = image.convert('L')
+
+    # Potong margin kosong dan normalisasi DPI efektif
+    gray = crop_margins(gray)
+    gray = normalize_dpi(gray, source_dpi)
+
+    # Optional: Enhance contrast
+    enhancer = ImageEnhance.Contrast(gray)
+    gray = enhancer.enhance(2.5)  # Meningkatkan kontras lebih tinggi
+
+    # Optional: Sharpen image
+    gray = gray.filter(ImageFilter.SHARPEN)
 
-def extract_text_with_multiple_configs(file_path):
+    return gray
+
+@lru_cache(maxsize=None)
+def _config_stage(config):
+    """Nama tahap timing untuk satu config Tesseract, mis. 'tesseract.psm6'"""
+    return f"tesseract.psm{ocr_engine.parse_config(config)[1]}"
+
+def _run_tesseract_config(image, config):
     """
-    Extract text from image using multiple Tesseract configurations
-    with comprehensive logging and debugging
-    """
-    import pytesseract
-    from PIL import Image
-    import logging
-    import re
-
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-
-    # Konfigurasi Tesseract yang berbeda
-    configs = [
-        r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789/.,:-',  # Default
-        r'--oem 3 --psm 11',  # Sparse text. Find as much text as possible
-        r'--oem 3 --psm 3',   # Fully automatic page segmentation
-        r'--oem 3 --psm 1',   # Automatic page segmentation with OSD
+    Jalankan satu konfigurasi Tesseract pada gambar yang sudah dipreproses.
+    Satu pemanggilan menghasilkan teks, kotak kata dan confidence (OCRResult).
+    """
+    with ocr_timing.span(_config_stage(config)):
+        result = ocr_engine.run_ocr(image, lang='ind', config=config)
+    logger.info(f"Extraction with config '{config}':")
+    logger.info(f"  Text length: {len(result.text)}, mean confidence: {result.mean_confidence}")
+    return result
+
+def score_ocr_pass(text):
+    """
+    Nilai hasil OCR: field utama yang belum ditemukan dan skor kualitas teks (0-1)
+    """
+    missing = [name for name, pattern in CASCADE_KEY_FIELDS.items() if not pattern.search(text)]
+    quality = ocr_processor.get_text_quality_score(text) if text.strip() else 0.0
+    return missing, quality
+
+def record_cascade_decision(decision):
+    """Catat keputusan cascade ke log, statistik in-memory, dan file JSONL opsional"""
+    cascade_stats[decision['passes']] += 1
+    logger.info(
+        f"OCR cascade: {decision['passes']} pass(es), stopped_early={decision['stopped_early']}, "
+        f"missing={decision['missing']}, quality={decision['quality']:.2f}"
+    )
+    if OCR_CASCADE_LOG:
+        try:
+            with _cascade_log_lock:
+                with open(OCR_CASCADE_LOG, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(decision) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write OCR cascade log: {str(e)}")
+
+def _run_adaptive_cascade(shared_img, file_path):
+    """
+    Jalankan config mulai dari yang paling murah dan hanya naik ke psm berikutnya
+    jika field utama (nomor, perihal, tanggal) belum ada atau skor kualitas rendah.
+    """
+    extracted_results = []
+    passes = []
+    missing, quality = list(CASCADE_KEY_FIELDS), 0.0
+    for config in OCR_CONFIGS:
+        try:
+            result = _run_tesseract_config(shared_img, config)
+        except Exception as config_error:
+            logger.error(f"Error with config {config}: {str(config_error)}")
+            continue
+        if result.text.strip():
+            extracted_results.append(result)
+        with ocr_timing.span('cascade_score'):
+            missing, quality = score_ocr_pass("\n".join(r.text for r in extracted_results))
+        passes.append({'config': config, 'missing': missing, 'quality': round(quality, 3)})
+        if not missing and quality >= OCR_CASCADE_MIN_SCORE:
+            break
+
+    record_cascade_decision({
+        'file': os.path.basename(file_path),
+        'timestamp': time.time(),
+        'passes': len(passes),
+        'stopped_early': len(passes) < len(OCR_CONFIGS),
+        'missing': missing,
+        'quality': round(quality, 3),
+        'history': passes,
+    })
+    return extracted_results
+
+def _run_all_configs(shared_img):
+    """Jalankan semua config secara paralel, hasil digabung sesuai urutan OCR_CONFIGS"""
+    executor = get_ocr_executor()
+    futures = [
+        executor.submit(ocr_timing.bind(_run_tesseract_config), shared_img, config)
+        for config in OCR_CONFIGS
     ]
 
-    # Preprocessing untuk meningkatkan kualitas OCR
-    def preprocess_image(image):
-        # Convert to grayscale
-        gray = image.convert('L')
-        
-        # Optional: Enhance contrast
-        from PIL import ImageEnhance
-        enhancer = ImageEnhance.Contrast(gray)
-        gray = enhancer.enhance(2.5)  # Meningkatkan kontras lebih tinggi
-        
-        # Optional: Sharpen image
-        from PIL import ImageFilter
-        gray = gray.filter(ImageFilter.SHARPEN)
-        
-        return gray
+    # Ekstraksi teks dengan konfigurasi berbeda, urutan tetap sama
+    extracted_results = []
+    for config, future in zip(OCR_CONFIGS, futures):
+        try:
+            result = future.result()
+            if result.text.strip():
+                extracted_results.append(result)
+        except Exception as config_error:
+            logger.error(f"Error with config {config}: {str(config_error)}")
+    return extracted_results
 
+def extract_ocr_result(file_path, file_hash=None, mode=None):
+    """
+    Extract text from image using multiple Tesseract configurations
+    with comprehensive logging and debugging.
+    Mode 'all' menjalankan semua konfigurasi paralel pada satu gambar hasil
+    preprocessing; mode 'adaptive' (default) berhenti setelah config pertama
+    yang hasilnya cukup baik. Hasil semua pass digabung sesuai urutan
+    OCR_CONFIGS menjadi satu ``OCRResult`` (teks, kotak kata, confidence) dan
+    disimpan di cache OCR berdasarkan hash isi file.
+    """
+    mode = mode or OCR_CASCADE_MODE
     try:
-        # Buka gambar
-        img = Image.open(file_path)
-        
-        # Preprocessing gambar
-        preprocessed_img = preprocess_image(img)
-        
+        # Cek cache OCR sebelum menjalankan Tesseract
+        cache = get_ocr_cache()
+        cache_key = None
+        if cache is not None:
+            file_hash = file_hash or calculate_file_hash(file_path)
+            cache_key = make_cache_key(
+                file_hash, 'ind', OCR_CONFIGS + [mode, 'txt+tsv'], preprocess_version()
+            )
+            with ocr_timing.span('cache_lookup'):
+                cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OCR cache hit for {file_path} ({file_hash})")
+                if not cached['text']:
+                    return None
+                return ocr_engine.OCRResult.from_cache(cached['text'], cached['tsv'])
+
+        # Buka gambar (JPEG besar langsung didekode pada resolusi lebih kecil)
+        report_job_stage(JOB_PREPROCESSING)
+        with ocr_timing.span('load_image'):
+            img, source_dpi = load_image_for_ocr(file_path)
+
+        # Preprocessing gambar; waktu tiap langkah pipeline ikut dicatat
+        step_timings = {} if ocr_timing.active() else None
+        with ocr_timing.span('preprocess'):
+            preprocessed_img = preprocess_image(img, source_dpi, timings=step_timings)
+        ocr_timing.add_substages('preprocess', step_timings)
+
         # Simpan log detail gambar
         logger.info(f"Image Details:")
         logger.info(f"  Path: {file_path}")
@@ -900,34 +747,37 @@ def extract_text_with_multiple_configs(file_path):
         logger.info(f"  Mode: {img.mode}")
         logger.info(f"  Size: {img.size}")
 
-        # Ekstraksi teks dengan konfigurasi berbeda
-        extracted_texts = []
-        for config in configs:
-            try:
-                text = pytesseract.image_to_string(preprocessed_img, config=config, lang='ind')
-                
-                # Log detail ekstraksi
-                logger.info(f"Extraction with config '{config}':")
-                logger.info(f"  Text length: {len(text)}")
-                
-                if text.strip():
-                    extracted_texts.append(text)
-            except Exception as config_error:
-                logger.error(f"Error with config {config}: {str(config_error)}")
-
-        # Gabungkan teks dari berbagai konfigurasi
-        combined_text = "\n".join(extracted_texts)
-        
+        # Gambar hasil preprocessing dipakai bersama oleh semua konfigurasi
+        report_job_stage(JOB_OCR)
+        with ocr_timing.span('ocr'), ocr_engine.shared_image(preprocessed_img) as shared_img:
+            if mode == 'adaptive':
+                extracted_results = _run_adaptive_cascade(shared_img, file_path)
+            else:
+                extracted_results = _run_all_configs(shared_img)
+
+        # Gabungkan hasil dari berbagai konfigurasi
+        with ocr_timing.span('combine'):
+            combined = ocr_engine.OCRResult.combine(extracted_results)
+
         # Log teks gabungan
         logger.info("Combined Extracted Text:")
-        logger.info(combined_text)
+        logger.info(combined.text)
+
+        if cache_key is not None and combined.text:
+            with ocr_timing.span('cache_store'):
+                cache.set(cache_key, file_hash, combined.text, combined.tsv)
 
-        return combined_text if combined_text else None
+        return combined if combined.text else None
 
     except Exception as e:
         logger.error(f"Error extracting text from {file_path}: {str(e)}")
         return None
 
+def extract_text_with_multiple_configs(file_path, file_hash=None, mode=None):
+    """Seperti extract_ocr_result, tetapi hanya mengembalikan teks gabungan"""
+    result = extract_ocr_result(file_path, file_hash=file_hash, mode=mode)
+    return result.text if result else None
+
 # Update extract_ocr_data agar lebih robust
 
 def determine_jenis_surat(kodesurat2):
@@ -953,27 +803,30 @@ def determine_jenis_surat(kodesurat2):
 
 def extract_ocr_data(file_path):
     try:
-        ocr_output = extract_text_with_multiple_configs(file_path)
+        file_hash = calculate_file_hash(file_path)
+        ocr_output = extract_text_with_multiple_configs(file_path, file_hash=file_hash)
         if not ocr_output:
             return None
             
         cleaned_text = clean_text(ocr_output)
         normalized_text = normalize_ocr_text(cleaned_text)
         
-        # Ekstraksi field dengan logging
-        nomor_surat = extract_nomor_surat(normalized_text)
-        tanggal = extract_tanggal(normalized_text)
-        pengirim = extract_pengirim(normalized_text)
-        penerima = extract_penerima_surat_keluar(normalized_text)
-        isi_surat = extract_isi_suratmasuk(normalized_text)
+        # Ekstraksi semua field dalam satu panggilan
+        from config.ocr_fields import extract_fields
+        fields = extract_fields(normalized_text, (
+            'nomor_surat', 'tanggal', 'pengirim', 'penerima', 'isi_suratmasuk', 'document_code'
+        ))
+        nomor_surat = fields['nomor_surat']
+        tanggal = fields['tanggal']
+        pengirim = fields['pengirim']
+        penerima = fields['penerima']
+        isi_surat = fields['isi_suratmasuk']
         
         # Ekstraksi komponen nomor surat untuk kodesurat2
         kodesurat2 = 'Not found'
         if nomor_surat != 'Not found':
-            # Coba ekstrak HM code dari nomor surat
-            hm_code = extract_document_code(normalized_text)
-            if hm_code != 'Not found':
-                kodesurat2 = hm_code
+            # HM code hanya dipakai jika nomor surat ditemukan
+            kodesurat2 = fields['document_code']
         
         # Determine jenis surat based on kodesurat2
         jenis_surat = determine_jenis_surat(kodesurat2)
@@ -12,7 +12,6 @@ from collections import defaultdict
 from calendar import monthrange
 from datetime import datetime
 
-import pytesseract
 from flask import (
     Blueprint, render_template, request, send_file, redirect, url_for,
     flash, jsonify, current_app, send_from_directory
@@ -20,9 +19,8 @@ from flask import (
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from sqlalchemy import desc, asc, extract, func, or_
-from docx import Document
-from mailmerge import MailMerge
 
+from config import ocr_engine
 from config.extensions import db
 from config.models import SuratKeluar, SuratMasuk, Pegawai
 from config.route_utils import role_required
@@ -159,7 +157,7 @@ def laporan_statistik():
 @login_required
 def surat_keluar():
     """Surat keluar list"""
-    daftar_surat = SuratKeluar.query.all()
+    daftar_surat = SuratKeluar.list_query().all()
     return render_template('surat_keluar/surat_keluar.html', daftar_surat=daftar_surat)
 
 
@@ -185,7 +183,7 @@ def test_surat_keluar():
 def list_surat_keluar():
     """List surat keluar for approval"""
     try:
-        pending_surat_masuk = SuratMasuk.query.filter_by(status_suratMasuk='pending').all()
+        pending_surat_masuk = SuratMasuk.list_query().filter_by(status_suratMasuk='pending').all()
         pending_surat_masuk_count = len(pending_surat_masuk)
         
         return render_template('surat_keluar/list_surat_keluar.html',
@@ -239,7 +237,7 @@ def reject_surat(surat_id):
 def list_pending_surat_masuk():
     """List pending surat masuk"""
     try:
-        pending_surat_masuk = SuratMasuk.query.filter_by(status_suratMasuk='pending').all()
+        pending_surat_masuk = SuratMasuk.list_query().filter_by(status_suratMasuk='pending').all()
         return render_template('surat_masuk/list_pending_surat_masuk.html', 
                                pending_surat_masuk=pending_surat_masuk)
     except Exception as e:
@@ -273,7 +271,7 @@ def ocr_test():
                     file.save(temp_path)
                     
                     # Perform OCR
-                    extracted_text = pytesseract.image_to_string(temp_path, lang='ind+eng')
+                    extracted_text = ocr_engine.image_to_string(temp_path, lang='ind+eng')
                     
                     # Clean up
                     os.remove(temp_path)
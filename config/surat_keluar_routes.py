@@ -39,7 +39,7 @@ def show_surat_keluar():
         sort_column = sort_options.get(sort, SuratKeluar.tanggal_suratKeluar)
         order_by = asc(sort_column) if order == 'asc' else desc(sort_column)
 
-        query = SuratKeluar.query
+        query = SuratKeluar.list_query()
 
         if search:
             like_pattern = f"%{search}%"
@@ -155,7 +155,7 @@ def delete_surat_keluar(id_suratKeluar):
 @login_required
 def surat_keluar():
     """Surat keluar list (legacy route)"""
-    daftar_surat = SuratKeluar.query.all()
+    daftar_surat = SuratKeluar.list_query().all()
     return render_template('surat_keluar/surat_keluar.html', daftar_surat=daftar_surat)
 
 
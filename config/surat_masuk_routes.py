@@ -4,15 +4,15 @@ Incoming document management functionality
 """
 
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
 from flask_login import login_required, current_user
 from sqlalchemy import desc, asc, or_
-import io
 
 from config.extensions import db
 from config.models import SuratMasuk, SuratKeluar
 from config.forms import SuratMasukForm
 from config.route_utils import role_required
+from config.blob_store import send_blob
 
 surat_masuk_bp = Blueprint('surat_masuk', __name__)
 
@@ -37,7 +37,7 @@ def show_surat_masuk():
         
         order = 'desc' if order == 'desc' else 'asc'
         
-        query = SuratMasuk.query
+        query = SuratMasuk.list_query()
 
         if search_query:
             search_filter = f'%{search_query}%'
@@ -229,7 +229,7 @@ def delete_surat_masuk(id):
 def list_pending_surat_masuk():
     """List pending surat masuk"""
     try:
-        pending_surat_masuk = SuratMasuk.query.filter_by(status_suratMasuk='pending').all()
+        pending_surat_masuk = SuratMasuk.list_query().filter_by(status_suratMasuk='pending').all()
         return render_template('surat_masuk/list_pending_surat_masuk.html', 
                                pending_surat_masuk=pending_surat_masuk)
     except Exception as e:
@@ -349,8 +349,8 @@ def get_surat_masuk_detail(surat_id):
             'penerima_suratMasuk': str(surat.penerima_suratMasuk) if surat.penerima_suratMasuk else '',
             'isi_suratMasuk': str(surat.isi_suratMasuk) if surat.isi_suratMasuk else '',
             'status_suratMasuk': str(surat.status_suratMasuk) if surat.status_suratMasuk else 'pending',
-            'file_suratMasuk': bool(surat.file_suratMasuk),
-            'has_gambar': bool(surat.gambar_suratMasuk),
+            'file_suratMasuk': surat.has_file,
+            'has_gambar': surat.has_gambar,
             'created_at': created_at_str
         }
         return jsonify({
@@ -368,15 +368,17 @@ def get_surat_masuk_detail(surat_id):
 @role_required('pimpinan')
 def download_surat_masuk(id):
     surat_masuk = SuratMasuk.query.get_or_404(id)
-    if not surat_masuk.file_suratMasuk:
-        flash('Dokumen tidak tersedia.', 'error')
-        return redirect(url_for('surat_masuk.detail_surat_masuk', id=id))
     try:
-        return send_file(
+        response = send_blob(
+            surat_masuk.file_blob_suratMasuk,
             surat_masuk.file_suratMasuk,
             as_attachment=True,
-            download_name=f"Surat_Masuk_{surat_masuk.nomor_suratMasuk}.pdf"
+            download_name=f"Surat_Masuk_{surat_masuk.nomor_suratMasuk}"
         )
+        if response is None:
+            flash('Dokumen tidak tersedia.', 'error')
+            return redirect(url_for('surat_masuk.detail_surat_masuk', id=id))
+        return response
     except Exception as e:
         flash('Gagal mengunduh dokumen.', 'error')
         return redirect(url_for('surat_masuk.detail_surat_masuk', id=id))
@@ -387,14 +389,10 @@ def download_surat_masuk(id):
 def view_surat_masuk_image(id):
     try:
         surat = SuratMasuk.query.get_or_404(id)
-        if surat.gambar_suratMasuk:
-            return send_file(
-                io.BytesIO(surat.gambar_suratMasuk),
-                mimetype='image/jpeg',
-                as_attachment=False
-            )
-        else:
+        response = send_blob(surat.gambar_blob_suratMasuk, surat.gambar_suratMasuk)
+        if response is None:
             return jsonify({'error': 'Gambar tidak ditemukan'}), 404
+        return response
     except Exception as e:
         return jsonify({'error': 'Terjadi kesalahan saat memuat gambar'}), 500
 
@@ -512,7 +510,8 @@ def debug_surat_detail(surat_id):
                 'perihal_suratMasuk': getattr(surat, 'perihal_suratMasuk', None),
                 'isi_suratMasuk': surat.isi_suratMasuk,
                 'status_suratMasuk': surat.status_suratMasuk,
-                'file_suratMasuk': str(surat.file_suratMasuk),
+                'file_blob_suratMasuk': surat.file_blob_suratMasuk,
+                'has_file': surat.has_file,
                 'created_at': str(surat.created_at) if surat.created_at else None
             }
         })
@@ -10,7 +10,6 @@ from datetime import datetime
 from collections import defaultdict
 from calendar import monthrange
 
-import pytesseract
 from flask import (
     Blueprint, render_template, request, send_file, redirect, url_for,
     flash, jsonify, current_app, send_from_directory
@@ -18,8 +17,6 @@ from flask import (
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from sqlalchemy import desc, asc, extract, func, or_
-from docx import Document
-from mailmerge import MailMerge
 
 from config.extensions import db
 from config.models import SuratKeluar, SuratMasuk
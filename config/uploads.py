@@ -0,0 +1,207 @@
+"""
+Uploads
+=======
+File upload dibaca dari jaringan dan ditulis ke disk tepat satu kali.
+
+``UploadRequest`` (request class aplikasi) membuat werkzeug mengalirkan
+setiap file dari body multipart langsung ke file sementara di
+``UPLOAD_TMP_FOLDER``, per chunk, sambil menghitung hash konten (sama dengan
+``calculate_file_hash``), menyimpan magic bytes di awal file, dan menolak
+file yang melebihi ``OCR_UPLOAD_MAX_BYTES`` sebelum sisanya diterima.
+
+``ingest_upload`` lalu memvalidasi format dari magic bytes (bukan dari
+ekstensi nama file) dan memindahkan file sementara ke folder tujuan dengan
+``os.replace``, tanpa membaca ulang isinya. Hasilnya ``IngestedUpload``
+berisi path dan hash, sehingga OCR tidak perlu menghitung hash lagi.
+
+Upload yang diproses job background memakai ``unique=True``: nama file di
+disk diawali hash isinya, sehingga upload lain dengan nama sama (mis.
+``scan0001.jpg`` dari scanner) tidak menimpa file sebelum job membacanya.
+"""
+
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from config.ocr_utils import HASH_CHUNK_SIZE, new_content_hasher
+
+basedir = os.path.abspath(os.path.dirname(__file__) + '/../')
+
+# Batas ukuran per file upload (default 10 MB, sesuai petunjuk di form upload)
+OCR_UPLOAD_MAX_BYTES = int(os.environ.get('OCR_UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+# Harus satu filesystem dengan folder upload agar os.replace tidak menyalin
+UPLOAD_TMP_FOLDER = os.environ.get('OCR_UPLOAD_TMP_FOLDER', os.path.join(basedir, 'instance', 'upload_tmp'))
+
+IMAGE_FORMATS = frozenset({'png', 'jpeg', 'webp', 'tiff', 'bmp'})
+PDF_FORMATS = frozenset({'pdf'})
+
+# Panjang awalan hash pada nama file upload unik
+UNIQUE_NAME_HASH_LENGTH = 16
+
+# Cukup untuk semua signature di bawah (WEBP butuh 12 byte)
+SNIFF_BYTES = 16
+
+_MAGIC_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'%PDF-', 'pdf'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'BM', 'bmp'),
+)
+
+IngestedUpload = namedtuple('IngestedUpload', 'path filename file_hash size format')
+
+
+class UploadError(ValueError):
+    """File upload ditolak (format tidak didukung, kosong, atau terlalu besar)"""
+
+
+def sniff_format(header):
+    """Format file dari magic bytes di awal isi file, atau None jika tidak dikenal"""
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    for signature, file_format in _MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            return file_format
+    return None
+
+
+class HashingUploadStream:
+    """
+    File sementara untuk satu file upload yang menghitung hash dan menyimpan
+    magic bytes selama ditulis. Dihapus saat request ditutup kecuali sudah
+    dipindahkan oleh ``ingest_upload``.
+    """
+
+    def __init__(self, max_bytes=OCR_UPLOAD_MAX_BYTES):
+        os.makedirs(UPLOAD_TMP_FOLDER, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_FOLDER, prefix='upload-', delete=False)
+        self.name = self._file.name
+        self.max_bytes = max_bytes
+        self.hasher = new_content_hasher()
+        self.header = b''
+        self.size = 0
+        self.claimed = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise RequestEntityTooLarge(
+                f"File melebihi batas {self.max_bytes // (1024 * 1024)} MB"
+            )
+        if len(self.header) < SNIFF_BYTES:
+            self.header += bytes(data[:SNIFF_BYTES - len(self.header)])
+        self.hasher.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read/seek/tell/flush/... diteruskan ke file sementara
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def close(self):
+        self._file.close()
+        if not self.claimed:
+            try:
+                os.unlink(self.name)
+            except FileNotFoundError:
+                pass
+
+
+class UploadRequest(Request):
+    """Request yang menulis file upload langsung ke HashingUploadStream"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        stream = HashingUploadStream()
+        # Dicatat sendiri: file yang parsing-nya gagal (mis. terlalu besar) tidak masuk request.files
+        self.__dict__.setdefault('_upload_streams', []).append(stream)
+        return stream
+
+    def close(self):
+        super().close()
+        for stream in self.__dict__.pop('_upload_streams', ()):
+            stream.close()
+
+
+def _copy_and_hash(stream, tmp, max_bytes):
+    """Fallback untuk stream biasa: salin per chunk sambil menghitung hash"""
+    hasher = new_content_hasher()
+    header = b''
+    size = 0
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise UploadError(f"File melebihi batas {max_bytes // (1024 * 1024)} MB")
+        if len(header) < SNIFF_BYTES:
+            header += chunk[:SNIFF_BYTES - len(header)]
+        hasher.update(chunk)
+        tmp.write(chunk)
+    return hasher.hexdigest(), header, size
+
+
+def ingest_upload(file, upload_folder, filename, allowed_formats=IMAGE_FORMATS, max_bytes=OCR_UPLOAD_MAX_BYTES,
+                  unique=False):
+    """
+    Simpan ``file`` (FileStorage) sebagai ``upload_folder/filename`` setelah
+    format (magic bytes) dan ukurannya dicek. Dengan ``unique``, nama di disk
+    menjadi ``<awalan hash isi>_<filename>`` (``IngestedUpload.filename``).
+    Mengembalikan IngestedUpload; melempar UploadError jika file ditolak
+    (tidak ada file yang tertinggal).
+    """
+    os.makedirs(upload_folder, exist_ok=True)
+    stream = file.stream
+
+    if isinstance(stream, HashingUploadStream):
+        file_hash, header, size = stream.hasher.hexdigest(), stream.header, stream.size
+        tmp_path = None
+    else:
+        with tempfile.NamedTemporaryFile(dir=upload_folder, prefix='.upload-', delete=False) as tmp:
+            tmp_path = tmp.name
+            try:
+                file_hash, header, size = _copy_and_hash(stream, tmp, max_bytes)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp_path)
+                raise
+
+    try:
+        if size == 0:
+            raise UploadError(f"File '{filename}' kosong")
+        if max_bytes and size > max_bytes:
+            raise UploadError(f"File '{filename}' melebihi batas {max_bytes // (1024 * 1024)} MB")
+        file_format = sniff_format(header)
+        if file_format not in allowed_formats:
+            raise UploadError(f"Isi file '{filename}' bukan format yang didukung ({', '.join(sorted(allowed_formats))})")
+
+        # Nama sama berarti isi sama, jadi menimpa file yang sedang dibaca job lain tetap aman
+        stored_filename = f"{file_hash[:UNIQUE_NAME_HASH_LENGTH]}_{filename}" if unique else filename
+        path = os.path.join(upload_folder, stored_filename)
+
+        if tmp_path is None:
+            stream.flush()
+            try:
+                os.replace(stream.name, path)
+            except OSError:
+                # Folder sementara di filesystem lain: terpaksa disalin
+                shutil.copyfile(stream.name, path)
+            else:
+                stream.claimed = True
+        else:
+            os.replace(tmp_path, path)
+            tmp_path = None
+        # File sementara dibuat 0600; file upload harus bisa dibaca web server
+        os.chmod(path, 0o644)
+    finally:
+        if tmp_path is not None:
+            os.unlink(tmp_path)
+
+    return IngestedUpload(path, stored_filename, file_hash, size, file_format)
@@ -0,0 +1,38 @@
+"""add file_hash ke SuratMasuk dan SuratKeluar
+
+Revision ID: 3a9c1e7b5d20
+Revises: 77b7ce504c73
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9c1e7b5d20'
+down_revision = '77b7ce504c73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Index tidak unik: data lama bisa berisi duplikat; isi kolom dengan
+    # scripts/backfill_file_hash.py setelah upgrade
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_surat_masuk_file_hash'), ['file_hash'], unique=False)
+
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_surat_keluar_file_hash'), ['file_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_surat_keluar_file_hash'))
+        batch_op.drop_column('file_hash')
+
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_surat_masuk_file_hash'))
+        batch_op.drop_column('file_hash')
@@ -0,0 +1,33 @@
+"""add phash ke SuratMasuk dan SuratKeluar
+
+Revision ID: 8e41d6c2a7f3
+Revises: 3a9c1e7b5d20
+Create Date: 2026-10-18 11:47:05.218934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41d6c2a7f3'
+down_revision = '3a9c1e7b5d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tanpa index database: pencarian near-duplicate memakai BK-tree di memori (config.ocr_phash)
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phash', sa.String(length=16), nullable=True))
+
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phash', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.drop_column('phash')
+
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.drop_column('phash')
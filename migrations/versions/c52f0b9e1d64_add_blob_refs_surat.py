@@ -0,0 +1,38 @@
+"""add referensi blob store ke SuratMasuk dan SuratKeluar
+
+Revision ID: c52f0b9e1d64
+Revises: 8e41d6c2a7f3
+Create Date: 2026-10-18 14:03:27.661092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52f0b9e1d64'
+down_revision = '8e41d6c2a7f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Isi blob lama dipindahkan ke blob store dengan scripts/migrate_blobs_to_store.py
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gambar_blob_suratMasuk', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('file_blob_suratMasuk', sa.String(length=64), nullable=True))
+
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gambar_blob_suratKeluar', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('file_blob_suratKeluar', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    # Blob yang sudah dipindahkan tidak dikembalikan ke database
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.drop_column('file_blob_suratKeluar')
+        batch_op.drop_column('gambar_blob_suratKeluar')
+
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.drop_column('file_blob_suratMasuk')
+        batch_op.drop_column('gambar_blob_suratMasuk')
@@ -0,0 +1,42 @@
+"""perlebar phash SuratMasuk dan SuratKeluar untuk pHash 1024-bit
+
+Revision ID: f1d84a6c3e27
+Revises: c52f0b9e1d64
+Create Date: 2026-10-18 16:21:48.307516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1d84a6c3e27'
+down_revision = 'c52f0b9e1d64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # dHash 64-bit lama tidak bisa dibandingkan dengan pHash baru; isi ulang dengan
+    # scripts/backfill_file_hash.py --phash
+    op.execute("UPDATE surat_masuk SET phash = NULL")
+    op.execute("UPDATE surat_keluar SET phash = NULL")
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.alter_column('phash', existing_type=sa.String(length=16), type_=sa.String(length=256),
+                              existing_nullable=True)
+
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.alter_column('phash', existing_type=sa.String(length=16), type_=sa.String(length=256),
+                              existing_nullable=True)
+
+
+def downgrade():
+    op.execute("UPDATE surat_keluar SET phash = NULL")
+    op.execute("UPDATE surat_masuk SET phash = NULL")
+    with op.batch_alter_table('surat_keluar', schema=None) as batch_op:
+        batch_op.alter_column('phash', existing_type=sa.String(length=256), type_=sa.String(length=16),
+                              existing_nullable=True)
+
+    with op.batch_alter_table('surat_masuk', schema=None) as batch_op:
+        batch_op.alter_column('phash', existing_type=sa.String(length=256), type_=sa.String(length=16),
+                              existing_nullable=True)
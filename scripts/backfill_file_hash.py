@@ -0,0 +1,124 @@
+"""
+Isi kolom file_hash surat masuk/keluar lama dari blob file_suratMasuk/file_suratKeluar.
+Dengan ``--phash``, kolom phash (config.ocr_phash) juga diisi dari gambar surat,
+baik yang sudah di blob store maupun yang masih di kolom blob lama.
+
+Contoh:
+    flask db upgrade
+    python scripts/backfill_file_hash.py
+    python scripts/backfill_file_hash.py --phash --batch-size 50 --dry-run
+    python scripts/backfill_file_hash.py --recompute   # setelah algoritma hash berubah
+
+Baris diproses per batch (keyset pagination pada primary key) dan blob dimuat
+satu per satu, sehingga memori tidak bergantung pada jumlah maupun total
+ukuran blob. Baris yang sudah punya hash dilewati, jadi skrip aman
+dijalankan ulang setelah terputus.
+
+Jalankan sebelum scripts/migrate_blobs_to_store.py: setelah blob dipindahkan
+ke blob store, kolom blob lama sudah kosong (file_hash diisi oleh skrip itu).
+``--phash`` tetap bisa dijalankan sesudahnya. Restart aplikasi setelah
+``--phash`` agar index phash di memori memuat ulang hash baru.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from sqlalchemy import inspect
+
+from app import app
+from config.blob_store import get_blob_store
+from config.extensions import db
+from config.models import SuratKeluar, SuratMasuk
+from config.ocr_phash import compute_phash, compute_phash_bytes
+from config.ocr_utils import calculate_bytes_hash
+
+# (model, primary key, blob file asli, blob gambar, referensi store file asli, referensi store gambar)
+TARGETS = (
+    (SuratMasuk, SuratMasuk.id_suratMasuk, SuratMasuk.file_suratMasuk, SuratMasuk.gambar_suratMasuk,
+     SuratMasuk.file_blob_suratMasuk, SuratMasuk.gambar_blob_suratMasuk),
+    (SuratKeluar, SuratKeluar.id_suratKeluar, SuratKeluar.file_suratKeluar, SuratKeluar.gambar_suratKeluar,
+     SuratKeluar.file_blob_suratKeluar, SuratKeluar.gambar_blob_suratKeluar),
+)
+
+
+def compute_phash_stored(digest):
+    """pHash dari blob di blob store, atau None jika file blob tidak ada"""
+    store = get_blob_store()
+    return compute_phash(store.path_for(digest)) if store.exists(digest) else None
+
+
+def backfill(model, id_column, blob_column, hash_column, hash_func, batch_size, dry_run=False, recompute=False):
+    """
+    Isi ``hash_column`` dengan ``hash_func(blob)`` untuk setiap baris yang belum
+    punya hash (atau semua baris jika ``recompute``); mengembalikan jumlah baris yang diisi.
+    """
+    pending = (blob_column.isnot(None),) if recompute else (hash_column.is_(None), blob_column.isnot(None))
+    last_id = 0
+    updated = 0
+    while True:
+        ids = [
+            row_id for (row_id,) in db.session.query(id_column)
+            .filter(*pending, id_column > last_id)
+            .order_by(id_column)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        for row_id in ids:
+            blob = db.session.query(blob_column).filter(id_column == row_id).scalar()
+            if not blob:
+                continue
+            value = hash_func(blob)
+            del blob
+            if value is None:
+                continue
+            if not dry_run:
+                db.session.query(model).filter(id_column == row_id).update(
+                    {hash_column: value}, synchronize_session=False
+                )
+            updated += 1
+        if not dry_run:
+            db.session.commit()
+        last_id = ids[-1]
+        print(f"{model.__tablename__}.{hash_column.key}: {updated} baris sampai id {last_id}", file=sys.stderr)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill file_hash dari blob file surat')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--phash', action='store_true', help='Isi juga perceptual hash dari blob gambar')
+    parser.add_argument('--dry-run', action='store_true', help='Hitung hash tanpa menyimpan')
+    parser.add_argument('--recompute', action='store_true',
+                        help='Hitung ulang file_hash yang sudah terisi (mis. dari hash MD5 lama)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        batch_size = max(1, args.batch_size)
+        for model, id_column, file_column, image_column, file_ref_column, image_ref_column in TARGETS:
+            jobs = [(file_column, model.file_hash, calculate_bytes_hash, args.recompute)]
+            if args.phash:
+                # Gambar dulu; surat lama tanpa gambar memakai file aslinya (jika berupa gambar)
+                jobs += [(image_ref_column, model.phash, compute_phash_stored, False),
+                         (image_column, model.phash, compute_phash_bytes, False),
+                         (file_ref_column, model.phash, compute_phash_stored, False),
+                         (file_column, model.phash, compute_phash_bytes, False)]
+            columns = {column['name'] for column in inspector.get_columns(model.__tablename__)}
+            for blob_column, hash_column, hash_func, recompute in jobs:
+                if hash_column.key not in columns:
+                    print(f"Kolom {hash_column.key} belum ada di {model.__tablename__}; jalankan 'flask db upgrade' dulu",
+                          file=sys.stderr)
+                    return 1
+                updated = backfill(model, id_column, blob_column, hash_column, hash_func,
+                                   batch_size, dry_run=args.dry_run, recompute=recompute)
+                print(f"{model.__tablename__}.{hash_column.key} dari {blob_column.key}: "
+                      f"{updated} baris {'akan diisi' if args.dry_run else 'diisi'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+OCR paralel untuk satu folder scan (backfill).
+
+Contoh:
+    python scripts/batch_ocr.py surat_masuk /data/scan/2024-05 --workers 8 --output hasil.jsonl
+    python scripts/batch_ocr.py surat_keluar /data/scan/keluar --save
+
+Hasil ditulis per baris (JSON Lines) begitu setiap file selesai, sehingga
+batch yang terputus tetap menyisakan hasil yang sudah diproses.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from config.ocr_batch import iter_batch_ocr, list_image_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch OCR folder scan surat')
+    parser.add_argument('kind', choices=['surat_masuk', 'surat_keluar'])
+    parser.add_argument('folder')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-files', type=int, default=None)
+    parser.add_argument('--output', default=None, help='File JSON Lines (default: stdout)')
+    parser.add_argument('--save', action='store_true', help='Simpan hasil ke database')
+    args = parser.parse_args()
+
+    if args.kind == 'surat_masuk':
+        from config.ocr_surat_masuk import (
+            extract_ocr_data_surat_masuk as extractor,
+            save_batch_results_to_db_surat_masuk as save_results,
+        )
+    else:
+        from config.ocr_surat_keluar import (
+            extract_ocr_data as extractor,
+            save_batch_results_to_db as save_results,
+        )
+
+    file_paths = list_image_files(args.folder, max_files=args.max_files)
+    print(f"{len(file_paths)} file akan diproses", file=sys.stderr)
+
+    app = None
+    if args.save:
+        from app import app
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    done = failed = 0
+    try:
+        for file_path, data, error in iter_batch_ocr(extractor, file_paths, max_workers=args.workers):
+            done += 1
+            if data:
+                data['filename'] = os.path.basename(file_path)
+                if app is not None:
+                    with app.app_context():
+                        save_results([data])
+            else:
+                failed += 1
+            output.write(json.dumps(
+                {'file': file_path, 'data': data, 'error': error}, default=str
+            ) + '\n')
+            output.flush()
+            print(f"[{done}/{len(file_paths)}] {os.path.basename(file_path)}"
+                  f"{' GAGAL: ' + error if error else ''}", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Selesai: {done - failed} berhasil, {failed} gagal", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
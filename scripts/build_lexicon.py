@@ -0,0 +1,41 @@
+"""
+Panen kosakata dari surat masuk/keluar tersimpan untuk leksikon OCR.
+
+Contoh:
+    python scripts/build_lexicon.py
+    python scripts/build_lexicon.py --min-count 3
+
+Hasil (kata<TAB>frekuensi) ditulis ke OCR_LEXICON_HARVEST_PATH (default
+instance/ocr_lexicon.txt di folder aplikasi, apa pun direktori kerjanya) dan
+dipakai word_breaker bersama daftar kata bawaan config/data/indonesian_words.txt
+saat proses berikutnya dimulai.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from config.ocr_lexicon import (
+    OCR_LEXICON_HARVEST_PATH, OCR_LEXICON_MIN_COUNT, harvest_vocabulary,
+    iter_stored_letter_texts, write_word_counts,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bangun kosakata leksikon OCR dari surat tersimpan')
+    parser.add_argument('--output', default=OCR_LEXICON_HARVEST_PATH)
+    parser.add_argument('--min-count', type=int, default=OCR_LEXICON_MIN_COUNT)
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        counts = harvest_vocabulary(iter_stored_letter_texts(), min_count=args.min_count)
+
+    write_word_counts(counts, args.output)
+    print(f"{len(counts)} kata ditulis ke {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Cek waktu import aplikasi dengan ``python -X importtime``.
+
+Contoh:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 600 --top 30
+
+Gagal (exit 1) jika ``import app`` lebih lama dari budget, atau jika
+dependensi berat (lihat config.lazy_imports.HEAVY_MODULES) ikut termuat saat
+start; dependensi tersebut harus diimpor di dalam fungsi yang memakainya.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.dirname(__file__) + '/../')
+sys.path.insert(0, ROOT)
+
+from config.lazy_imports import HEAVY_MODULES
+
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 800))
+
+# Dijalankan di proses baru agar cache import proses ini tidak ikut terhitung
+PROBE = (
+    'import json, sys\n'
+    'import app\n'
+    'heavy = {heavy!r}\n'
+    'print(json.dumps(sorted({{m.split(".")[0] for m in sys.modules}} & heavy)))\n'
+)
+
+
+def parse_importtime(stderr):
+    """
+    Baris ``import time: self | cumulative | modul`` menjadi list
+    (modul, self_us, cumulative_us, kedalaman).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # baris header
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cek waktu import aplikasi terhadap budget')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15, help='Jumlah modul paling lambat yang ditampilkan')
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(heavy=set(HEAVY_MODULES))],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-4000:], file=sys.stderr)
+        print('import app gagal', file=sys.stderr)
+        return 1
+
+    entries = parse_importtime(result.stderr)
+    # Modul tingkat atas saja; cumulative sudah mencakup semua import turunannya
+    total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+    loaded_heavy = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:14.1f} {self_us / 1000:9.1f}  {'  ' * depth}{name}")
+    print(f"\nTotal import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time exceeds budget by {total_ms - args.budget_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    if loaded_heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(loaded_heavy)}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Pindahkan blob gambar/file surat lama dari database ke blob store (config.blob_store).
+
+Contoh:
+    flask db upgrade
+    python scripts/migrate_blobs_to_store.py --dry-run
+    python scripts/migrate_blobs_to_store.py --batch-size 50 --vacuum
+
+Untuk setiap baris, blob ditulis ke store, hash-nya disimpan di kolom
+``*_blob_*`` dan kolom LargeBinary lama dikosongkan. Baris diproses per batch
+(keyset pagination pada primary key) dan blob dimuat satu per satu, jadi
+memori tidak bergantung pada ukuran tabel. Commit dilakukan per batch setelah
+blob batch itu tersimpan di disk, sehingga skrip aman dijalankan ulang setelah
+terputus. SQLite tidak mengecilkan file database sendiri; pakai ``--vacuum``
+setelah semua blob dipindahkan.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/../'))
+
+from sqlalchemy import inspect, text
+
+from app import app
+from config.blob_store import get_blob_store
+from config.extensions import db
+from config.models import SuratKeluar, SuratMasuk
+
+# (model, primary key, [(kolom blob lama, kolom referensi store)])
+TARGETS = (
+    (SuratMasuk, SuratMasuk.id_suratMasuk, (
+        (SuratMasuk.gambar_suratMasuk, SuratMasuk.gambar_blob_suratMasuk),
+        (SuratMasuk.file_suratMasuk, SuratMasuk.file_blob_suratMasuk),
+    )),
+    (SuratKeluar, SuratKeluar.id_suratKeluar, (
+        (SuratKeluar.gambar_suratKeluar, SuratKeluar.gambar_blob_suratKeluar),
+        (SuratKeluar.file_suratKeluar, SuratKeluar.file_blob_suratKeluar),
+    )),
+)
+
+
+def migrate(model, id_column, blob_column, ref_column, batch_size, dry_run=False):
+    """
+    Pindahkan isi ``blob_column`` ke store dan isi ``ref_column``; mengembalikan
+    (jumlah baris, total byte) yang dipindahkan.
+    """
+    store = get_blob_store()
+    is_file_blob = ref_column.key.startswith('file_')
+    last_id = 0
+    moved = 0
+    moved_bytes = 0
+    while True:
+        ids = [
+            row_id for (row_id,) in db.session.query(id_column)
+            .filter(blob_column.isnot(None), id_column > last_id)
+            .order_by(id_column)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        for row_id in ids:
+            blob = db.session.query(blob_column).filter(id_column == row_id).scalar()
+            if not blob:
+                continue
+            moved += 1
+            moved_bytes += len(blob)
+            if dry_run:
+                continue
+            digest = store.put_bytes(blob)
+            del blob
+            values = {ref_column: digest, blob_column: None}
+            query = db.session.query(model).filter(id_column == row_id)
+            query.update(values, synchronize_session=False)
+            if is_file_blob:
+                # Hash blob file asli sama dengan file_hash; isi sekalian jika belum ada
+                query.filter(model.file_hash.is_(None)).update(
+                    {model.file_hash: digest}, synchronize_session=False
+                )
+        if not dry_run:
+            db.session.commit()
+        last_id = ids[-1]
+        print(f"{model.__tablename__}.{blob_column.key}: {moved} baris sampai id {last_id}", file=sys.stderr)
+    return moved, moved_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pindahkan blob surat dari database ke blob store')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--dry-run', action='store_true', help='Hitung blob yang akan dipindahkan tanpa menyimpan')
+    parser.add_argument('--vacuum', action='store_true', help='Jalankan VACUUM (SQLite) setelah selesai')
+    args = parser.parse_args()
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        batch_size = max(1, args.batch_size)
+        for model, id_column, pairs in TARGETS:
+            columns = {column['name'] for column in inspector.get_columns(model.__tablename__)}
+            for blob_column, ref_column in pairs:
+                if ref_column.key not in columns:
+                    print(f"Kolom {ref_column.key} belum ada di {model.__tablename__}; jalankan 'flask db upgrade' dulu",
+                          file=sys.stderr)
+                    return 1
+                moved, moved_bytes = migrate(model, id_column, blob_column, ref_column,
+                                             batch_size, dry_run=args.dry_run)
+                print(f"{model.__tablename__}.{blob_column.key} -> {ref_column.key}: {moved} baris "
+                      f"({moved_bytes / (1024 * 1024):.1f} MB) {'akan dipindahkan' if args.dry_run else 'dipindahkan'}")
+
+        if args.vacuum and not args.dry_run and db.engine.dialect.name == 'sqlite':
+            db.session.close()
+            with db.engine.connect() as connection:
+                connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+            print("VACUUM selesai")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Worker tesserocr dibuat dengan argumen yang diterima PyTessBaseAPI
+(tesserocr tidak perlu terpasang; modulnya diganti modul palsu).
+"""
+
+import sys
+import types
+
+import pytest
+
+from config.ocr_engine import OCREnginePool, _TesseractWorker, parse_config
+from config.ocr_utils import OCR_CONFIGS
+
+
+class _Enum:
+    """Seperti enum tesserocr: anggota berupa int, kelasnya tidak bisa dibuat"""
+
+    def __init__(self):
+        raise TypeError('__init__() takes exactly 0 positional arguments')
+
+
+class _FakeOEM(_Enum):
+    TESSERACT_ONLY = 0
+    LSTM_ONLY = 1
+    TESSERACT_LSTM_COMBINED = 2
+    DEFAULT = 3
+
+
+class _FakePSM(_Enum):
+    AUTO = 3
+
+
+class _FakeAPI:
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        _FakeAPI.instances.append(self)
+
+    def End(self):
+        pass
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    module = types.ModuleType('tesserocr')
+    module.OEM = _FakeOEM
+    module.PSM = _FakePSM
+    module.PyTessBaseAPI = _FakeAPI
+    _FakeAPI.instances = []
+    monkeypatch.setitem(sys.modules, 'tesserocr', module)
+    return module
+
+
+@pytest.mark.parametrize('config', OCR_CONFIGS)
+def test_worker_accepts_oem_from_ocr_configs(fake_tesserocr, config):
+    oem, _, _ = parse_config(config)
+    assert oem == 3
+    worker = _TesseractWorker('ind', oem)
+    assert worker.api.kwargs == {'lang': 'ind', 'oem': 3}
+
+
+def test_worker_without_oem(fake_tesserocr):
+    worker = _TesseractWorker('ind', None)
+    assert worker.api.kwargs == {'lang': 'ind'}
+
+
+def test_pool_creates_worker_for_config(fake_tesserocr):
+    pool = OCREnginePool(size=1, max_jobs=10)
+    oem, _, _ = parse_config(OCR_CONFIGS[0])
+    with pool.worker('ind', oem) as worker:
+        assert worker.api.kwargs['oem'] == 3
+    # Worker dikembalikan ke pool dan dipakai ulang
+    with pool.worker('ind', oem):
+        pass
+    assert len(_FakeAPI.instances) == 1
@@ -0,0 +1,31 @@
+"""Pemuatan leksikon OCR dari file daftar kata"""
+
+import os
+
+from config import ocr_lexicon
+from config.ocr_lexicon import load_lexicon
+
+
+def test_harvest_path_is_inside_app_instance_folder():
+    if 'OCR_LEXICON_HARVEST_PATH' not in os.environ:
+        assert ocr_lexicon.OCR_LEXICON_HARVEST_PATH == os.path.join(ocr_lexicon.basedir, 'instance', 'ocr_lexicon.txt')
+        assert os.path.isabs(ocr_lexicon.OCR_LEXICON_HARVEST_PATH)
+
+
+def test_malformed_bundled_list_does_not_raise(tmp_path):
+    bundled = tmp_path / 'words.txt'
+    bundled.write_text('surat\t10\nrapat\tbanyak\n', encoding='utf-8')
+    harvest = tmp_path / 'harvest.txt'
+    harvest.write_text('undangan\t5\n', encoding='utf-8')
+
+    lexicon = load_lexicon(str(bundled), str(harvest))
+    assert len(lexicon) == 1
+
+
+def test_malformed_harvest_falls_back_to_bundled(tmp_path):
+    bundled = tmp_path / 'words.txt'
+    bundled.write_text('surat\nrapat\n', encoding='utf-8')
+    harvest = tmp_path / 'harvest.txt'
+    harvest.write_text('undangan\tx\n', encoding='utf-8')
+
+    assert len(load_lexicon(str(bundled), str(harvest))) == 2
@@ -0,0 +1,66 @@
+"""
+PhraseReplacer harus memberi hasil yang sama dengan loop ``re.sub`` per entri
+(perilaku lama ``_fix_broken_words`` dan ``_fix_legal_terms``).
+"""
+
+import random
+import re
+
+import pytest
+
+from config.ocr_text_processor import OCRTextProcessor, PhraseReplacer
+
+
+def sequential_sub(replacements, text):
+    """Perilaku lama: satu re.sub case-insensitive per entri, sesuai urutan tabel"""
+    for phrase, replacement in replacements.items():
+        text = re.sub(re.escape(phrase), replacement, text, flags=re.IGNORECASE)
+    return text
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return OCRTextProcessor()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ter hormatkami', 'terhormat kami'),
+    ('witang-gal', 'WITAnggal'),
+    ('alaiku mEng hadiri', 'alaikumenghadiri'),
+])
+def test_word_corrections_chain(processor, text, expected):
+    assert processor.word_replacer.sub(text) == sequential_sub(processor.word_corrections, text)
+    assert processor._fix_broken_words(text) == expected
+
+
+def test_clean_ocr_text_examples(processor):
+    # Hasil loop re.sub lama untuk teks yang sama
+    assert processor.clean_ocr_text('ter hormatkami') == 'Terhormat kami'
+    assert processor.clean_ocr_text('witang-gal') == 'Witanggal'
+    assert processor.clean_ocr_text('alaiku mEng hadiri') == 'Alaikumenghadiri'
+
+
+def test_prefix_and_overlap():
+    table = {'ab': 'X', 'abc': 'Y', 'bc': 'Z', 'xz': 'Q', 'a': 'ab'}
+    for text in ('abc', 'aabcc', 'abcabc', 'xbc', 'ABC', 'a', 'aa'):
+        assert PhraseReplacer(table).sub(text) == sequential_sub(table, text)
+
+
+def test_empty_table():
+    assert PhraseReplacer({}).sub('ter hormat') == 'ter hormat'
+
+
+@pytest.mark.parametrize('table_name', ['word_corrections', 'legal_terms'])
+def test_matches_sequential_sub(processor, table_name):
+    table = getattr(processor, table_name)
+    replacer = PhraseReplacer(table)
+    rng = random.Random(0)
+    pieces = list(table) + list(table.values()) + ['kami', 'tanggal', '-', ' ', 'a', 'meng']
+    for _ in range(2000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.5:
+            text = ''.join(c.upper() if rng.random() < 0.3 else c for c in text)
+        # Sambungan antar potongan bisa membentuk frasa baru, termasuk setelah penggantian
+        cut = rng.randint(0, len(text))
+        text = text[:cut] + text[cut + 1:]
+        assert replacer.sub(text) == sequential_sub(table, text), text
@@ -0,0 +1,36 @@
+"""ingest_upload: upload dengan nama sama tidak saling menimpa saat unique=True"""
+
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from config.uploads import ingest_upload
+
+JPEG_HEADER = b'\xff\xd8\xff'
+
+
+def _upload(data, filename='scan0001.jpg'):
+    return FileStorage(io.BytesIO(JPEG_HEADER + data), filename)
+
+
+def test_unique_names_keep_both_files(tmp_path):
+    first = ingest_upload(_upload(b'first'), str(tmp_path), 'scan0001.jpg', unique=True)
+    second = ingest_upload(_upload(b'second'), str(tmp_path), 'scan0001.jpg', unique=True)
+
+    assert first.path != second.path
+    assert first.filename.endswith('_scan0001.jpg')
+    assert first.filename.startswith(first.file_hash[:16])
+    with open(first.path, 'rb') as f:
+        assert f.read() == JPEG_HEADER + b'first'
+
+
+def test_same_content_same_name(tmp_path):
+    first = ingest_upload(_upload(b'same'), str(tmp_path), 'scan0001.jpg', unique=True)
+    second = ingest_upload(_upload(b'same'), str(tmp_path), 'scan0001.jpg', unique=True)
+    assert first.path == second.path
+
+
+def test_plain_name_without_unique(tmp_path):
+    upload = ingest_upload(_upload(b'data'), str(tmp_path), 'surat.jpg')
+    assert upload.filename == 'surat.jpg'
+    assert upload.path == str(tmp_path / 'surat.jpg')